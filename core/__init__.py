@@ -1,4 +1,4 @@
 from .downloader import DownloadTask, DownloadQueueWorker
 from .profile import UserProfile
 from .utils import set_circular_pixmap, format_speed, format_time
-from .history import load_history_initial, save_history, add_history_entry, delete_selected_history, delete_all_history, search_history
+from .history import HistoryTableModel, load_history_initial, add_history_entry, delete_selected_history, delete_all_history, search_history
@@ -0,0 +1,196 @@
+import time
+import threading
+
+# A share may run this far ahead of its rate before it has to wait.
+BURST_SECONDS = 1.0
+# Throughput is measured, and the budget split again, at this interval.
+MEASURE_SECONDS = 1.0
+# A job that is not held back by its share gets this much more than it used,
+# so it can speed up until it is throttled and asks for a full share again.
+DEMAND_HEADROOM = 1.25
+# No share drops below this, a job always makes some progress.
+MIN_RATE = 16 * 1024
+# Sleeps are cut into slices so cancelling and rate changes take effect.
+SLEEP_SLICE = 0.2
+# Remote shares read their rate from the GUI process at most this often.
+REMOTE_POLL_SECONDS = 0.5
+
+
+def allocate(total, job_cap, demands):
+    """Split total bytes/s over jobs that want demands bytes/s, max-min fair.
+
+    Jobs that want less than an equal share get what they want and the rest
+    is split among the others. No job gets more than job_cap. A total or cap
+    of 0 means unlimited; a rate of None leaves a job unlimited.
+    """
+    wants = [min(demand, job_cap) if job_cap else demand for demand in demands]
+    if not total:
+        return [job_cap or None for _ in demands]
+    rates = [None] * len(wants)
+    remaining = float(total)
+    order = sorted(range(len(wants)), key=lambda i: wants[i])
+    for n, i in enumerate(order):
+        fair = remaining / (len(order) - n)
+        rates[i] = max(MIN_RATE, min(wants[i], fair))
+        remaining = max(0.0, remaining - rates[i])
+    return rates
+
+
+class BandwidthShare:
+    """Token bucket of one transferring job, refilled at the rate the limiter gives it."""
+    def __init__(self, limiter=None, on_rate=None):
+        self.limiter = limiter
+        self.on_rate = on_rate
+        self.rate = None
+        self.tokens = 0.0
+        self.last_refill = time.monotonic()
+        self.window_start = self.last_refill
+        self.window_bytes = 0
+        self.waited = False
+        self.throttled = False
+        self.measured = None
+        # Bytes transferred through the share, read by the concurrency controller.
+        self.received = 0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        if self.rate:
+            self.tokens = min(self.rate * BURST_SECONDS, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def set_rate(self, rate):
+        with self.lock:
+            self._refill(time.monotonic())
+            self.rate = rate or None
+            if self.rate:
+                self.tokens = min(self.tokens, self.rate * BURST_SECONDS)
+        if self.on_rate is not None:
+            self.on_rate(self.rate)
+
+    def demand(self):
+        if self.throttled or self.measured is None:
+            return float("inf")
+        return self.measured * DEMAND_HEADROOM
+
+    def reserve(self, nbytes):
+        """Take nbytes from the bucket; returns the seconds to wait for them."""
+        now = time.monotonic()
+        with self.lock:
+            self._refill(now)
+            self.received += nbytes
+            self.window_bytes += nbytes
+            elapsed = now - self.window_start
+            if elapsed >= MEASURE_SECONDS:
+                sample = self.window_bytes / elapsed
+                self.measured = sample if self.measured is None else (self.measured + sample) / 2
+                self.throttled = self.waited
+                self.waited = False
+                self.window_start = now
+                self.window_bytes = 0
+            if not self.rate:
+                return 0.0
+            self.tokens -= nbytes
+            if self.tokens >= 0:
+                return 0.0
+            self.waited = True
+            return -self.tokens / self.rate
+
+    def throttle(self, nbytes, cancelled=None):
+        """Block until nbytes fit into the share."""
+        wait = self.reserve(nbytes)
+        if self.limiter is not None:
+            self.limiter.maybe_reallocate()
+        rate = self.rate
+        deadline = time.monotonic() + wait
+        while wait > 0:
+            if (cancelled is not None and cancelled()) or self.rate != rate:
+                return
+            time.sleep(min(wait, SLEEP_SLICE))
+            wait = deadline - time.monotonic()
+
+
+class RemoteBandwidthShare(BandwidthShare):
+    """Share inside a worker process; the GUI process sets its rate through a manager Value."""
+    def __init__(self, rate_value):
+        super().__init__()
+        self.rate_value = rate_value
+        self.last_poll = 0
+
+    def throttle(self, nbytes, cancelled=None):
+        now = time.monotonic()
+        if now - self.last_poll >= REMOTE_POLL_SECONDS:
+            self.last_poll = now
+            try:
+                rate = self.rate_value.value or None
+            except (EOFError, OSError):
+                rate = self.rate
+            if rate != self.rate:
+                self.set_rate(rate)
+        super().throttle(nbytes, cancelled)
+
+
+class BandwidthLimiter:
+    """Global download budget, shared out among the jobs that are transferring.
+
+    Every transfer opens a share and throttles itself against it from its
+    progress hook. The budget is split again whenever a share opens or
+    closes, the limits change, or a measuring interval passes, so running
+    downloads pick up new limits without being restarted.
+    """
+    def __init__(self, total=0, job_cap=0):
+        self.total = total
+        self.job_cap = job_cap
+        self.shares = []
+        self.last_allocation = 0
+        self.lock = threading.Lock()
+
+    def configure(self, total=None, job_cap=None):
+        with self.lock:
+            if total is not None:
+                self.total = int(total)
+            if job_cap is not None:
+                self.job_cap = int(job_cap)
+        self.reallocate()
+
+    def open_share(self, on_rate=None):
+        share = BandwidthShare(self, on_rate)
+        with self.lock:
+            self.shares.append(share)
+        self.reallocate()
+        return share
+
+    def close_share(self, share):
+        with self.lock:
+            if share not in self.shares:
+                return
+            self.shares.remove(share)
+        self.reallocate()
+
+    def active_jobs(self):
+        with self.lock:
+            return len(self.shares)
+
+    def open_shares(self):
+        with self.lock:
+            return list(self.shares)
+
+    def maybe_reallocate(self):
+        if time.monotonic() - self.last_allocation >= MEASURE_SECONDS:
+            self.reallocate()
+
+    def reallocate(self):
+        with self.lock:
+            self.last_allocation = time.monotonic()
+            shares = list(self.shares)
+            total, job_cap = self.total, self.job_cap
+        rates = allocate(total, job_cap, [share.demand() for share in shares])
+        for share, rate in zip(shares, rates):
+            if rate != share.rate:
+                share.set_rate(rate)
+
+
+_limiter = BandwidthLimiter()
+
+
+def get_bandwidth_limiter():
+    return _limiter
@@ -0,0 +1,136 @@
+import os
+import re
+import glob
+import weakref
+import threading
+import psutil
+
+# ffmpeg is asked to stop first and killed when it has not after this long.
+TERMINATE_TIMEOUT = 0.5
+# What yt-dlp leaves behind while a file is incomplete: the .part file, its
+# fragments and resume state, and ffmpeg's temporary output.
+PARTIAL_FILE_RE = re.compile(r"(\.part(-Frag\d+)?|\.ytdl|\.temp\.\w+)$")
+# Formats that are merged later are saved as "Title.f<format id>.ext".
+FORMAT_SUFFIX_RE = re.compile(r"\.f[0-9A-Za-z_-]+$")
+# What may follow a stem in a name of one of the job's files: the format
+# suffix, ffmpeg's ".temp", the extension and a partial-file suffix.
+JOB_FILE_SUFFIX = r"(\.f[0-9A-Za-z_-]+)?(\.temp)?\.[0-9A-Za-z]+(\.part(-Frag\d+)?|\.ytdl)?"
+# ffmpeg gets its input and output paths with this protocol prefix.
+FILE_PROTOCOL = "file:"
+
+
+def job_file_matcher(stems):
+    """Function telling whether an absolute path is one of the files of stems.
+
+    "Song" matches "Song.f137.mp4.part" and "Song.temp.mp3", but not the
+    files of another video called "Song.Remix".
+    """
+    pattern = re.compile("|".join(f"(?:{re.escape(stem)}{JOB_FILE_SUFFIX})" for stem in stems))
+    return lambda path: bool(stems) and pattern.fullmatch(path) is not None
+
+
+class CancelToken:
+    """Cancellation of one job, shared by everything that works on it.
+
+    The flag is polled by the progress hook, the yt-dlp logger and the
+    playlist listing. cancel() also stops the ffmpeg processes that work on
+    the job's files, so a transcode does not hold its slot until it ends.
+    A child token, as playlist entries get, is cancelled with its parent.
+    """
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.event = threading.Event()
+        self.children = weakref.WeakSet()
+        # Path stems ("folder/Title") of the job's files.
+        self.stems = set()
+        self.lock = threading.Lock()
+        if parent is not None:
+            with parent.lock:
+                parent.children.add(self)
+
+    @property
+    def cancelled(self):
+        return self.event.is_set() or (self.parent is not None and self.parent.cancelled)
+
+    def cancel(self):
+        if self.event.is_set():
+            return
+        self.event.set()
+        with self.lock:
+            children = list(self.children)
+        for child in children:
+            child.cancel()
+        self._stop_processes()
+
+    def watch(self, path):
+        """Mark the files of path as the job's; their ffmpeg processes stop on cancel."""
+        stem = FORMAT_SUFFIX_RE.sub("", os.path.splitext(os.path.abspath(path))[0])
+        with self.lock:
+            if stem in self.stems:
+                return
+            self.stems.add(stem)
+        if self.cancelled:
+            self._stop_processes()
+
+    def _stop_processes(self):
+        with self.lock:
+            stems = list(self.stems)
+        if stems:
+            # Off the calling thread, which is usually the GUI thread.
+            threading.Thread(target=stop_child_processes, args=(stems,), daemon=True).start()
+
+    def files(self):
+        """The job's files that are on disk now."""
+        with self.lock:
+            stems = list(self.stems)
+        is_job_file = job_file_matcher(stems)
+        return {path for stem in stems for path in glob.glob(glob.escape(stem) + ".*") if is_job_file(path)}
+
+
+def _argument_path(arg):
+    if arg.startswith(FILE_PROTOCOL):
+        arg = arg[len(FILE_PROTOCOL):]
+    return os.path.abspath(arg) if os.sep in arg else None
+
+
+def stop_child_processes(stems, name="ffmpeg"):
+    """Stop this process's name processes that have one of the files of stems on their command line."""
+    try:
+        children = psutil.Process().children(recursive=True)
+    except psutil.Error:
+        return []
+    is_job_file = job_file_matcher(stems)
+    matched = []
+    for proc in children:
+        try:
+            if name in proc.name().lower() and any(is_job_file(_argument_path(arg) or "") for arg in proc.cmdline()):
+                matched.append(proc)
+        except psutil.Error:
+            continue
+    for proc in matched:
+        try:
+            proc.terminate()
+        except psutil.Error:
+            pass
+    _, alive = psutil.wait_procs(matched, timeout=TERMINATE_TIMEOUT)
+    for proc in alive:
+        try:
+            proc.kill()
+        except psutil.Error:
+            pass
+    return matched
+
+
+def remove_partial_files(paths, existing=None):
+    """Remove the incomplete files among paths; with existing given, also the
+    ones that are not in it. Returns the removed paths."""
+    removed = []
+    for path in sorted(paths):
+        if not PARTIAL_FILE_RE.search(path) and (existing is None or path in existing):
+            continue
+        try:
+            os.remove(path)
+            removed.append(path)
+        except OSError:
+            pass
+    return removed
@@ -0,0 +1,189 @@
+import re
+import time
+import threading
+from PySide6.QtCore import QObject, QTimer
+
+MIN_SLOTS = 1
+MAX_SLOTS = 10
+# Throughput is sampled, and the level reconsidered, at this interval.
+SAMPLE_SECONDS = 5
+# A level is kept only when it beats the level below by this much.
+MIN_GAIN = 0.05
+# Congestion cuts the level to this fraction, by at least one slot.
+DECREASE = 0.5
+# Samples to wait after a cut or a level that did not pay, before probing up again.
+HOLD_SAMPLES = 6
+# Weight of a new sample in the rate remembered for a level.
+SMOOTHING = 0.5
+# More retries than this per transfer and sample is congestion.
+RETRIES_PER_JOB = 1
+# A transfer slower than this is stalled; below the bandwidth limiter's
+# minimum share, so a capped transfer never counts.
+STALL_RATE = 8 * 1024
+
+THROTTLE_RE = re.compile(r"HTTP Error 429|Too Many Requests", re.IGNORECASE)
+RETRY_RE = re.compile(r"\bRetrying\b", re.IGNORECASE)
+
+
+class TransferStats:
+    """Retries and throttling answers yt-dlp reported since the last sample."""
+    def __init__(self):
+        self.retries = 0
+        self.throttled = 0
+        self.lock = threading.Lock()
+
+    def observe(self, message):
+        with self.lock:
+            if THROTTLE_RE.search(message):
+                self.throttled += 1
+            elif RETRY_RE.search(message):
+                self.retries += 1
+
+    def take(self):
+        """(retries, throttled) since the previous call."""
+        with self.lock:
+            counts = (self.retries, self.throttled)
+            self.retries = self.throttled = 0
+        return counts
+
+
+class AimdController:
+    """Picks the number of transfer slots from throughput samples.
+
+    While transfers run clean the level grows by one slot per sample, and is
+    kept as long as the extra slot raised the aggregate rate by MIN_GAIN over
+    the level below. A slot that did not pay is given back and the level held
+    for a while before probing again. Retries, throttling answers (HTTP 429)
+    and stalled transfers cut the level multiplicatively.
+    """
+    def __init__(self, level=3, minimum=MIN_SLOTS, maximum=MAX_SLOTS):
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.level = min(max(level, self.minimum), self.maximum)
+        # Smoothed aggregate rate seen at each level.
+        self.rates = {}
+        self.hold = 0
+        self.changed = False
+        # Set when the last update cut the level for congestion.
+        self.cut = False
+
+    def set_maximum(self, maximum):
+        self.maximum = max(self.minimum, maximum)
+        if self.level > self.maximum:
+            self._move(self.maximum)
+
+    def congested(self, speeds, retries, throttled):
+        if throttled:
+            return True
+        if retries > max(1, len(speeds)) * RETRIES_PER_JOB:
+            return True
+        stalled = sum(1 for speed in speeds if speed < STALL_RATE)
+        return len(speeds) > 1 and stalled * 2 > len(speeds)
+
+    def _move(self, level):
+        self.changed = level != self.level
+        self.level = level
+
+    def update(self, speeds, retries=0, throttled=0, busy=True):
+        """Feed one sample of per-transfer speeds in bytes/s; returns the new level.
+
+        busy tells whether every slot had work, a level is only judged then.
+        """
+        self.cut = self.congested(speeds, retries, throttled)
+        if self.cut:
+            # The network changed, rates measured so far no longer hold.
+            self.rates.clear()
+            self.hold = HOLD_SAMPLES
+            self._move(max(self.minimum, min(self.level - 1, int(self.level * DECREASE))))
+            return self.level
+        if not busy or not speeds:
+            return self.level
+        if self.changed:
+            # The first sample after a change still mixes in the old level.
+            self.changed = False
+            return self.level
+        total = sum(speeds)
+        previous = self.rates.get(self.level)
+        self.rates[self.level] = total if previous is None else previous + SMOOTHING * (total - previous)
+        if self.hold:
+            self.hold -= 1
+            return self.level
+        lower = self.rates.get(self.level - 1)
+        if lower is not None and self.rates[self.level] < lower * (1 + MIN_GAIN):
+            self.hold = HOLD_SAMPLES
+            self._move(self.level - 1)
+        elif self.level < self.maximum:
+            self._move(self.level + 1)
+        return self.level
+
+
+class AdaptiveConcurrency(QObject):
+    """Auto mode of the transfer slots: samples the running transfers and lets
+    an AimdController set the dispatcher's slot count, up to a ceiling.
+
+    Speeds come from the bandwidth shares of in-app transfers. Transfers in
+    worker processes report no bytes to this process and are not measured.
+    """
+    def __init__(self, dispatcher, limiter, stats, log=None, parent=None):
+        super().__init__(parent)
+        self.dispatcher = dispatcher
+        self.limiter = limiter
+        self.stats = stats
+        self.log = log
+        self.enabled = False
+        self.ceiling = MAX_SLOTS
+        self.controller = AimdController(dispatcher.max_concurrent, maximum=self.ceiling)
+        self.received = {}
+        self.sampled_at = time.monotonic()
+        self.timer = QTimer(self)
+        self.timer.setInterval(SAMPLE_SECONDS * 1000)
+        self.timer.timeout.connect(self.sample)
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        if not enabled:
+            self.timer.stop()
+            return
+        self.controller = AimdController(self.dispatcher.max_concurrent, maximum=self.ceiling)
+        self.received = {share: share.received for share in self.limiter.open_shares()}
+        self.sampled_at = time.monotonic()
+        self.stats.take()
+        self.dispatcher.set_max_concurrent(self.controller.level, preempt=True)
+        self.timer.start()
+
+    def set_ceiling(self, ceiling):
+        self.ceiling = ceiling
+        self.controller.set_maximum(ceiling)
+        self.dispatcher.set_max_concurrent(self.controller.level, preempt=True)
+
+    def sample(self):
+        now = time.monotonic()
+        elapsed = max(now - self.sampled_at, 1e-3)
+        self.sampled_at = now
+        speeds = []
+        received = {}
+        for share in self.limiter.open_shares():
+            received[share] = share.received
+            # Shares that opened since the last sample have no full interval
+            # yet, and ones that never got bytes are measured elsewhere.
+            if share in self.received and share.received:
+                speeds.append((share.received - self.received[share]) / elapsed)
+        self.received = received
+        retries, throttled = self.stats.take()
+        busy = self.dispatcher.queue_depth() > 0 or len(self.dispatcher.running) >= self.dispatcher.max_concurrent
+        before = self.controller.level
+        level = self.controller.update(speeds, retries, throttled, busy)
+        if level == before:
+            return
+        # A cut for congestion frees the slots at once; otherwise the extra
+        # transfers run to the end.
+        self.dispatcher.set_max_concurrent(level, preempt=self.controller.cut)
+        if self.log is not None:
+            self.log(f"Auto concurrency: {level} downloads at a time ({sum(speeds) / 1024 ** 2:.1f} MB/s, {retries} retries)")
+
+
+_stats = TransferStats()
+
+
+def get_transfer_stats():
+    return _stats
@@ -0,0 +1,424 @@
+import os
+import time
+import heapq
+import itertools
+from collections import deque
+from urllib.parse import urlparse
+from PySide6.QtCore import QObject, QThreadPool, Signal
+from core.downloader import DownloadQueueWorker, PlaylistJob, PlaylistEntryWorker, StageRunnable, PAUSED
+from core.process_pool import ProcessPoolRunner, ProcessJobWorker
+from core.inflight import FlightRegistry, flight_key
+from core.url_parser import is_youtube_host
+
+WAIT_SAMPLES = 50
+EXTRACT_WORKERS = 2
+POSTPROCESS_WORKERS = os.cpu_count() or 2
+
+
+# host_limits key that applies to every host without a limit of its own.
+OTHER_HOSTS = "*"
+
+
+def host_key(url):
+    """Key that the per-host limits are counted under; all YouTube domains share one."""
+    host = (urlparse(url or "").hostname or "").lower()
+    if is_youtube_host(host):
+        return "youtube"
+    for prefix in ("www.", "m."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    return host
+
+
+class QueuedJob:
+    def __init__(self, task, row):
+        self.task = task
+        self.row = row
+        self.queued_at = time.monotonic()
+        self.flight = None
+
+
+class JobQueue:
+    """Pending jobs, highest task priority first and in arrival order within a priority."""
+    def __init__(self):
+        self.heap = []
+        self.counter = itertools.count()
+        # Jobs pushed to the front go ahead of everything of their priority.
+        self.front_counter = itertools.count(-1, -1)
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __iter__(self):
+        return (entry[2] for entry in sorted(self.heap))
+
+    def __contains__(self, job):
+        return any(entry[2] is job for entry in self.heap)
+
+    def push(self, job, front=False):
+        seq = next(self.front_counter) if front else next(self.counter)
+        heapq.heappush(self.heap, (-job_priority(job), seq, job))
+
+    def pop(self, admissible):
+        """Remove and return the first job admissible(job) accepts, or None."""
+        skipped = []
+        found = None
+        while self.heap:
+            entry = heapq.heappop(self.heap)
+            if admissible(entry[2]):
+                found = entry
+                break
+            skipped.append(entry)
+        for entry in skipped:
+            heapq.heappush(self.heap, entry)
+        return found
+
+    def restore(self, entry):
+        # Puts a popped entry back in its old place.
+        heapq.heappush(self.heap, entry)
+
+    def remove(self, job):
+        self.heap = [entry for entry in self.heap if entry[2] is not job]
+        heapq.heapify(self.heap)
+
+    def reprioritize(self):
+        self.heap = [(-job_priority(entry[2]), entry[1], entry[2]) for entry in self.heap]
+        heapq.heapify(self.heap)
+
+    def clear(self):
+        self.heap = []
+
+
+def job_priority(job):
+    return getattr(job.task, "priority", 0)
+
+
+class DownloadDispatcher(QObject):
+    """Admission control for every download entry point.
+
+    A job passes three stages, each on its own pool: extract (metadata), transfer
+    (network) and post-process (ffmpeg). Only the transfer stage is limited by
+    max_concurrent; extraction runs at most one batch of transfers ahead so the
+    signed media URLs are still fresh when a slot frees up, and post-processing
+    is sized by core count. A finished transfer frees its slot before the
+    transcode starts, so CPU and network work of different jobs overlap.
+    Playlists enter the queue as a PlaylistJob that keeps receiving extraction
+    slots until it runs out of entries.
+
+    In process mode a single-video job instead runs all its stages in a worker
+    process, holding one transfer slot for its whole lifetime.
+
+    Jobs are admitted by task priority. On top of max_concurrent, host_limits
+    caps how many jobs per host (see host_key) are extracting, waiting for a
+    slot or transferring at once; a job whose host is full is passed over for
+    the next one, so other sites keep their slots.
+
+    A job for a video that is already queued or downloading to the same file
+    (see flight_key) does not start again: it follows the job in flight and
+    shows its progress and result.
+
+    A single-video job can be paused: it leaves the queue, or stops its
+    transfer at the next fragment and gives back its slot, keeping the
+    partial files. Once resumed it queues again and continues where it
+    stopped.
+    """
+    stats_changed = Signal(int, int, float)
+    _stage_done = Signal(object, object)
+    _playlist_ready = Signal(object)
+
+    def __init__(self, thread_pool, progress_signal, status_signal, log_signal, info_signal=None, user_profile=None, max_concurrent=3, extract_pool=None, postprocess_pool=None, host_limits=None, parent=None):
+        super().__init__(parent)
+        self.thread_pool = thread_pool
+        self.extract_pool = extract_pool or self._make_pool(EXTRACT_WORKERS)
+        self.postprocess_pool = postprocess_pool or self._make_pool(POSTPROCESS_WORKERS)
+        self.progress_signal = progress_signal
+        self.status_signal = status_signal
+        self.log_signal = log_signal
+        self.info_signal = info_signal
+        self.user_profile = user_profile
+        self.max_concurrent = 1
+        self.host_limits = dict(host_limits or {})
+        self.pending = JobQueue()
+        self.ready = deque()
+        self.extracting = {}
+        self.running = {}
+        self.post_processing = {}
+        # Paused jobs by row, as QueuedJobs to submit again on resume.
+        self.paused = {}
+        self.wait_samples = deque(maxlen=WAIT_SAMPLES)
+        self.flights = FlightRegistry()
+        self.process_runner = None
+        self.use_processes = False
+        # Workers report from pool threads; the queued connections bring every
+        # state change back onto the GUI thread.
+        self._stage_done.connect(self._on_stage_done)
+        self._playlist_ready.connect(self._on_playlist_ready)
+        self.set_max_concurrent(max_concurrent)
+
+    def _make_pool(self, size):
+        pool = QThreadPool(self)
+        pool.setMaxThreadCount(size)
+        return pool
+
+    def set_max_concurrent(self, value, preempt=False):
+        """Change the number of transfer slots.
+
+        With preempt, transfers above a lowered limit are stopped and queued
+        again at the front; they resume from their partial files.
+        """
+        self.max_concurrent = max(1, int(value))
+        self.thread_pool.setMaxThreadCount(self.max_concurrent)
+        if preempt:
+            self.preempt(len(self.running) - self.max_concurrent)
+        self._fill_slots()
+        self._emit_stats()
+
+    def preempt(self, count):
+        # Lowest priority first, and of those the transfer started last.
+        # Playlist entries and worker processes run to the end.
+        candidates = [w for w in self.running if isinstance(w, DownloadQueueWorker) and w.playlist_job is None and not w.cancel]
+        candidates.reverse()
+        for worker in sorted(candidates, key=job_priority)[:max(0, count)]:
+            worker.preempted = True
+            worker.cancel = True
+
+    def pause(self, row):
+        """Pause the job of a row; False when it is not a job that can pause.
+
+        Playlists, post-processing and worker-process jobs run to the end.
+        """
+        if row is None or row in self.paused:
+            return False
+        for job in list(self.pending):
+            if isinstance(job, QueuedJob) and job.row == row:
+                self.pending.remove(job)
+                self._park(job)
+                return True
+        for worker in list(self.ready):
+            if worker.row == row:
+                self.ready.remove(worker)
+                self._park(self._job_for(worker))
+                return True
+        for worker in list(self.extracting) + list(self.running):
+            if worker.row == row and isinstance(worker, DownloadQueueWorker) and worker.playlist_job is None and not worker.cancel:
+                # Parked by _on_stage_done once the worker has stopped.
+                worker.paused = True
+                worker.cancel = True
+                return True
+        return False
+
+    def resume(self, row):
+        job = self.paused.pop(row, None)
+        if job is None:
+            return False
+        job.queued_at = time.monotonic()
+        self.pending.push(job)
+        self._fill_slots()
+        if job in self.pending:
+            self._job_signals(job)[1].emit(row, "Queued")
+        self._emit_stats()
+        return True
+
+    def is_paused(self, row):
+        return row in self.paused
+
+    def set_host_limits(self, host_limits):
+        self.host_limits = dict(host_limits or {})
+        self._fill_slots()
+
+    def host_limit(self, host):
+        # None when only max_concurrent applies.
+        return self.host_limits.get(host, self.host_limits.get(OTHER_HOSTS)) or None
+
+    def host_load(self, host):
+        workers = list(self.extracting) + list(self.ready) + list(self.running)
+        return sum(1 for worker in workers if host_key(worker.task.url) == host)
+
+    def set_priority(self, row, priority):
+        """Change the priority of a row's jobs that have not started transferring."""
+        for job in list(self.pending) + list(self.ready):
+            if job.row == row:
+                job.task.priority = priority
+        self.pending.reprioritize()
+        self._fill_slots()
+
+    def set_process_mode(self, enabled):
+        self.use_processes = bool(enabled)
+        if self.use_processes and self.process_runner is None:
+            self.process_runner = ProcessPoolRunner()
+
+    def shutdown(self):
+        self.cancel_all()
+        if self.process_runner is not None:
+            self.process_runner.shutdown()
+            self.process_runner = None
+
+    def submit(self, task, row):
+        job = QueuedJob(task, row)
+        key = flight_key(task)
+        if key is not None:
+            job.flight, leading = self.flights.join_or_lead(key, row, self.progress_signal, self.status_signal)
+            if not leading:
+                self.log_signal.emit(f"Already downloading {task.url}, following that download")
+                return None
+        self.pending.push(job)
+        self._fill_slots()
+        if job in self.pending and row is not None:
+            self._job_signals(job)[1].emit(row, "Queued")
+        self._emit_stats()
+        return job
+
+    def _job_signals(self, job):
+        if job.flight is not None:
+            return job.flight.progress_signal, job.flight.status_signal
+        return self.progress_signal, self.status_signal
+
+    def add_playlist(self, playlist_job):
+        # Called from the worker that listed the playlist.
+        self._playlist_ready.emit(playlist_job)
+
+    def stage_finished(self, worker, next_stage):
+        # next_stage is None once the worker is done for good.
+        self._stage_done.emit(worker, next_stage)
+
+    def _tracked_workers(self):
+        return list(self.extracting) + list(self.ready) + list(self.running) + list(self.post_processing)
+
+    def is_tracked(self, row):
+        if row is None:
+            return False
+        return (row in self.paused or any(job.row == row for job in self.pending)
+                or any(w.row == row for w in self._tracked_workers()))
+
+    def cancel_all(self):
+        for job in list(self.pending):
+            if isinstance(job, PlaylistJob):
+                job.cancel()
+                continue
+            if job.row is not None or job.flight is not None:
+                self._job_signals(job)[1].emit(job.row, "Download Cancelled")
+            if job.flight is not None:
+                self.flights.land(job.flight)
+        self.pending.clear()
+        for job in self.paused.values():
+            self._job_signals(job)[1].emit(job.row, "Download Cancelled")
+            if job.flight is not None:
+                self.flights.land(job.flight)
+        self.paused.clear()
+        # Workers waiting for a transfer slot still get one, and give it back
+        # right away.
+        for worker in self._tracked_workers():
+            if isinstance(worker, DownloadQueueWorker):
+                worker.paused = worker.preempted = False
+            worker.cancel = True
+        self._emit_stats()
+
+    def _on_playlist_ready(self, playlist_job):
+        # The playlist takes the place of the job that listed it.
+        self.pending.push(playlist_job, front=True)
+        self._fill_slots()
+        self._emit_stats()
+
+    def _on_stage_done(self, worker, next_stage):
+        for stage in (self.extracting, self.running, self.post_processing):
+            stage.pop(worker, None)
+        stopped = next_stage is None and getattr(worker, "interrupted", False)
+        if stopped and worker.paused:
+            self._park(self._job_for(worker))
+        elif stopped and worker.preempted:
+            self._requeue(worker)
+        elif next_stage is None and getattr(worker, "flight", None) is not None:
+            self.flights.land(worker.flight)
+        if next_stage == "transfer":
+            self.ready.append(worker)
+        elif next_stage == "post_process":
+            self._start_stage(self.post_processing, self.postprocess_pool, worker, "post_process")
+        self._fill_slots()
+        if worker in self.ready:
+            worker.status_signal.emit(worker.row, "Queued")
+        self._emit_stats()
+
+    def _job_for(self, worker):
+        job = QueuedJob(worker.task, worker.row)
+        job.flight = worker.flight
+        return job
+
+    def _park(self, job):
+        self.paused[job.row] = job
+        self._job_signals(job)[1].emit(job.row, PAUSED)
+        self._emit_stats()
+
+    def _requeue(self, worker):
+        job = self._job_for(worker)
+        self.pending.push(job, front=True)
+        if worker.row is not None:
+            self._job_signals(job)[1].emit(worker.row, "Queued")
+
+    def _start_stage(self, stage, pool, worker, name):
+        runnable = StageRunnable(worker, name)
+        stage[worker] = runnable
+        pool.start(runnable)
+
+    def _admissible(self, job):
+        host = host_key(job.task.url)
+        limit = self.host_limit(host)
+        return limit is None or self.host_load(host) < limit
+
+    def _fill_slots(self):
+        while self.ready and len(self.running) < self.max_concurrent:
+            worker = max(self.ready, key=job_priority)
+            self.ready.remove(worker)
+            self._start_stage(self.running, self.thread_pool, worker, "transfer")
+        while self.pending and len(self.extracting) + len(self.ready) < self.max_concurrent:
+            entry = self.pending.pop(self._admissible)
+            if entry is None:
+                break
+            job = entry[2]
+            if isinstance(job, PlaylistJob):
+                if not job.has_more():
+                    job.check_finished()
+                    continue
+                # The playlist stays queued for its next entry.
+                self.pending.restore(entry)
+                worker = PlaylistEntryWorker(job, self)
+                self.extracting[worker] = worker
+                self.extract_pool.start(worker)
+            elif self.use_processes and not job.task.playlist:
+                if len(self.running) >= self.max_concurrent:
+                    self.pending.restore(entry)
+                    break
+                self.wait_samples.append(time.monotonic() - job.queued_at)
+                progress_signal, status_signal = self._job_signals(job)
+                worker = ProcessJobWorker(self.process_runner, job.task, job.row, progress_signal, status_signal, self.log_signal, self.info_signal, self.user_profile, dispatcher=self)
+                worker.flight = job.flight
+                self.running[worker] = worker
+                self.thread_pool.start(worker)
+            else:
+                self.wait_samples.append(time.monotonic() - job.queued_at)
+                progress_signal, status_signal = self._job_signals(job)
+                worker = DownloadQueueWorker(job.task, job.row, progress_signal, status_signal, self.log_signal, self.info_signal, self.user_profile, dispatcher=self)
+                worker.flight = job.flight
+                self._start_stage(self.extracting, self.extract_pool, worker, "extract")
+
+    def queue_depth(self):
+        return len(self.ready) + sum(job.remaining() if isinstance(job, PlaylistJob) else 1 for job in self.pending)
+
+    def average_wait(self):
+        if not self.wait_samples:
+            return 0.0
+        return sum(self.wait_samples) / len(self.wait_samples)
+
+    def stats(self):
+        oldest = min((job.queued_at for job in self.pending if isinstance(job, QueuedJob)), default=None)
+        return {
+            "queued": self.queue_depth(),
+            "extracting": len(self.extracting),
+            "running": len(self.running),
+            "post_processing": len(self.post_processing),
+            "max_concurrent": self.max_concurrent,
+            "average_wait": self.average_wait(),
+            "longest_wait": time.monotonic() - oldest if oldest is not None else 0.0
+        }
+
+    def _emit_stats(self):
+        self.stats_changed.emit(self.queue_depth(), len(self.running), self.average_wait())
@@ -0,0 +1,84 @@
+import os
+import time
+import sqlite3
+import threading
+from core import utils
+
+ARCHIVE_FILE_NAME = "archive.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS archive (
+    extractor TEXT NOT NULL,
+    video_id TEXT NOT NULL,
+    added_at REAL NOT NULL,
+    PRIMARY KEY (extractor, video_id)
+) WITHOUT ROWID;
+"""
+
+
+def archive_id(info):
+    """yt-dlp's archive key of an info dict or flat playlist entry: "<extractor> <id>"."""
+    extractor = info.get("extractor_key") or info.get("ie_key")
+    video_id = info.get("id")
+    if not extractor or not video_id:
+        return None
+    return f"{extractor.lower()} {video_id}"
+
+
+class DownloadArchive:
+    """Every video that was downloaded, keyed by extractor and id.
+
+    It answers the same two calls as the set yt-dlp keeps for its
+    download_archive option, "key in archive" and archive.add(key), so it can
+    be passed to yt-dlp as is. The keys live in an indexed SQLite table
+    instead of a text file that is read in full by every run.
+    """
+    def __init__(self, data_dir):
+        os.makedirs(data_dir, exist_ok=True)
+        self.db_path = os.path.join(data_dir, ARCHIVE_FILE_NAME)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(SCHEMA)
+
+    @staticmethod
+    def _split(key):
+        extractor, _, video_id = (key or "").partition(" ")
+        return extractor, video_id
+
+    def __contains__(self, key):
+        extractor, video_id = self._split(key)
+        with self.lock:
+            row = self.conn.execute("SELECT 1 FROM archive WHERE extractor = ? AND video_id = ?", (extractor, video_id)).fetchone()
+        return row is not None
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM archive").fetchone()[0]
+
+    def add(self, key):
+        extractor, video_id = self._split(key)
+        if not extractor or not video_id:
+            return
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO archive (extractor, video_id, added_at) VALUES (?, ?, ?)", (extractor, video_id, time.time()))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+_archives = {}
+_archives_lock = threading.Lock()
+
+
+def get_download_archive():
+    data_dir = utils.get_data_dir()
+    with _archives_lock:
+        archive = _archives.get(data_dir)
+        if archive is None:
+            archive = DownloadArchive(data_dir)
+            _archives[data_dir] = archive
+        return archive
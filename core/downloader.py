@@ -3,27 +3,86 @@ import yt_dlp
 import gc
 from PySide6.QtCore import QRunnable, QObject, Signal
 from core.utils import format_speed, format_time, get_data_dir
-from core.history import add_history_entry
+from core.history_store import get_history_store
+from core.extraction_cache import get_extraction_cache, video_key_from_url, video_key_from_info
+from core.job_journal import get_job_journal
+from core.download_archive import get_download_archive, archive_id
+from core.library_index import get_library_index, format_profile
+from core.inflight import flight_key
+from core.bandwidth import get_bandwidth_limiter
+from core.concurrency import get_transfer_stats
+from core.cancellation import CancelToken, remove_partial_files
+from core.url_parser import lists_newest_first
 import time
 import shutil
-import json
+import threading
+
+# Keys that yt-dlp fills in while selecting and downloading formats. They have to
+# be dropped before an already extracted info dict is processed again, otherwise
+# the previous format selection leaks into the next attempt.
+SELECTION_KEYS = ("requested_downloads", "requested_formats", "requested_subtitles",
+                  "filepath", "_filename", "filename")
+
+# Status of a job whose output is already in the library; it counts as completed.
+ALREADY_DOWNLOADED = "Already Downloaded"
+PAUSED = "Paused"
+CONTENT_UNAVAILABLE = "Content Unavailable"
+PLAYLIST_ERROR = "Playlist Error"
+# Statuses a job ends with when it failed.
+FAILED_STATUSES = ("Download Error", CONTENT_UNAVAILABLE, PLAYLIST_ERROR)
+
+
+def job_state(status):
+    """Queue journal state of a job that reported status."""
+    if status.startswith("Download Completed") or status == ALREADY_DOWNLOADED:
+        return "completed"
+    if status in FAILED_STATUSES:
+        return "failed"
+    if status == "Download Cancelled":
+        return "cancelled"
+    if status == "Queued":
+        return "queued"
+    if status == PAUSED:
+        return "paused"
+    return "running"
+
+def reusable_info(info):
+    if isinstance(info, dict):
+        return {k: reusable_info(v) for k, v in info.items() if k not in SELECTION_KEYS}
+    if isinstance(info, list):
+        return [reusable_info(v) for v in info]
+    return info
 
 class YTLogger:
-    def __init__(self, log_signal):
+    def __init__(self, log_signal, cancelled=None):
         self.log_signal = log_signal
+        self.cancelled = cancelled
         self._temp_files = []
 
     def _log(self, level, msg):
+        # Retries, the HTTP 429 ones among them, come through to_screen and
+        # so at debug level; every level feeds the congestion signal.
+        get_transfer_stats().observe(msg)
         if msg.strip():
-            self.log_signal.emit(f"[yt-dlp {level}] {msg}")
+            self.log_signal.emit(f"[yt-dlp {level}] {msg}", level.lower())
+
+    def _check_cancelled(self):
+        # yt-dlp logs every page, API call and retry, so extraction and
+        # retry loops stop at their next step rather than at the next
+        # progress hook.
+        if self.cancelled is not None and self.cancelled():
+            raise yt_dlp.utils.DownloadCancelled()
 
     def debug(self, msg):
+        self._check_cancelled()
         self._log("Debug", msg)
 
     def info(self, msg):
+        self._check_cancelled()
         self._log("Info", msg)
 
     def warning(self, msg):
+        self._check_cancelled()
         self._log("Warning", msg)
 
     def error(self, msg):
@@ -38,8 +97,12 @@ class YTLogger:
                 print(f"Warning: Could not remove temp file {temp_file}: {e}")
         self._temp_files.clear()
 
+TASK_FIELDS = ("url", "resolution", "folder", "proxy", "audio_only", "playlist", "subtitles",
+               "output_format", "from_queue", "audio_format", "audio_quality", "priority", "job_id",
+               "incremental")
+
 class DownloadTask:
-    def __init__(self, url, resolution, folder, proxy, audio_only=False, playlist=False, subtitles=False, output_format="mp4", from_queue=False, audio_format=None, audio_quality="320"):
+    def __init__(self, url, resolution, folder, proxy, audio_only=False, playlist=False, subtitles=False, output_format="mp4", from_queue=False, audio_format=None, audio_quality="320", priority=0, incremental=False):
         self.url = url
         self.resolution = resolution
         self.folder = folder
@@ -51,9 +114,272 @@ class DownloadTask:
         self.from_queue = from_queue
         self.audio_format = audio_format
         self.audio_quality = audio_quality
+        # Higher runs first.
+        self.priority = priority
+        # Set for jobs recorded in the queue journal.
+        self.job_id = None
+        # Skip what is in the download archive and stop listing a playlist at
+        # its first archived entry.
+        self.incremental = incremental
+
+    def for_entry(self, url, folder):
+        child = DownloadTask(url, self.resolution, folder, self.proxy, audio_only=self.audio_only, playlist=False, subtitles=self.subtitles, output_format=self.output_format, from_queue=self.from_queue, audio_format=self.audio_format, audio_quality=self.audio_quality, priority=self.priority)
+        if hasattr(self, 'ffmpeg_path'):
+            child.ffmpeg_path = self.ffmpeg_path
+        child.job_id = self.job_id
+        return child
+
+    def to_dict(self):
+        data = {key: getattr(self, key) for key in TASK_FIELDS}
+        if getattr(self, 'ffmpeg_path', None):
+            data["ffmpeg_path"] = self.ffmpeg_path
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        task = cls(**{key: data[key] for key in TASK_FIELDS if key in data and key != "job_id"})
+        task.job_id = data.get("job_id")
+        if data.get("ffmpeg_path"):
+            task.ffmpeg_path = data["ffmpeg_path"]
+        return task
+
+class ChildSignal:
+    """Stands in for a row signal so a playlist entry reports into its PlaylistJob."""
+    def __init__(self, callback):
+        self.callback = callback
+
+    def emit(self, row, value):
+        self.callback(value)
+
+def iter_playlist_entries(entries, page_size=50):
+    """Yield playlist entries one by one without materialising the whole list."""
+    if isinstance(entries, yt_dlp.utils.PagedList):
+        start = 0
+        while True:
+            page = entries.getslice(start, start + page_size)
+            if not page:
+                return
+            yield from page
+            start += len(page)
+    else:
+        yield from entries or []
+
+class PlaylistJob:
+    """Aggregate of the per-entry jobs a playlist task is fanned out into.
+
+    The job sits in the dispatcher queue as a source of entries. Every slot the
+    dispatcher grants it runs a PlaylistEntryWorker, which pulls the next flat
+    entry and resolves it just in time, so only as many entries as there are
+    slots are in flight and nothing is kept for finished ones. Progress and
+    status of the entries are folded into the parent's queue row.
+    """
+    def __init__(self, parent_worker, ydl, entries, total=None):
+        self.parent_worker = parent_worker
+        self.task = parent_worker.task
+        self.row = parent_worker.row
+        self.folder = parent_worker.task.folder
+        self.progress_signal = parent_worker.progress_signal
+        self.status_signal = parent_worker.status_signal
+        self.log_signal = parent_worker.log_signal
+        self.ydl = ydl
+        self.entries = iter_playlist_entries(entries)
+        self.total = total
+        self.next_index = 0
+        self.exhausted = False
+        self.finished = False
+        self.running = {}
+        self.progress = {}
+        self.statuses = {}
+        self.completed = 0
+        self.failed = 0
+        # Incremental runs record finished entries and leave out known ones.
+        # Uploads feeds are listed newest first, so their listing stops at
+        # the first known entry; other playlists are listed to the end.
+        self.archive = get_download_archive() if self.task.incremental else None
+        self.stop_at_archived = self.archive is not None and lists_newest_first(self.task.url)
+        self.archive_ids = {}
+        self.up_to_date = False
+        self.skipped = 0
+        self.lock = threading.Lock()
+        # Pulling the next entry may fetch another playlist page, so it is
+        # serialised separately and never blocks progress reporting.
+        self.iter_lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self.parent_worker.cancel
+
+    def cancel(self):
+        self.parent_worker.cancel = True
+        self.check_finished()
+
+    def has_more(self):
+        with self.lock:
+            return not (self.exhausted or self.cancelled)
+
+    def remaining(self):
+        with self.lock:
+            if self.total:
+                return max(0, self.total - self.next_index)
+            return 0 if self.exhausted else 1
+
+    def _next_entry(self):
+        try:
+            for entry in self.entries:
+                if entry and (entry.get("url") or entry.get("webpage_url")):
+                    if self.archive is not None and archive_id(entry) in self.archive:
+                        if not self.stop_at_archived:
+                            self.skipped += 1
+                            continue
+                        # Everything from here on is older and was downloaded
+                        # by an earlier run.
+                        self.log_signal.emit("Reached an entry that is already in the download archive, stopping the scan")
+                        self.up_to_date = True
+                        return None
+                    return entry
+        except yt_dlp.utils.DownloadCancelled:
+            pass
+        except Exception as e:
+            self.log_signal.emit(f"Playlist listing stopped early: {str(e)}")
+        return None
+
+    def take_entry_worker(self):
+        with self.iter_lock:
+            entry = None if self.cancelled else self._next_entry()
+            with self.lock:
+                if entry is None:
+                    self.exhausted = True
+                    if self.skipped:
+                        self.log_signal.emit(f"Skipped {self.skipped} entries that are already in the download archive")
+                        self.up_to_date = True
+                    if self.up_to_date:
+                        self.total = self.next_index
+                    self._close_listing()
+                    return None
+                index = self.next_index
+                self.next_index += 1
+                self.archive_ids[index] = archive_id(entry)
+                worker = self.parent_worker.create_entry_worker(entry, index, self)
+                self.running[index] = worker
+                return worker
+
+    def _close_listing(self):
+        if self.ydl is not None:
+            try:
+                self.ydl.close()
+            except Exception as e:
+                print(f"Warning: Error closing yt-dlp instance: {e}")
+            self.ydl = None
+        self.entries = iter(())
+
+    def _aggregate_progress(self):
+        if self.total:
+            done = self.completed + self.failed
+            return (done * 100 + sum(self.progress.values())) / self.total
+        if self.progress:
+            return sum(self.progress.values()) / len(self.progress)
+        return 0
+
+    def child_progress(self, index, percent):
+        with self.lock:
+            self.progress[index] = percent
+            aggregate = self._aggregate_progress()
+        self.progress_signal.emit(self.row, aggregate)
+
+    def child_status(self, index, status):
+        with self.lock:
+            self.statuses[index] = status
+
+    def child_finished(self, index):
+        with self.lock:
+            self.running.pop(index, None)
+            self.progress.pop(index, None)
+            key = self.archive_ids.pop(index, None)
+            status = self.statuses.pop(index, "")
+            if "Download Completed" in status or status == ALREADY_DOWNLOADED:
+                self.completed += 1
+                if self.archive is not None and key:
+                    self.archive.add(key)
+            else:
+                self.failed += 1
+            done = self.completed + self.failed
+        self.status_signal.emit(self.row, f"Playlist: {done}/{self.total or '?'} done")
+
+    def check_finished(self):
+        with self.lock:
+            if self.finished or self.running or not (self.exhausted or self.cancelled):
+                return
+            self.finished = True
+        with self.iter_lock:
+            self._close_listing()
+        if self.cancelled:
+            self.status_signal.emit(self.row, "Download Cancelled")
+        elif self.up_to_date and self.completed == 0 and self.failed == 0:
+            self.log_signal.emit("Playlist is up to date, nothing new to download")
+            self.status_signal.emit(self.row, "Download Completed")
+        elif self.completed == 0:
+            self.status_signal.emit(self.row, "Download Error")
+            self.log_signal.emit("Playlist finished without any successful download")
+        elif self.failed:
+            self.log_signal.emit(f"Playlist finished: {self.completed} downloaded, {self.failed} failed")
+            self.status_signal.emit(self.row, f"Download Completed ({self.failed} failed)")
+        else:
+            self.log_signal.emit(f"Playlist finished: {self.completed} downloaded")
+            self.status_signal.emit(self.row, "Download Completed")
+
+class PlaylistEntryWorker(QRunnable):
+    """Extraction slot granted to a playlist: pulls the next entry and resolves it."""
+    def __init__(self, job, dispatcher):
+        super().__init__()
+        self.job = job
+        self.dispatcher = dispatcher
+        self.task = job.task
+        self.row = job.row
+        self.entry_worker = None
+
+    @property
+    def cancel(self):
+        return self.job.cancelled
+
+    @cancel.setter
+    def cancel(self, value):
+        if value:
+            self.job.cancel()
+
+    def run(self):
+        try:
+            self.entry_worker = self.job.take_entry_worker()
+            if self.entry_worker is not None:
+                worker = self.entry_worker
+                worker.dispatcher = self.dispatcher
+                # The same video may be in another playlist or the queue; the
+                # entry then counts once that download is done.
+                flight, leading = self.dispatcher.flights.join_or_lead(
+                    flight_key(worker.task), worker.row, worker.progress_signal, worker.status_signal, on_done=worker.finish)
+                if not leading:
+                    worker.log_signal.emit(f"Already downloading {worker.task.url}, following that download")
+                    return
+                worker.progress_signal = flight.progress_signal
+                worker.status_signal = flight.status_signal
+                worker.flight = flight
+                # The entry goes on through the transfer and post-process
+                # stages like any other job.
+                worker.run_stage("extract")
+        finally:
+            self.job.check_finished()
+            self.dispatcher.stage_finished(self, None)
+
+class StageRunnable(QRunnable):
+    def __init__(self, worker, stage):
+        super().__init__()
+        self.worker = worker
+        self.stage = stage
+
+    def run(self):
+        self.worker.run_stage(self.stage)
 
 class DownloadQueueWorker(QRunnable):
-    def __init__(self, task, row, progress_signal, status_signal, log_signal, info_signal=None, user_profile=None):
+    def __init__(self, task, row, progress_signal, status_signal, log_signal, info_signal=None, user_profile=None, dispatcher=None):
         super().__init__()
         self.task = task
         self.row = row
@@ -62,14 +388,46 @@ class DownloadQueueWorker(QRunnable):
         self.log_signal = log_signal
         self.info_signal = info_signal
         self.user_profile = user_profile
-        self.cancel = False
+        self.token = CancelToken()
         self.data_dir = get_data_dir()
         if not os.path.exists(self.data_dir):
             os.makedirs(self.data_dir)
         self.cookie_file = os.path.join(self.data_dir, "youtube_cookies.txt")
-        self.logger = YTLogger(log_signal)
+        # Only a real cancel stops yt-dlp from the logger; a pause lets the
+        # fragment in progress finish (see _stop_now).
+        self.logger = YTLogger(log_signal, lambda: self.token.cancelled)
         self._ydl = None
         self.playlist_title = None
+        self.cache = get_extraction_cache()
+        self.info_from_cache = False
+        self.dispatcher = dispatcher
+        self.playlist_job = None
+        self.playlist_index = None
+        self.processed_info = None
+        self.postprocess_options = None
+        self.completed_status = "Download Completed"
+        self.logged_step = None
+        self.part_path = None
+        self.output_path = None
+        # Set when other jobs follow this one, see FlightRegistry.
+        self.flight = None
+        # Set when the dispatcher stops the transfer to queue it again, or
+        # to hold it until it is resumed.
+        self.preempted = False
+        self.paused = False
+        # Set instead of cancelling the token when a paused or preempted job
+        # is told to stop; its ffmpeg runs and files are left alone.
+        self.suspended = False
+        # Set once the worker stopped because of cancel.
+        self.interrupted = False
+        # Fragment that was downloading when the pause came in.
+        self.pause_fragment = None
+        # Files of the job that were there before post-processing started.
+        self.existing_files = None
+        # Opened when the first bytes arrive, closed when the transfer ends.
+        self.bandwidth = None
+        self.received_file = None
+        self.received_bytes = 0
 
     def __del__(self):
         self.cleanup()
@@ -100,7 +458,18 @@ class DownloadQueueWorker(QRunnable):
             "updatetime": False,
             "geo_bypass": True,
             "geo_bypass_country": geo_country,
-            "force_ipv4": True
+            "force_ipv4": True,
+            "proxy": self.task.proxy if self.task.proxy else None
+        }
+
+    def _get_cache_options(self):
+        # Only what changes the extraction result is part of the cache key;
+        # format selection is redone on every download from the cached formats.
+        options = self._get_base_options()
+        return {
+            "proxy": options["proxy"],
+            "geo_bypass_country": options["geo_bypass_country"],
+            "noplaylist": not self.task.playlist
         }
 
     def _get_format_string(self):
@@ -114,255 +483,548 @@ class DownloadQueueWorker(QRunnable):
             return f"(bestvideo[height<={height}]+bestaudio/best[height<={height}]/best)"
         return "bestvideo+bestaudio/best"
 
+    def _extract_info(self, options, use_cache=True):
+        cache_options = self._get_cache_options()
+        if not self.task.playlist:
+            if use_cache:
+                info = self.cache.get(self.task.url, cache_options)
+                if info is not None:
+                    self.info_from_cache = True
+                    minutes = int(self.cache.remaining_validity(self.task.url, cache_options) // 60)
+                    self.log_signal.emit(f"Using cached media info (URLs valid for {minutes} more minutes)")
+                    return info
+            else:
+                self.cache.invalidate(self.task.url, cache_options)
+        self.info_from_cache = False
+        with yt_dlp.YoutubeDL(options) as ydl:
+            self._ydl = ydl
+            info = ydl.extract_info(self.task.url, download=False)
+        if info is not None and not self.task.playlist:
+            self.cache.put(self.task.url, cache_options, yt_dlp.YoutubeDL.sanitize_info(reusable_info(info)))
+        return info
+
+    def _process_info(self, options, info):
+        # Downloads from an info dict that was already extracted, so retries and
+        # fallbacks never go back to the site for the page, player JS or formats.
+        # A single video raises DownloadError when it fails; only playlist
+        # entries are skipped over.
+        if info.get("_type", "video") == "video":
+            options = dict(options, ignoreerrors=False)
+        with yt_dlp.YoutubeDL(options) as ydl:
+            self._ydl = ydl
+            try:
+                self.processed_info = ydl.process_ie_result(reusable_info(info), download=True)
+            except yt_dlp.utils.ExistingVideoReached:
+                self.log_signal.emit("Reached an entry that is already in the download archive, stopping")
+
+    @property
+    def cancel(self):
+        return self.suspended or self.token.cancelled
+
+    @cancel.setter
+    def cancel(self, value):
+        if not value:
+            return
+        if self.paused or self.preempted:
+            self.suspended = True
+        else:
+            self.token.cancel()
+
+    def is_cancelled(self):
+        # An entry's token is cancelled with its playlist's.
+        return self.cancel
+
+    def create_entry_worker(self, entry, index, job):
+        url = entry.get("url") or entry.get("webpage_url")
+        worker = DownloadQueueWorker(
+            self.task.for_entry(url, job.folder), None,
+            ChildSignal(lambda percent: job.child_progress(index, percent)),
+            ChildSignal(lambda status: job.child_status(index, status)),
+            self.log_signal, None, self.user_profile
+        )
+        worker.token = CancelToken(parent=self.token)
+        worker.playlist_job = job
+        worker.playlist_index = index
+        return worker
+
+    def _open_playlist(self, options):
+        # The YoutubeDL instance stays open: the entries come back as a lazy
+        # generator that fetches further playlist pages through it.
+        ydl = yt_dlp.YoutubeDL(options)
+        info = ydl.extract_info(self.task.url, download=False, process=False)
+        for _ in range(3):
+            if not info or info.get("_type") not in ("url", "url_transparent"):
+                break
+            info = ydl.extract_info(info["url"], download=False, process=False, ie_key=info.get("ie_key"))
+        if not info or info.get("entries") is None:
+            ydl.close()
+            return None, info
+        return ydl, info
+
+    def _fan_out_playlist(self, ydl, info):
+        total = info.get("playlist_count")
+        self.log_signal.emit(f"Playlist has {total or 'an unknown number of'} entries, downloading up to {self.dispatcher.max_concurrent} at a time")
+        self.status_signal.emit(self.row, f"Playlist: 0/{total or '?'} done")
+        self.playlist_children = PlaylistJob(self, ydl, info["entries"], total)
+        self.dispatcher.add_playlist(self.playlist_children)
+
     def run(self):
+        # Runs every stage on the calling thread; with a dispatcher each stage
+        # runs on its own pool instead (see run_stage).
+        stage = "extract"
         try:
-            if self.task.playlist:
-                self.status_signal.emit(self.row, "Analyzing Playlist...")
+            while stage:
+                stage = getattr(self, stage)()
+        finally:
+            self.finish()
+
+    def run_stage(self, stage):
+        next_stage = None
+        try:
+            next_stage = getattr(self, stage)()
+        finally:
+            if stage == "transfer":
+                self.close_bandwidth_share()
+            if next_stage is None:
+                self.finish()
             else:
-                self.status_signal.emit(self.row, "Connecting...")
-            
-            self.log_signal.emit(f"Starting download to: {self.task.folder}")
+                self.dispatcher.stage_finished(self, next_stage)
+
+    def open_bandwidth_share(self):
+        return get_bandwidth_limiter().open_share()
+
+    def close_bandwidth_share(self):
+        if self.bandwidth is not None and self.bandwidth.limiter is not None:
+            self.bandwidth.limiter.close_share(self.bandwidth)
+        self.bandwidth = None
+
+    def finish(self):
+        self.close_bandwidth_share()
+        self.cleanup()
+        if self.playlist_job is not None:
+            self.playlist_job.child_finished(self.playlist_index)
+            self.playlist_job.check_finished()
+        if self.dispatcher is not None:
+            self.dispatcher.stage_finished(self, None)
+
+    def _report_cancelled(self):
+        self.interrupted = True
+        if self.paused:
+            # The dispatcher holds the job and reports it.
+            self.log_signal.emit(f"Download paused, partial files are kept: {self.task.url}")
+            return
+        if self.preempted:
+            # The dispatcher queues the job again and reports it.
+            self.log_signal.emit(f"Download paused to free a slot, it continues later: {self.task.url}")
+            return
+        self.status_signal.emit(self.row, "Download Cancelled")
+        self.log_signal.emit("Download Cancelled")
+        removed = remove_partial_files(self.token.files(), self.existing_files)
+        if removed:
+            self.log_signal.emit(f"Removed {len(removed)} partial file(s)")
+
+    def _report_unexpected(self, e):
+        self.status_signal.emit(self.row, "Download Error")
+        error_msg = f"Unexpected Error:\n"
+        error_msg += f"Error Type: {type(e).__name__}\n"
+        error_msg += f"Error Details: {str(e)}\n"
+        if hasattr(e, 'code'):
+            error_msg += f"HTTP Status Code: {e.code}\n"
+        self.log_signal.emit(error_msg)
+
+    def find_in_library(self):
+        try:
+            return get_library_index().lookup(video_key_from_url(self.task.url), format_profile(self.task))
+        except Exception as e:
+            self.log_signal.emit(f"Library lookup failed: {str(e)}")
+            return None
+
+    def record_in_library(self):
+        info = self.processed_info or {}
+        path = self.output_path
+        if path is None:
+            downloads = info.get("requested_downloads") or []
+            path = downloads[0].get("filepath") if downloads else info.get("filepath")
+        key = video_key_from_info(info)
+        if not path or not key:
+            return
+        try:
+            get_library_index().record(key, format_profile(self.task), path)
+        except Exception as e:
+            self.log_signal.emit(f"Error adding to the library index: {str(e)}")
+
+    def extract(self):
+        if self.is_cancelled():
+            self._report_cancelled()
+            return None
+        if not self.task.playlist:
+            existing = self.find_in_library()
+            if existing:
+                self.log_signal.emit(f"Already downloaded: {existing}")
+                self.status_signal.emit(self.row, ALREADY_DOWNLOADED)
+                return None
+        if self.task.playlist:
+            self.status_signal.emit(self.row, "Analyzing Playlist...")
+        else:
+            self.status_signal.emit(self.row, "Connecting...")
+        
+        self.log_signal.emit(f"Starting download to: {self.task.folder}")
+        
+        if not os.path.exists(self.task.folder):
+            os.makedirs(self.task.folder, exist_ok=True)
+            self.log_signal.emit(f"Created download directory: {self.task.folder}")
             
-            if not os.path.exists(self.task.folder):
-                os.makedirs(self.task.folder, exist_ok=True)
-                self.log_signal.emit(f"Created download directory: {self.task.folder}")
-                
-            if self.task.playlist:
-                self.status_signal.emit(self.row, "Loading Playlist...")
+        if self.task.playlist:
+            self.status_signal.emit(self.row, "Loading Playlist...")
+        else:
+            self.status_signal.emit(self.row, "Fetching Media Info...")
+        
+        if not os.path.exists(self.cookie_file):
+            try:
+                with open(self.cookie_file, "w") as cf:
+                    cf.write("# Netscape HTTP Cookie File\nyoutube.com\tFALSE\t/\tFALSE\t0\tCONSENT\tYES+42\n")
+            except Exception as e:
+                self.log_signal.emit(f"Failed to create cookie file: {str(e)}")
+
+        info_options = self._get_base_options()
+        info_options.update({
+            "skip_download": True,
+            "noplaylist": not self.task.playlist
+        })
+
+        fan_out = self.task.playlist and self.dispatcher is not None
+        if fan_out:
+            # Only the entry list is needed here, each entry is extracted by its own job.
+            info_options["extract_flat"] = "in_playlist"
+
+        if self.task.playlist:
+            self.log_signal.emit("Playlist indexing in progress...")
+
+        try:
+            playlist_ydl = None
+            if fan_out:
+                playlist_ydl, info = self._open_playlist(info_options)
             else:
-                self.status_signal.emit(self.row, "Fetching Media Info...")
+                info = self._extract_info(info_options)
+            if info is None:
+                self.status_signal.emit(self.row, CONTENT_UNAVAILABLE)
+                error_msg = f"Failed to extract info from: {self.task.url}\n"
+                error_msg += "Error Details:\n"
+                error_msg += "- HTTP Status: Content not found (404)\n"
+                error_msg += "Possible reasons:\n"
+                error_msg += "- Content might be private or deleted\n"
+                error_msg += "- Age restrictions may apply\n"
+                error_msg += "- Service restrictions (e.g., DRM protection)\n"
+                error_msg += "- Invalid or expired link\n"
+                error_msg += "- Platform limitations or regional restrictions"
+                self.log_signal.emit(error_msg)
+                return
+
+            if self.task.playlist and "title" in info:
+                self.playlist_title = info.get("title", "Unknown Playlist")
+                playlist_folder = os.path.join(self.task.folder, self.playlist_title)
+                os.makedirs(playlist_folder, exist_ok=True)
+                self.log_signal.emit(f"Created playlist directory: {playlist_folder}")
+                self.task.folder = playlist_folder
+
+            if playlist_ydl is not None:
+                self._fan_out_playlist(playlist_ydl, info)
+                return
+
+            meta = info
+            if "entries" in info and isinstance(info["entries"], list):
+                if info["entries"] and info["entries"][0]:
+                    meta = info["entries"][0]
+                else:
+                    self.status_signal.emit(self.row, PLAYLIST_ERROR)
+                    self.log_signal.emit(f"Playlist entries not found or empty for: {self.task.url}")
+                    return
+
+            if "formats" in meta:
+                self.log_signal.emit("\nAvailable formats:")
+                for f in meta["formats"]:
+                    if f.get("vcodec") != "none" and f.get("acodec") != "none":
+                        self.log_signal.emit(f"Format: {f.get('format_id')} | Resolution: {f.get('width')}x{f.get('height')} | Ext: {f.get('ext')}")
+
+            title = meta.get("title", "No Title")
+            channel = meta.get("uploader", "Unknown Channel")
+            if self.info_signal is not None and self.row is not None:
+                self.info_signal.emit(self.row, title, channel)
             
-            if not os.path.exists(self.cookie_file):
-                try:
-                    with open(self.cookie_file, "w") as cf:
-                        cf.write("# Netscape HTTP Cookie File\nyoutube.com\tFALSE\t/\tFALSE\t0\tCONSENT\tYES+42\n")
-                except Exception as e:
-                    self.log_signal.emit(f"Failed to create cookie file: {str(e)}")
+            self.write_to_history(title, channel, self.task.url)
 
-            info_options = self._get_base_options()
-            info_options.update({
-                "skip_download": True
+            download_options = self._get_base_options()
+            
+            download_options.update({
+                "outtmpl": os.path.join(self.task.folder, "%(title)s.%(ext)s"),
+                "progress_hooks": [self.progress_hook],
+                "noplaylist": not self.task.playlist,
+                "retries": 10,
+                "fragment_retries": 10,
+                "verbose": True,
+                "file_access_retries": 5,
+                "retry_sleep": 2,
+                "prefer_ffmpeg": True,
             })
 
-            if self.task.playlist:
-                self.log_signal.emit("Playlist indexing in progress...")
+            if hasattr(self.task, 'ffmpeg_path') and self.task.ffmpeg_path:
+                download_options["ffmpeg_location"] = self.task.ffmpeg_path
+                self.log_signal.emit(f"Using FFmpeg from: {self.task.ffmpeg_path}")
 
-            try:
-                with yt_dlp.YoutubeDL(info_options) as ydl:
-                    self._ydl = ydl
-                    info = ydl.extract_info(self.task.url, download=False)
-                    if info is None:
-                        self.status_signal.emit(self.row, "Content Unavailable")
-                        error_msg = f"Failed to extract info from: {self.task.url}\n"
-                        error_msg += "Error Details:\n"
-                        error_msg += "- HTTP Status: Content not found (404)\n"
-                        error_msg += "Possible reasons:\n"
-                        error_msg += "- Content might be private or deleted\n"
-                        error_msg += "- Age restrictions may apply\n"
-                        error_msg += "- Service restrictions (e.g., DRM protection)\n"
-                        error_msg += "- Invalid or expired link\n"
-                        error_msg += "- Platform limitations or regional restrictions"
-                        self.log_signal.emit(error_msg)
-                        return
-
-                    if self.task.playlist and "title" in info:
-                        self.playlist_title = info.get("title", "Unknown Playlist")
-                        playlist_folder = os.path.join(self.task.folder, self.playlist_title)
-                        os.makedirs(playlist_folder, exist_ok=True)
-                        self.log_signal.emit(f"Created playlist directory: {playlist_folder}")
-                        self.task.folder = playlist_folder
-
-                    if "entries" in info and isinstance(info["entries"], list):
-                        if info["entries"] and info["entries"][0]:
-                            info = info["entries"][0]
-                        else:
-                            self.status_signal.emit(self.row, "Playlist Error")
-                            self.log_signal.emit(f"Playlist entries not found or empty for: {self.task.url}")
-                            return
-
-                    if "formats" in info:
-                        self.log_signal.emit("\nAvailable formats:")
-                        for f in info["formats"]:
-                            if f.get("vcodec") != "none" and f.get("acodec") != "none":
-                                self.log_signal.emit(f"Format: {f.get('format_id')} | Resolution: {f.get('width')}x{f.get('height')} | Ext: {f.get('ext')}")
-
-                    title = info.get("title", "No Title")
-                    channel = info.get("uploader", "Unknown Channel")
-                    if self.info_signal is not None and self.row is not None:
-                        self.info_signal.emit(self.row, title, channel)
+            if self.task.audio_only:
+                audio_format = self.task.audio_format if hasattr(self.task, 'audio_format') and self.task.audio_format else "mp3"
+                audio_quality = getattr(self.task, 'audio_quality', '320')
+                
+                if audio_format in ['m4a', 'aac', 'opus'] and audio_format != 'mp3':
+                    download_options.update({
+                        "final_ext": audio_format,
+                        "format": f"ba[acodec^={audio_format}]/ba/best",
+                        "postprocessors": [{
+                            "key": "FFmpegExtractAudio",
+                            "nopostoverwrites": False,
+                            "preferredcodec": "copy",
+                            "when": "post_process"
+                        }]
+                    })
+                    self.log_signal.emit(f"Audio format set to: {audio_format} (copy mode - no re-encoding)")
+                else:
                     
-                    self.write_to_history(title, channel, self.task.url)
+                    download_options.update({
+                        "final_ext": audio_format,
+                        "format": "ba/best",
+                        "postprocessors": [{
+                            "key": "FFmpegExtractAudio",
+                            "nopostoverwrites": False,
+                            "preferredcodec": audio_format,
+                            "preferredquality": audio_quality
+                        }]
+                    })
+                    self.log_signal.emit(f"Audio format set to: {audio_format} (quality: {audio_quality})")
+                self.log_signal.emit(f"Audio format set to: {audio_format}")
+            else:
+                try:
+                    download_options.update({
+                        "format": self._get_format_string(),
+                        "format_sort": ["res", "ext:mp4:m4a", "size", "br", "asr"],
+                        "prefer_free_formats": False,
+                        "merge_output_format": self.task.output_format.lower(),
+                        "postprocessors": [{
+                            "key": "FFmpegVideoRemuxer",
+                            "preferedformat": self.task.output_format.lower(),
+                            "when": "post_process"
+                        }]
+                    })
+                except Exception as e:
+                    self.log_signal.emit(f"Format configuration failed, falling back to basic format: {str(e)}")
+                    download_options["format"] = "best"
 
-                download_options = self._get_base_options()
-                
+            if self.task.subtitles:
                 download_options.update({
-                    "outtmpl": os.path.join(self.task.folder, "%(title)s.%(ext)s"),
-                    "progress_hooks": [self.progress_hook],
-                    "noplaylist": not self.task.playlist,
-                    "retries": 10,
-                    "fragment_retries": 10,
-                    "proxy": self.task.proxy if self.task.proxy else None,
-                    "verbose": True,
-                    "file_access_retries": 5,
-                    "retry_sleep": 2,
-                    "prefer_ffmpeg": True,
+                    "writesubtitles": True,
+                    "allsubtitles": True
                 })
 
-                if hasattr(self.task, 'ffmpeg_path') and self.task.ffmpeg_path:
-                    download_options["ffmpeg_location"] = self.task.ffmpeg_path
-                    self.log_signal.emit(f"Using FFmpeg from: {self.task.ffmpeg_path}")
+            if self.task.incremental:
+                # Without a dispatcher the playlist is downloaded by yt-dlp
+                # itself, which does the same archive checks.
+                download_options.update({
+                    "download_archive": get_download_archive(),
+                    "break_on_existing": True
+                })
 
-                if self.task.audio_only:
-                    audio_format = self.task.audio_format if hasattr(self.task, 'audio_format') and self.task.audio_format else "mp3"
-                    audio_quality = getattr(self.task, 'audio_quality', '320')
-                    
-                    if audio_format in ['m4a', 'aac', 'opus'] and audio_format != 'mp3':
-                        download_options.update({
-                            "final_ext": audio_format,
-                            "format": f"ba[acodec^={audio_format}]/ba/best",
-                            "postprocessors": [{
-                                "key": "FFmpegExtractAudio",
-                                "nopostoverwrites": False,
-                                "preferredcodec": "copy",
-                                "when": "post_process"
-                            }]
-                        })
-                        self.log_signal.emit(f"Audio format set to: {audio_format} (copy mode - no re-encoding)")
-                    else:
-                        
-                        download_options.update({
-                            "final_ext": audio_format,
-                            "format": "ba/best",
-                            "postprocessors": [{
-                                "key": "FFmpegExtractAudio",
-                                "nopostoverwrites": False,
-                                "preferredcodec": audio_format,
-                                "preferredquality": audio_quality
-                            }]
-                        })
-                        self.log_signal.emit(f"Audio format set to: {audio_format} (quality: {audio_quality})")
-                    self.log_signal.emit(f"Audio format set to: {audio_format}")
-                else:
-                    try:
-                        download_options.update({
-                            "format": self._get_format_string(),
-                            "format_sort": ["res", "ext:mp4:m4a", "size", "br", "asr"],
-                            "prefer_free_formats": False,
-                            "merge_output_format": self.task.output_format.lower(),
-                            "postprocessors": [{
-                                "key": "FFmpegVideoRemuxer",
-                                "preferedformat": self.task.output_format.lower(),
-                                "when": "post_process"
-                            }]
-                        })
-                    except Exception as e:
-                        self.log_signal.emit(f"Format configuration failed, falling back to basic format: {str(e)}")
-                        download_options["format"] = "best"
-
-                if self.task.subtitles:
-                    download_options.update({
-                        "writesubtitles": True,
-                        "allsubtitles": True
-                    })
+            self.postprocess_options = None
+            if download_options.get("postprocessors") and info.get("_type", "video") == "video":
+                # Transcoding and remuxing run in the post-process stage, so
+                # they never hold a transfer slot.
+                self.postprocess_options = dict(download_options)
+                download_options["postprocessors"] = []
 
+            self.info = info
+            self.info_options = info_options
+            self.download_options = download_options
+            return "transfer"
+        except yt_dlp.utils.DownloadCancelled:
+            self._report_cancelled()
+        except Exception as e:
+            self._report_unexpected(e)
+        return None
+
+    def transfer(self):
+        if self.is_cancelled():
+            self._report_cancelled()
+            return None
+        info = self.info
+        info_options = self.info_options
+        download_options = self.download_options
+        try:
+            try:
                 try:
-                    with yt_dlp.YoutubeDL(download_options) as ydl:
-                        self._ydl = ydl
-                        try:
-                            ydl.download([self.task.url])
-                        except Exception as e:
-                            if "Unable to rename file" in str(e):
-                                time.sleep(2)
-                                ydl.download([self.task.url])
-                            elif "unable to obtain file audio codec" in str(e):
-                                ydl_opts = download_options.copy()
-                               
-                                ydl_opts['postprocessor_args'] = [
-                                    '-ar', '48000',    
-                                    '-ac', '2',        
-                                    '-b:a', '320k',    
-                                    '-vn'              
-                                ]
-                                self.log_signal.emit("Using high-quality fallback encoding parameters")
-                                with yt_dlp.YoutubeDL(ydl_opts) as ydl2:
-                                    self._ydl = ydl2
-                                    ydl2.download([self.task.url])
-                            else:
-                                raise
-                    self.status_signal.emit(self.row, "Download Completed")
-                except yt_dlp.utils.DownloadError as e:
-                    if self.cancel:
-                        self.status_signal.emit(self.row, "Download Cancelled")
-                        self.log_signal.emit("Download Cancelled")
+                    try:
+                        self._process_info(download_options, info)
+                    except yt_dlp.utils.DownloadError:
+                        if not self.info_from_cache or self.is_cancelled():
+                            raise
+                        self.log_signal.emit("Cached media URLs were rejected, extracting again...")
+                        info = self._extract_info(info_options, use_cache=False)
+                        if info is not None:
+                            self._process_info(download_options, info)
+                except Exception as e:
+                    if "Unable to rename file" in str(e):
+                        time.sleep(2)
+                        self._process_info(download_options, info)
+                    elif "unable to obtain file audio codec" in str(e):
+                        ydl_opts = download_options.copy()
+                       
+                        ydl_opts['postprocessor_args'] = [
+                            '-ar', '48000',    
+                            '-ac', '2',        
+                            '-b:a', '320k',    
+                            '-vn'              
+                        ]
+                        self.log_signal.emit("Using high-quality fallback encoding parameters")
+                        self._process_info(ydl_opts, info)
                     else:
-                        error_msg = f"Download Error: {str(e)}\n"
-                        if hasattr(e, 'exc_info') and e.exc_info[1]:
-                            error_msg += f"Error Type: {type(e.exc_info[1]).__name__}\n"
-                            if hasattr(e.exc_info[1], 'code'):
-                                error_msg += f"HTTP Status Code: {e.exc_info[1].code}\n"
+                        raise
+                if self.is_cancelled():
+                    # yt-dlp only reports the error raised by the progress hook.
+                    self._report_cancelled()
+                    return None
+                if self.postprocess_options is not None:
+                    self.status_signal.emit(self.row, "Processing...")
+                    return "post_process"
+                self.record_in_library()
+                self.status_signal.emit(self.row, "Download Completed")
+            except yt_dlp.utils.DownloadError as e:
+                if self.is_cancelled():
+                    self._report_cancelled()
+                else:
+                    error_msg = f"Download Error: {str(e)}\n"
+                    if getattr(e, 'exc_info', None) and e.exc_info[1]:
+                        error_msg += f"Error Type: {type(e.exc_info[1]).__name__}\n"
+                        if hasattr(e.exc_info[1], 'code'):
+                            error_msg += f"HTTP Status Code: {e.exc_info[1].code}\n"
+                    self.log_signal.emit(error_msg)
+                    self.log_signal.emit(f"Attempting download with basic format...")
+                    download_options["format"] = "best"
+                    if self.postprocess_options is not None:
+                        self.postprocess_options["format"] = "best"
+                    try:
+                        self._process_info(download_options, info)
+                        self.completed_status = "Download Completed (Basic Format)"
+                        if self.postprocess_options is not None:
+                            self.status_signal.emit(self.row, "Processing...")
+                            return "post_process"
+                        self.record_in_library()
+                        self.status_signal.emit(self.row, self.completed_status)
+                    except Exception as e2:
+                        self.status_signal.emit(self.row, "Download Error")
+                        error_msg = f"All download attempts failed:\n"
+                        error_msg += f"Error Type: {type(e2).__name__}\n"
+                        error_msg += f"Error Details: {str(e2)}\n"
+                        if hasattr(e2, 'code'):
+                            error_msg += f"HTTP Status Code: {e2.code}\n"
                         self.log_signal.emit(error_msg)
-                        self.log_signal.emit(f"Attempting download with basic format...")
-                        download_options["format"] = "best"
-                        try:
-                            with yt_dlp.YoutubeDL(download_options) as ydl:
-                                self._ydl = ydl
-                                ydl.download([self.task.url])
-                            self.status_signal.emit(self.row, "Download Completed (Basic Format)")
-                        except Exception as e2:
-                            self.status_signal.emit(self.row, "Download Error")
-                            error_msg = f"All download attempts failed:\n"
-                            error_msg += f"Error Type: {type(e2).__name__}\n"
-                            error_msg += f"Error Details: {str(e2)}\n"
-                            if hasattr(e2, 'code'):
-                                error_msg += f"HTTP Status Code: {e2.code}\n"
-                            self.log_signal.emit(error_msg)
+        except yt_dlp.utils.DownloadCancelled:
+            self._report_cancelled()
+        except Exception as e:
+            self._report_unexpected(e)
+        return None
+
+    def post_process(self):
+        if self.is_cancelled():
+            self._report_cancelled()
+            return None
+        for download in (self.processed_info or {}).get("requested_downloads") or []:
+            if download.get("filepath"):
+                self.token.watch(download["filepath"])
+        # A cancelled transcode leaves its output half written; files that
+        # are not in this list by then are removed.
+        self.existing_files = self.token.files()
+        # Errors are raised here rather than only logged, a failed conversion
+        # must not be reported as a completed download.
+        options = dict(self.postprocess_options, ignoreerrors=False)
+        try:
+            try:
+                self._run_postprocessors(options)
             except Exception as e:
-                self.status_signal.emit(self.row, "Download Error")
-                error_msg = f"Unexpected Error:\n"
-                error_msg += f"Error Type: {type(e).__name__}\n"
-                error_msg += f"Error Details: {str(e)}\n"
-                if hasattr(e, 'code'):
-                    error_msg += f"HTTP Status Code: {e.code}\n"
-                self.log_signal.emit(error_msg)
-        finally:
-            self.cleanup()
+                if "unable to obtain file audio codec" not in str(e):
+                    raise
+                options['postprocessor_args'] = [
+                    '-ar', '48000',    
+                    '-ac', '2',        
+                    '-b:a', '320k',    
+                    '-vn'              
+                ]
+                self.log_signal.emit("Using high-quality fallback encoding parameters")
+                self._run_postprocessors(options)
+            self.record_in_library()
+            self.status_signal.emit(self.row, self.completed_status)
+        except Exception as e:
+            if self.is_cancelled():
+                self._report_cancelled()
+            else:
+                self._report_unexpected(e)
+        return None
+
+    def _run_postprocessors(self, options):
+        info = self.processed_info or {}
+        with yt_dlp.YoutubeDL(options) as ydl:
+            self._ydl = ydl
+            for download in info.get("requested_downloads") or []:
+                if not download.get("filepath"):
+                    continue
+                download_info = {k: v for k, v in info.items() if k != "requested_downloads"}
+                download_info.update(download)
+                final_info = ydl.post_process(download["filepath"], download_info)
+                if self.output_path is None and final_info:
+                    self.output_path = final_info.get("filepath")
+
+    def _stop_now(self, d):
+        # A pause lets the fragment being downloaded finish, so only whole
+        # fragments are kept and fetched again; a cancel stops at once.
+        fragment = d.get("fragment_index")
+        if not (self.paused or self.preempted) or fragment is None or d["status"] != "downloading":
+            return True
+        if self.pause_fragment is None:
+            self.pause_fragment = fragment
+        return fragment != self.pause_fragment
 
     def progress_hook(self, d):
-        if self.cancel:
-            raise yt_dlp.utils.DownloadError("Cancelled")
+        if self.is_cancelled() and self._stop_now(d):
+            raise yt_dlp.utils.DownloadCancelled()
         if d["status"] == "downloading":
+            part_path = d.get("tmpfilename")
+            if self.task.job_id and part_path and part_path != self.part_path:
+                # A restored job finds its partial files through the journal.
+                self.part_path = part_path
+                get_job_journal().record_part(self.task.job_id, part_path)
             downloaded = d.get("downloaded_bytes", 0) or 0
+            if self.bandwidth is None:
+                self.bandwidth = self.open_bandwidth_share()
+            filename = d.get("tmpfilename") or d.get("filename")
+            if filename != self.received_file:
+                if d.get("filename"):
+                    self.token.watch(d["filename"])
+                # Bytes resumed from a partial file were not transferred now.
+                self.received_file = filename
+                self.received_bytes = downloaded
+            received = max(0, downloaded - self.received_bytes)
+            self.received_bytes = downloaded
+            self.bandwidth.throttle(received, self.is_cancelled)
             total = d.get("total_bytes") or d.get("total_bytes_estimate", 0)
             percent = (downloaded / total) * 100 if total > 0 else 0
             speed = d.get("speed", 0) or 0
             eta = d.get("eta", 0) or 0
             self.progress_signal.emit(self.row, percent)
-            self.log_signal.emit(f"Downloading... {int(percent)}% | Speed: {format_speed(speed)} | ETA: {format_time(eta)}")
+            # The log gets a line per 10% step rather than one per chunk.
+            step = int(percent // 10)
+            if step != self.logged_step:
+                self.logged_step = step
+                self.log_signal.emit(f"Downloading... {int(percent)}% | Speed: {format_speed(speed)} | ETA: {format_time(eta)}")
 
     def write_to_history(self, title, channel, url):
-       
         try:
-            history_file = os.path.join(get_data_dir(), "history.json")
-            
-            # Load 
-            if os.path.exists(history_file):
-                with open(history_file, "r", encoding="utf-8") as f:
-                    history = json.load(f)
-            else:
-                history = []
-            
-            # Add
-            history.append({
-                "title": title,
-                "channel": channel,
-                "url": url
-            })
-            
-            # Save 
-            with open(history_file, "w", encoding="utf-8") as f:
-                json.dump(history, f, indent=2, ensure_ascii=False)
-                
+            get_history_store().add(title, channel, url)
             self.log_signal.emit(f"Added to history: {title} - {channel}")
-             
         except Exception as e:
             self.log_signal.emit(f"Error writing to history: {str(e)}")
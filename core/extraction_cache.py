@@ -0,0 +1,286 @@
+import os
+import re
+import json
+import gzip
+import time
+import hashlib
+import threading
+from urllib.parse import urlparse, parse_qs, urlsplit, urlunsplit
+from core.utils import get_data_dir
+from core import url_parser
+
+CACHE_DIR_NAME = "extraction_cache"
+INDEX_FILE_NAME = "index.json"
+MAX_ENTRIES = 300
+MAX_BYTES = 100 * 1024 * 1024
+# Media URLs without an expiry parameter are trusted for this long.
+DEFAULT_TTL = 30 * 60
+# Entries are treated as stale a little before the signed URLs actually expire,
+# so a transfer never starts on a URL that dies halfway through.
+EXPIRY_MARGIN = 10 * 60
+INDEX_FLUSH_INTERVAL = 30
+
+_EXPIRE_PATH_RE = re.compile(r"/expire/(\d+)")
+_extractor_classes = None
+
+
+def parse_url_expiry(url):
+    if not url:
+        return None
+    try:
+        query = parse_qs(urlparse(url).query)
+    except ValueError:
+        return None
+    for key in ("expire", "Expires", "expires"):
+        value = query.get(key)
+        if value and value[0].isdigit():
+            return int(value[0])
+    match = _EXPIRE_PATH_RE.search(url)
+    if match:
+        return int(match.group(1))
+    return None
+
+
+def info_expiry(info, extracted_at=None):
+    """Earliest expiry of the signed media URLs in an info dict."""
+    extracted_at = extracted_at or time.time()
+    expiries = []
+    for fmt in [info] + list(info.get("formats") or []):
+        for key in ("url", "manifest_url", "fragment_base_url"):
+            expiry = parse_url_expiry(fmt.get(key))
+            if expiry:
+                expiries.append(expiry)
+    if expiries:
+        return min(expiries)
+    return extracted_at + DEFAULT_TTL
+
+
+def url_key(url):
+    """Key of a link no extractor was asked about: the link without its fragment."""
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return f"url:{url}"
+    return "url:" + urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, parts.query, ""))
+
+
+def video_key_from_url(url, extractors=True):
+    """Extractor key and id for a URL, without any network access.
+
+    Common YouTube links are parsed directly. Other links need yt-dlp's
+    extractor list, which takes about a second to load the first time; with
+    extractors=False, as on the GUI thread, they are keyed by url_key instead.
+    """
+    global _extractor_classes
+    key = url_parser.video_key(url)
+    if key is not None:
+        return key
+    if not extractors:
+        return url_key(url)
+    if _extractor_classes is None:
+        from yt_dlp.extractor import gen_extractor_classes
+        _extractor_classes = [ie for ie in gen_extractor_classes() if ie.ie_key() != "Generic"]
+    for ie in _extractor_classes:
+        if ie.suitable(url):
+            temp_id = ie.get_temp_id(url)
+            if temp_id:
+                return f"{ie.ie_key()}:{temp_id}"
+    return url_key(url)
+
+
+def video_key_from_info(info):
+    extractor = info.get("extractor_key") or info.get("ie_key")
+    if extractor and info.get("id"):
+        return f"{extractor}:{info['id']}"
+    return None
+
+
+def options_fingerprint(options):
+    payload = json.dumps(options or {}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+
+class ExtractionCache:
+    def __init__(self, cache_dir=None, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.cache_dir = cache_dir or os.path.join(get_data_dir(), CACHE_DIR_NAME)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.index_path = os.path.join(self.cache_dir, INDEX_FILE_NAME)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        self._entries = {}
+        self._aliases = {}
+        self._dirty = False
+        self._last_flush = 0
+        self._load_index()
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._entries = data.get("entries", {})
+            self._aliases = data.get("aliases", {})
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Warning: Extraction cache index unreadable, starting empty: {e}")
+            self._entries = {}
+            self._aliases = {}
+
+    def _flush_index(self):
+        tmp_path = self.index_path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"entries": self._entries, "aliases": self._aliases}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.index_path)
+            self._dirty = False
+            self._last_flush = time.time()
+        except OSError as e:
+            print(f"Warning: Could not write extraction cache index: {e}")
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json.gz")
+
+    def _resolve(self, url, extractors=True):
+        key = video_key_from_url(url, extractors)
+        return self._aliases.get(key, key)
+
+    def _touch(self, key):
+        self._entries[key]["accessed_at"] = time.time()
+        self._dirty = True
+        if time.time() - self._last_flush > INDEX_FLUSH_INTERVAL:
+            self._flush_index()
+
+    def get(self, url, options=None):
+        """Return a cached info dict whose media URLs are still valid, or None."""
+        with self._lock:
+            key = f"{self._resolve(url)}|{options_fingerprint(options)}"
+            entry = self._entries.get(key)
+            if not entry:
+                return None
+            if entry["expires_at"] - EXPIRY_MARGIN <= time.time():
+                return None
+            try:
+                with gzip.open(self._entry_path(key), "rt", encoding="utf-8") as f:
+                    info = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                self._remove(key)
+                self._flush_index()
+                return None
+            self._touch(key)
+            return info
+
+    def lookup_metadata(self, url):
+        """Title, uploader, duration and format ids of a known video, even when its URLs expired.
+
+        Called on the GUI thread, so the extractor list is not loaded for it.
+        """
+        with self._lock:
+            video = self._resolve(url, extractors=False)
+            best = None
+            for entry in self._entries.values():
+                if entry.get("video") == video and (best is None or entry["accessed_at"] > best["accessed_at"]):
+                    best = entry
+            if best is None:
+                return None
+            return {
+                "title": best.get("title"),
+                "uploader": best.get("uploader"),
+                "duration": best.get("duration"),
+                "format_ids": best.get("format_ids", [])
+            }
+
+    def remaining_validity(self, url, options=None):
+        with self._lock:
+            entry = self._entries.get(f"{self._resolve(url)}|{options_fingerprint(options)}")
+            if not entry:
+                return 0
+            return max(0, entry["expires_at"] - EXPIRY_MARGIN - time.time())
+
+    def put(self, url, options, info):
+        video = video_key_from_info(info)
+        if not video or info.get("_type", "video") != "video":
+            return
+        now = time.time()
+        payload = json.dumps(info, ensure_ascii=False, default=str)
+        with self._lock:
+            key = f"{video}|{options_fingerprint(options)}"
+            path = self._entry_path(key)
+            try:
+                with gzip.open(path, "wt", encoding="utf-8") as f:
+                    f.write(payload)
+                size = os.path.getsize(path)
+            except OSError as e:
+                print(f"Warning: Could not write extraction cache entry: {e}")
+                return
+            self._entries[key] = {
+                "video": video,
+                "size": size,
+                "extracted_at": now,
+                "accessed_at": now,
+                "expires_at": info_expiry(info, now),
+                "title": info.get("title"),
+                "uploader": info.get("uploader"),
+                "duration": info.get("duration"),
+                "format_ids": [f.get("format_id") for f in info.get("formats") or []]
+            }
+            # Also under the key the GUI thread looks the link up by.
+            for alias in {video_key_from_url(url), video_key_from_url(url, extractors=False)}:
+                if alias != video:
+                    self._aliases[alias] = video
+            self._evict()
+            self._flush_index()
+
+    def invalidate(self, url, options=None):
+        with self._lock:
+            key = f"{self._resolve(url)}|{options_fingerprint(options)}"
+            if key in self._entries:
+                self._remove(key)
+                self._flush_index()
+
+    def _remove(self, key):
+        self._entries.pop(key, None)
+        try:
+            os.remove(self._entry_path(key))
+        except OSError:
+            pass
+        live = {entry["video"] for entry in self._entries.values()}
+        self._aliases = {alias: video for alias, video in self._aliases.items() if video in live}
+
+    def _evict(self):
+        now = time.time()
+        total = sum(entry["size"] for entry in self._entries.values())
+        # Expired entries go first, then least recently used.
+        order = sorted(self._entries, key=lambda k: (self._entries[k]["expires_at"] > now, self._entries[k]["accessed_at"]))
+        for key in order:
+            if len(self._entries) <= self.max_entries and total <= self.max_bytes:
+                break
+            total -= self._entries[key]["size"]
+            self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+            self._aliases = {}
+            self._flush_index()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": sum(entry["size"] for entry in self._entries.values())
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_extraction_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ExtractionCache()
+        return _cache
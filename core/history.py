@@ -1,116 +1,259 @@
 import os
-import json
-from PySide6.QtWidgets import QTableWidgetItem
-from core.utils import get_data_dir
-
-DATA_DIR = get_data_dir()
-if not os.path.exists(DATA_DIR):
-    os.makedirs(DATA_DIR)
-HISTORY_FILE = os.path.join(DATA_DIR, "history.json")
-
-def load_history_initial(table):
-    if not os.path.exists(HISTORY_FILE):
-        with open(HISTORY_FILE, "w", encoding="utf-8") as f:
-            json.dump([], f, indent=4)
-    else:
+from functools import partial
+from PySide6.QtCore import (Qt, QAbstractTableModel, QModelIndex, QFileSystemWatcher,
+                            QRunnable, QThreadPool, QTimer, Signal)
+from core.history_store import get_history_store, RESET
+
+# Rows also answer this role with the store id of their entry.
+ID_ROLE = Qt.UserRole
+FETCH_SIZE = 200
+# Writes touch the database files several times; they are checked once they settle.
+WATCH_DELAY_MS = 500
+# New entries that need a reload to be placed are gathered for this long first.
+RELOAD_DELAY_MS = 200
+
+
+class HistoryLoader(QRunnable):
+    """Reads the first page of the history off the GUI thread."""
+    def __init__(self, model, generation):
+        super().__init__()
+        self.model = model
+        self.generation = generation
+        self.store = model.store
+        self.order_by = model.order_by()
+        self.descending = model.descending
+        self.filter_text = model.filter_text
+
+    def run(self):
         try:
-            with open(HISTORY_FILE, "r", encoding="utf-8") as f:
-                history = json.load(f)
-                for entry in history:
-                    row = table.rowCount()
-                    table.insertRow(row)
-                    # Check if entry has new format with title and channel
-                    if "title" in entry and "channel" in entry:
-                        title = entry.get("title", "Unknown Title")
-                        channel = entry.get("channel", "Unknown Channel")
-                        url = entry.get("url", "")
-                        table.setItem(row, 0, QTableWidgetItem(title))
-                        table.setItem(row, 1, QTableWidgetItem(channel))
-                        table.setItem(row, 2, QTableWidgetItem(url))
-                    else:
-                        # Legacy format - just URL
-                        url = entry.get("url", "")
-                        table.setItem(row, 0, QTableWidgetItem("Unknown Title"))
-                        table.setItem(row, 1, QTableWidgetItem("Unknown Channel"))
-                        table.setItem(row, 2, QTableWidgetItem(url))
+            total = self.store.count(self.filter_text)
+            last_id = self.store.last_id()
+            rows = self.store.page(0, FETCH_SIZE, self.order_by, self.descending, self.filter_text)
         except Exception as e:
             print(f"Error loading history: {e}")
+            return
+        try:
+            self.model.loaded.emit(self.generation, total, last_id, rows)
+        except RuntimeError:
+            # The model was deleted while the page was read.
+            pass
+
+
+class HistoryTableModel(QAbstractTableModel):
+    """History table backed by the history store.
+
+    Only the rows scrolled into view are read, FETCH_SIZE at a time, so opening
+    the page costs one page whatever the size of the history. Sorting and
+    searching are done by the store query, not on loaded rows, and like every
+    reload the first page is read by a HistoryLoader; only fetchMore reads on
+    the GUI thread.
+
+    Entries written to the store are pushed into the model as they are added,
+    from whichever thread wrote them. While the rows are sorted or filtered a
+    burst of entries costs one reload. Writes by other processes are noticed
+    by watching the database files.
+    """
+    entry_written = Signal(object)
+    loaded = Signal(int, int, int, object)
+
+    HEADERS = ["Title", "Channel", "URL"]
+    COLUMNS = ["title", "channel", "url"]
+
+    def __init__(self, store=None, parent=None):
+        super().__init__(parent)
+        self.store = store or get_history_store()
+        self.rows = []
+        self.total = 0
+        self.last_id = 0
+        self.sort_column = None
+        self.descending = False
+        self.filter_text = ""
+        self.generation = 0
+        self.watcher = None
+        self.reload_timer = QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(RELOAD_DELAY_MS)
+        self.reload_timer.timeout.connect(self.reload)
+        self.entry_written.connect(self.add_entry)
+        self.loaded.connect(self._on_loaded)
+        listener = self.entry_written.emit
+        self.store.add_listener(listener)
+        # Bound to the store only, the model is gone when this runs.
+        self.destroyed.connect(partial(self.store.remove_listener, listener))
+
+    def order_by(self):
+        return self.COLUMNS[self.sort_column] if self.sort_column is not None else None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self.rows[index.row()]
+        if role in (Qt.DisplayRole, Qt.ToolTipRole):
+            return entry[self.COLUMNS[index.column()]]
+        if role == ID_ROLE:
+            return entry["id"]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and len(self.rows) < self.total
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        batch = self.store.page(len(self.rows), FETCH_SIZE, self.order_by(), self.descending, self.filter_text)
+        if not batch:
+            self.total = len(self.rows)
+            return
+        self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(batch) - 1)
+        self.rows.extend(batch)
+        self.endInsertRows()
+
+    def reload(self):
+        """Read the first page again off the GUI thread; the rows shown stay until it is in."""
+        self.reload_timer.stop()
+        self.load_async()
 
-def save_history(table):
-    history = []
-    for r in range(table.rowCount()):
-        title_item = table.item(r, 0)
-        channel_item = table.item(r, 1)
-        url_item = table.item(r, 2)
-        
-        title = title_item.text() if title_item else "Unknown Title"
-        channel = channel_item.text() if channel_item else "Unknown Channel"
-        url = url_item.text() if url_item else ""
-        
-        # Skip empty rows
-        if not url.strip():
-            continue
-            
-        history.append({
-            "title": title,
-            "channel": channel,
-            "url": url
-        })
-    with open(HISTORY_FILE, "w", encoding="utf-8") as f:
-        json.dump(history, f, indent=4, ensure_ascii=False)
-
-def add_history_entry(table, title="", channel="", url="", enabled=True):
+    def schedule_reload(self):
+        # Not restarted by later entries, so a steady stream still shows up.
+        if not self.reload_timer.isActive():
+            self.reload_timer.start()
+
+    def load_async(self):
+        self.generation += 1
+        QThreadPool.globalInstance().start(HistoryLoader(self, self.generation))
+
+    def _on_loaded(self, generation, total, last_id, rows):
+        if generation != self.generation:
+            return
+        self.beginResetModel()
+        self.rows = rows
+        self.total = total
+        self.last_id = last_id
+        self.endResetModel()
+        # Entries pushed while the page was read are newer than its snapshot.
+        self.fetch_new()
+
+    def watch_store(self):
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self._on_file_changed)
+        self.watch_timer = QTimer(self)
+        self.watch_timer.setSingleShot(True)
+        self.watch_timer.setInterval(WATCH_DELAY_MS)
+        self.watch_timer.timeout.connect(self.check_external_changes)
+        self._watch_files()
+
+    def _watch_files(self):
+        # The -wal file appears with the first write and a checkpoint may
+        # recreate either file, so the list is refreshed on every change.
+        paths = [p for p in (self.store.db_path, self.store.db_path + "-wal") if os.path.exists(p)]
+        missing = [p for p in paths if p not in self.watcher.files()]
+        if missing:
+            self.watcher.addPaths(missing)
+
+    def _on_file_changed(self, path):
+        self._watch_files()
+        self.watch_timer.start()
+
+    def check_external_changes(self):
+        # Our own writes also touch the files but are already in the model.
+        if self.store.changed_externally():
+            self.load_async()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sort_column = column if 0 <= column < len(self.COLUMNS) else None
+        self.descending = order == Qt.DescendingOrder
+        self.reload()
+
+    def set_filter(self, text):
+        self.filter_text = text
+        self.reload()
+
+    def add_entry(self, entry):
+        """Show an entry that was just written to the store."""
+        if entry is RESET:
+            self.schedule_reload()
+            return
+        if entry["id"] <= self.last_id:
+            return
+        self.last_id = entry["id"]
+        if self.sort_column is not None or self.descending or self.filter_text:
+            # Its place depends on rows that may not be loaded yet.
+            self.schedule_reload()
+            return
+        self.total += 1
+        if len(self.rows) == self.total - 1:
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows))
+            self.rows.append(entry)
+            self.endInsertRows()
+
+    def fetch_new(self):
+        """Pick up entries newer than the last one the model has seen."""
+        for entry in self.store.since(self.last_id):
+            self.add_entry(entry)
+
+    def remove_rows(self, rows):
+        self.store.delete(self.rows[r]["id"] for r in rows)
+        for r in sorted(rows, reverse=True):
+            self.beginRemoveRows(QModelIndex(), r, r)
+            del self.rows[r]
+            self.total -= 1
+            self.endRemoveRows()
+
+    def clear(self):
+        self.store.clear()
+        self.beginResetModel()
+        self.rows = []
+        self.total = 0
+        self.endResetModel()
+
+
+def load_history_initial(model):
+    model.load_async()
+
+def add_history_entry(model, title="", channel="", url="", enabled=True):
     if not enabled:
         return
-    row = table.rowCount()
-    table.insertRow(row)
-    
+
     # Set default values if empty
     if not title:
         title = "Unknown Title"
     if not channel:
         channel = "Unknown Channel"
-    
-    table.setItem(row, 0, QTableWidgetItem(title))
-    table.setItem(row, 1, QTableWidgetItem(channel))
-    table.setItem(row, 2, QTableWidgetItem(url))
-    save_history(table)
-
-def delete_selected_history(table, log_callback):
-    selected_rows = set()
-    for it in table.selectedItems():
-        selected_rows.add(it.row())
-    for r in sorted(selected_rows, reverse=True):
-        table.removeRow(r)
+
+    # The model shows the entry when the store reports it.
+    model.store.add(title, channel, url)
+
+def delete_selected_history(view, log_callback):
+    selected_rows = {index.row() for index in view.selectionModel().selectedIndexes()}
+    view.model().remove_rows(selected_rows)
     log_callback(f"Deleted {len(selected_rows)} history entries.")
-    save_history(table)
 
-def delete_all_history(table, confirm, log_callback):
+def delete_all_history(model, confirm, log_callback):
     ans = confirm()
     if ans:
-        table.setRowCount(0)
+        model.clear()
         log_callback("All history deleted.")
-        save_history(table)
-
-def search_history(table, txt):
-    txt = txt.lower()
-    for r in range(table.rowCount()):
-        hide = True
-        for c in range(table.columnCount()):
-            it = table.item(r, c)
-            if it and txt in it.text().lower():
-                hide = False
-                break
-        table.setRowHidden(r, hide)
+
+def search_history(model, txt):
+    """Filter the model through the store's full-text index, see build_search_query."""
+    model.set_filter(txt.strip())
 
 def export_history(file_path):
     """Export history data to a JSON file"""
     try:
-        with open(HISTORY_FILE, "r", encoding="utf-8") as f:
-            history = json.load(f)
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(history, f, indent=4, ensure_ascii=False)
+        get_history_store().export(file_path)
         return True
-    except (OSError, PermissionError, json.JSONDecodeError, json.JSONEncodeError) as e:
+    except (OSError, PermissionError, TypeError, ValueError) as e:
         print(f"Error exporting history: {e}")
         return False
@@ -0,0 +1,301 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from core import utils
+
+DB_FILE_NAME = "history.db"
+LEGACY_FILE_NAME = "history.json"
+SORT_COLUMNS = ("title", "channel", "url", "downloaded_at")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    url TEXT NOT NULL,
+    downloaded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_url ON history(url);
+CREATE INDEX IF NOT EXISTS idx_history_downloaded_at ON history(downloaded_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Full-text index over the history table. It stores no text of its own and is
+# kept in step with the table by triggers.
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE history_fts USING fts5(
+    title, channel, url,
+    content='history', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS history_fts_insert AFTER INSERT ON history BEGIN
+    INSERT INTO history_fts(rowid, title, channel, url) VALUES (new.id, new.title, new.channel, new.url);
+END;
+CREATE TRIGGER IF NOT EXISTS history_fts_delete AFTER DELETE ON history BEGIN
+    INSERT INTO history_fts(history_fts, rowid, title, channel, url) VALUES ('delete', old.id, old.title, old.channel, old.url);
+END;
+CREATE TRIGGER IF NOT EXISTS history_fts_update AFTER UPDATE ON history BEGIN
+    INSERT INTO history_fts(history_fts, rowid, title, channel, url) VALUES ('delete', old.id, old.title, old.channel, old.url);
+    INSERT INTO history_fts(rowid, title, channel, url) VALUES (new.id, new.title, new.channel, new.url);
+END;
+"""
+SEARCH_FIELDS = ("title", "channel", "url")
+# Passed to listeners in place of an entry when the whole history changed.
+RESET = None
+
+
+def build_search_query(text):
+    """Turn search box text into an FTS5 query.
+
+    Every word matches as a prefix and all words must match. "channel:foo"
+    limits a word to one column. Words made of punctuation only are dropped,
+    None is returned when nothing is left to search for.
+    """
+    terms = []
+    for word in text.split():
+        field = None
+        if ":" in word:
+            name, value = word.split(":", 1)
+            if name.lower() in SEARCH_FIELDS:
+                field, word = name.lower(), value
+        if not any(c.isalnum() for c in word):
+            continue
+        phrase = '"' + word.replace('"', '""') + '"*'
+        terms.append(f"{field} : {phrase}" if field else phrase)
+    return " AND ".join(terms) or None
+
+
+class HistoryStore:
+    """Download history in SQLite.
+
+    The database runs in WAL mode so readers never block the writer. Within the
+    app every write goes through the one connection of the store and its lock,
+    which makes an append a single indexed insert instead of a rewrite of the
+    whole file. The old history.json is imported once and then kept as
+    history.json.migrated.
+    """
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        os.makedirs(data_dir, exist_ok=True)
+        self.db_path = os.path.join(data_dir, DB_FILE_NAME)
+        self.lock = threading.RLock()
+        self.listeners = []
+        self.conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(SCHEMA)
+            self.fts = self._create_search_index()
+            self._migrate_legacy_file()
+            self.data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _create_search_index(self):
+        exists = self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'history_fts'").fetchone()
+        if exists:
+            return True
+        try:
+            with self.conn:
+                self.conn.executescript("BEGIN;" + FTS_SCHEMA + "INSERT INTO history_fts(history_fts) VALUES ('rebuild');COMMIT;")
+        except sqlite3.OperationalError as e:
+            # SQLite built without FTS5, search falls back to scanning.
+            print(f"Warning: History search index unavailable: {e}")
+            return False
+        return True
+
+    def _read_json_entries(self, file_path):
+        """Rows of a history.json file, dated in file order up to its mtime."""
+        with open(file_path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        last = os.path.getmtime(file_path)
+        rows = []
+        for i, entry in enumerate(entries):
+            if not isinstance(entry, dict) or not entry.get("url"):
+                continue
+            rows.append((
+                entry.get("title") or "Unknown Title",
+                entry.get("channel") or "Unknown Channel",
+                entry["url"],
+                last - (len(entries) - i)
+            ))
+        return rows
+
+    def _migrate_legacy_file(self):
+        legacy_path = os.path.join(self.data_dir, LEGACY_FILE_NAME)
+        done = self.conn.execute("SELECT value FROM meta WHERE key = 'json_migrated'").fetchone()
+        if done or not os.path.exists(legacy_path):
+            return
+        try:
+            rows = self._read_json_entries(legacy_path)
+        except (OSError, ValueError, TypeError) as e:
+            print(f"Warning: Could not migrate {LEGACY_FILE_NAME}: {e}")
+            return
+        with self.conn:
+            self.conn.executemany("INSERT INTO history (title, channel, url, downloaded_at) VALUES (?, ?, ?, ?)", rows)
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', ?)", (str(time.time()),))
+        try:
+            os.replace(legacy_path, legacy_path + ".migrated")
+        except OSError as e:
+            print(f"Warning: Could not rename {LEGACY_FILE_NAME} after migration: {e}")
+
+    def import_file(self, file_path):
+        """Replace the history with the entries of an exported history.json."""
+        rows = self._read_json_entries(file_path)
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM history")
+            self.conn.executemany("INSERT INTO history (title, channel, url, downloaded_at) VALUES (?, ?, ?, ?)", rows)
+        self._notify(RESET)
+
+    def add(self, title, channel, url, downloaded_at=None):
+        entry = {
+            "title": title or "Unknown Title",
+            "channel": channel or "Unknown Channel",
+            "url": url,
+            "downloaded_at": downloaded_at or time.time()
+        }
+        with self.lock:
+            with self.conn:
+                cursor = self.conn.execute(
+                    "INSERT INTO history (title, channel, url, downloaded_at) VALUES (?, ?, ?, ?)",
+                    (entry["title"], entry["channel"], entry["url"], entry["downloaded_at"])
+                )
+            entry["id"] = cursor.lastrowid
+        self._notify(entry)
+        return entry["id"]
+
+    def add_listener(self, listener):
+        """Call listener(entry) after every add, on the thread that wrote it.
+
+        listener(RESET) is called instead when the whole history was replaced
+        or cleared.
+        """
+        with self.lock:
+            self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        with self.lock:
+            if listener in self.listeners:
+                self.listeners.remove(listener)
+
+    def _notify(self, entry):
+        with self.lock:
+            listeners = list(self.listeners)
+        for listener in listeners:
+            try:
+                listener(entry if entry is RESET else dict(entry))
+            except RuntimeError:
+                # The Qt object behind the listener has been deleted.
+                self.remove_listener(listener)
+
+    def changed_externally(self):
+        """Whether another connection committed to the database since the last call."""
+        with self.lock:
+            version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            changed = version != self.data_version
+            self.data_version = version
+        return changed
+
+    def replace_all(self, entries):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM history")
+            now = time.time()
+            self.conn.executemany(
+                "INSERT INTO history (title, channel, url, downloaded_at) VALUES (?, ?, ?, ?)",
+                [(e.get("title") or "Unknown Title", e.get("channel") or "Unknown Channel", e["url"], e.get("downloaded_at") or now)
+                 for e in entries]
+            )
+        self._notify(RESET)
+
+    def delete(self, ids):
+        ids = list(ids)
+        if not ids:
+            return
+        with self.lock, self.conn:
+            self.conn.executemany("DELETE FROM history WHERE id = ?", [(i,) for i in ids])
+
+    def clear(self):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM history")
+        self._notify(RESET)
+
+    def _query(self, sql, params=()):
+        with self.lock:
+            return [dict(row) for row in self.conn.execute(sql, params).fetchall()]
+
+    def entries(self):
+        return self._query("SELECT id, title, channel, url, downloaded_at FROM history ORDER BY id")
+
+    def _where(self, text):
+        if not text:
+            return "", ()
+        if self.fts:
+            query = build_search_query(text)
+            if query is None:
+                return "", ()
+            return " WHERE id IN (SELECT rowid FROM history_fts WHERE history_fts MATCH ?)", (query,)
+        pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        clause = " WHERE title LIKE ? ESCAPE '\\' OR channel LIKE ? ESCAPE '\\' OR url LIKE ? ESCAPE '\\'"
+        return clause, (pattern, pattern, pattern)
+
+    def page(self, offset, limit, order_by=None, descending=False, text=""):
+        """One window of the history, sorted by a column or by insertion order."""
+        where, params = self._where(text)
+        direction = "DESC" if descending else "ASC"
+        if order_by in SORT_COLUMNS:
+            order = f"{order_by} COLLATE NOCASE {direction}, id {direction}"
+        else:
+            order = f"id {direction}"
+        return self._query(
+            f"SELECT id, title, channel, url, downloaded_at FROM history{where} ORDER BY {order} LIMIT ? OFFSET ?",
+            params + (limit, offset)
+        )
+
+    def since(self, last_id):
+        return self._query("SELECT id, title, channel, url, downloaded_at FROM history WHERE id > ? ORDER BY id", (last_id,))
+
+    def last_id(self):
+        with self.lock:
+            return self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM history").fetchone()[0]
+
+    def find_by_url(self, url):
+        return self._query("SELECT id, title, channel, url, downloaded_at FROM history WHERE url = ? ORDER BY id", (url,))
+
+    def between(self, start, end):
+        return self._query(
+            "SELECT id, title, channel, url, downloaded_at FROM history WHERE downloaded_at >= ? AND downloaded_at < ? ORDER BY downloaded_at",
+            (start, end)
+        )
+
+    def count(self, text=""):
+        where, params = self._where(text)
+        with self.lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM history{where}", params).fetchone()[0]
+
+    def export(self, file_path):
+        history = [{"title": e["title"], "channel": e["channel"], "url": e["url"]} for e in self.entries()]
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(history, f, indent=4, ensure_ascii=False)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_history_store():
+    # Resolved per call, so the store follows the current data directory.
+    data_dir = utils.get_data_dir()
+    with _stores_lock:
+        store = _stores.get(data_dir)
+        if store is None:
+            store = HistoryStore(data_dir)
+            _stores[data_dir] = store
+        return store
@@ -0,0 +1,103 @@
+import os
+import threading
+from core.extraction_cache import video_key_from_url
+from core.library_index import format_profile
+
+
+def flight_key(task):
+    """Jobs with the same key would write the same file; None for playlists.
+
+    Taken on the GUI thread at submit, so links other than YouTube's are
+    compared as links rather than resolved through yt-dlp's extractors.
+    """
+    if task.playlist:
+        return None
+    return (video_key_from_url(task.url, extractors=False), format_profile(task), os.path.abspath(task.folder))
+
+
+class FlightSignal:
+    """Row signal of a leading job that also reports to the jobs attached to it."""
+    def __init__(self, flight, signal, kind):
+        self.flight = flight
+        self.signal = signal
+        self.kind = kind
+
+    def emit(self, row, value):
+        self.signal.emit(row, value)
+        self.flight.report(self.kind, value)
+
+
+class Flight:
+    """One download in the air, and the duplicate submissions waiting on it.
+
+    The leading job reports through progress_signal and status_signal; every
+    report is repeated to the followers, and a follower that attaches late
+    first gets the latest progress and status. When the leader lands each
+    follower's on_done callback runs.
+    """
+    def __init__(self, key, progress_signal, status_signal):
+        self.key = key
+        self.progress_signal = FlightSignal(self, progress_signal, "progress")
+        self.status_signal = FlightSignal(self, status_signal, "status")
+        self.followers = []
+        self.last = {}
+        self.landed = False
+        self.lock = threading.Lock()
+
+    def attach(self, row, progress_signal, status_signal, on_done=None):
+        with self.lock:
+            if self.landed:
+                return False
+            self.followers.append((row, progress_signal, status_signal, on_done))
+            last = dict(self.last)
+        if "progress" in last:
+            progress_signal.emit(row, last["progress"])
+        if "status" in last:
+            status_signal.emit(row, last["status"])
+        return True
+
+    def report(self, kind, value):
+        with self.lock:
+            self.last[kind] = value
+            followers = list(self.followers)
+        for row, progress_signal, status_signal, _ in followers:
+            (progress_signal if kind == "progress" else status_signal).emit(row, value)
+
+    def land(self):
+        with self.lock:
+            self.landed = True
+            followers, self.followers = self.followers, []
+        for _, _, _, on_done in followers:
+            if on_done is not None:
+                on_done()
+
+
+class FlightRegistry:
+    """In-flight downloads by flight_key; used from the GUI and the pool threads."""
+    def __init__(self):
+        self.flights = {}
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        with self.lock:
+            return len(self.flights)
+
+    def join_or_lead(self, key, row, progress_signal, status_signal, on_done=None):
+        """Attach to the flight of key, or start one.
+
+        Returns (flight, leading). A leader has to report through the flight's
+        signals and land() it once it is done.
+        """
+        with self.lock:
+            flight = self.flights.get(key)
+            if flight is not None and flight.attach(row, progress_signal, status_signal, on_done):
+                return flight, False
+            flight = Flight(key, progress_signal, status_signal)
+            self.flights[key] = flight
+            return flight, True
+
+    def land(self, flight):
+        with self.lock:
+            if self.flights.get(flight.key) is flight:
+                del self.flights[flight.key]
+        flight.land()
@@ -0,0 +1,132 @@
+import os
+import json
+import time
+import uuid
+import threading
+from core import utils
+
+JOURNAL_FILE_NAME = "queue_journal.jsonl"
+# A job in one of these states is not restored on the next start.
+FINISHED_STATES = ("completed", "failed", "cancelled")
+
+
+class JobJournal:
+    """Append-only record of the download queue.
+
+    Every line is one event: a job was added with its task options, changed
+    state, or started writing a partial file. Lines are flushed to disk as they
+    are written, so after a crash at most the event being written is lost; a
+    torn last line is skipped when the journal is read back.
+
+    Only restore() reads the file. It runs once at startup in the GUI process
+    and compacts the journal down to the unfinished jobs. Worker processes
+    only append.
+    """
+    def __init__(self, data_dir):
+        self.path = os.path.join(data_dir, JOURNAL_FILE_NAME)
+        self.lock = threading.Lock()
+        self.file = None
+
+    def _append(self, record):
+        record["at"] = time.time()
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self.lock:
+            try:
+                if self.file is None:
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                    self.file = open(self.path, "a", encoding="utf-8")
+                self.file.write(line)
+                self.file.flush()
+                os.fsync(self.file.fileno())
+            except OSError as e:
+                print(f"Warning: Could not write queue journal: {e}")
+
+    def add(self, task, title="", channel="", kind=""):
+        task.job_id = uuid.uuid4().hex
+        self._append({
+            "op": "add",
+            "id": task.job_id,
+            "task": task.to_dict(),
+            "title": title,
+            "channel": channel,
+            "kind": kind
+        })
+        return task.job_id
+
+    def update(self, job_id, state):
+        self._append({"op": "state", "id": job_id, "state": state})
+
+    def set_priority(self, job_id, priority):
+        self._append({"op": "priority", "id": job_id, "priority": priority})
+
+    def record_part(self, job_id, path):
+        self._append({"op": "part", "id": job_id, "path": path})
+
+    def finish(self, job_id, state="completed"):
+        self.update(job_id, state)
+
+    def _replay(self):
+        jobs = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    job_id = record.get("id")
+                    if record.get("op") == "add":
+                        jobs[job_id] = {
+                            "id": job_id,
+                            "task": record.get("task") or {},
+                            "title": record.get("title", ""),
+                            "channel": record.get("channel", ""),
+                            "kind": record.get("kind", ""),
+                            "state": record.get("state", "queued"),
+                            "parts": record.get("parts", [])
+                        }
+                    elif job_id in jobs:
+                        if record.get("op") == "state":
+                            jobs[job_id]["state"] = record.get("state")
+                        elif record.get("op") == "priority":
+                            jobs[job_id]["task"]["priority"] = record.get("priority", 0)
+                        elif record.get("op") == "part" and record.get("path") not in jobs[job_id]["parts"]:
+                            jobs[job_id]["parts"].append(record.get("path"))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Warning: Could not read queue journal: {e}")
+        return jobs
+
+    def restore(self):
+        """Unfinished jobs in the order they were added; the journal keeps only these."""
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+            jobs = [job for job in self._replay().values() if job["state"] not in FINISHED_STATES]
+            tmp_path = self.path + ".tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    for job in jobs:
+                        f.write(json.dumps(dict(job, op="add", at=time.time()), ensure_ascii=False) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"Warning: Could not compact queue journal: {e}")
+        return jobs
+
+
+_journals = {}
+_journals_lock = threading.Lock()
+
+
+def get_job_journal():
+    data_dir = utils.get_data_dir()
+    with _journals_lock:
+        journal = _journals.get(data_dir)
+        if journal is None:
+            journal = JobJournal(data_dir)
+            _journals[data_dir] = journal
+        return journal
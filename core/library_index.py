@@ -0,0 +1,200 @@
+import os
+import re
+import sqlite3
+import threading
+from PySide6.QtCore import QRunnable
+from core import utils
+
+LIBRARY_FILE_NAME = "library.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS library (
+    video_key TEXT NOT NULL,
+    profile TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    PRIMARY KEY (video_key, profile)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_library_path ON library(path);
+CREATE TABLE IF NOT EXISTS scanned_dirs (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+AUDIO_EXTENSIONS = ("mp3", "m4a", "aac", "opus", "flac", "wav", "ogg")
+VIDEO_EXTENSIONS = ("mp4", "mkv", "webm", "mov", "avi", "flv")
+# Files saved with yt-dlp's default template, "Title [id].ext", carry their
+# YouTube id, which is how files from outside the app are recognised.
+_ID_IN_NAME_RE = re.compile(r"\[([0-9A-Za-z_-]{11})\]\.(\w+)$")
+# Resolution of a file found by a scan is unknown, it matches any.
+ANY_RESOLUTION = "*"
+
+
+def format_profile(task):
+    """What a task turns a video into; the same video in another profile is a different output."""
+    if task.audio_only:
+        return f"audio:{(task.audio_format or 'mp3').lower()}"
+    return f"video:{task.resolution}:{(task.output_format or 'mp4').lower()}"
+
+
+def _matching_profiles(profile):
+    kind, _, rest = profile.partition(":")
+    if kind == "video":
+        resolution, _, ext = rest.partition(":")
+        return (profile, f"video:{ANY_RESOLUTION}:{ext}")
+    return (profile,)
+
+
+def entry_from_file_name(name):
+    """(video_key, profile) for a file name that carries a video id, or None."""
+    match = _ID_IN_NAME_RE.search(name)
+    if not match:
+        return None
+    video_id, ext = match.group(1), match.group(2).lower()
+    if ext in AUDIO_EXTENSIONS:
+        return f"Youtube:{video_id}", f"audio:{ext}"
+    if ext in VIDEO_EXTENSIONS:
+        return f"Youtube:{video_id}", f"video:{ANY_RESOLUTION}:{ext}"
+    return None
+
+
+class LibraryIndex:
+    """Completed downloads on disk, by video and format profile.
+
+    Video keys are the ones the extraction cache uses (extractor:id), so a URL
+    can be looked up before anything is extracted. A lookup is one primary
+    key read and one stat of the file; entries whose file is gone or changed
+    size are dropped on the spot.
+
+    rescan() picks up changes made outside the app. Indexed files are stat'ed,
+    but directories are only listed again when their mtime moved since the
+    previous scan, which is when files were added to or removed from them.
+    """
+    def __init__(self, data_dir):
+        os.makedirs(data_dir, exist_ok=True)
+        self.db_path = os.path.join(data_dir, LIBRARY_FILE_NAME)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(SCHEMA)
+
+    def record(self, video_key, profile, path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO library (video_key, profile, path, size, mtime) VALUES (?, ?, ?, ?, ?)",
+                              (video_key, profile, os.path.abspath(path), st.st_size, st.st_mtime))
+        return True
+
+    def lookup(self, video_key, profile):
+        """Path of a downloaded copy that is still on disk, or None."""
+        if not video_key:
+            return None
+        profiles = _matching_profiles(profile)
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT profile, path, size FROM library WHERE video_key = ? AND profile IN ({','.join('?' * len(profiles))})",
+                (video_key,) + profiles).fetchall()
+        for row_profile, path, size in rows:
+            try:
+                if os.stat(path).st_size == size:
+                    return path
+            except OSError:
+                pass
+            self.forget(video_key, row_profile)
+        return None
+
+    def forget(self, video_key, profile):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM library WHERE video_key = ? AND profile = ?", (video_key, profile))
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM library").fetchone()[0]
+
+    def rescan(self, root):
+        """Bring the index in line with the disk; returns (added, removed)."""
+        with self.lock:
+            rows = self.conn.execute("SELECT video_key, profile, path, size FROM library").fetchall()
+            scanned = dict(self.conn.execute("SELECT path, mtime FROM scanned_dirs").fetchall())
+        known_paths = set()
+        stale = []
+        for video_key, profile, path, size in rows:
+            try:
+                if os.stat(path).st_size == size:
+                    known_paths.add(path)
+                    continue
+            except OSError:
+                pass
+            stale.append((video_key, profile))
+
+        added = []
+        seen_dirs = []
+        for dirpath, dirnames, filenames in os.walk(os.path.abspath(root)):
+            try:
+                dir_mtime = os.stat(dirpath).st_mtime
+            except OSError:
+                continue
+            seen_dirs.append((dirpath, dir_mtime))
+            if scanned.get(dirpath) == dir_mtime:
+                continue
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                entry = entry_from_file_name(name)
+                if entry is None or path in known_paths:
+                    continue
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                added.append(entry + (path, st.st_size, st.st_mtime))
+
+        with self.lock, self.conn:
+            self.conn.executemany("DELETE FROM library WHERE video_key = ? AND profile = ?", stale)
+            # A copy the app recorded itself is kept over one found by name.
+            self.conn.executemany("INSERT OR IGNORE INTO library (video_key, profile, path, size, mtime) VALUES (?, ?, ?, ?, ?)", added)
+            self.conn.executemany("INSERT OR REPLACE INTO scanned_dirs (path, mtime) VALUES (?, ?)", seen_dirs)
+        return len(added), len(stale)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class LibraryScanner(QRunnable):
+    """Rescans the download folder off the GUI thread."""
+    def __init__(self, root, log_signal=None):
+        super().__init__()
+        self.root = root
+        self.log_signal = log_signal
+
+    def run(self):
+        if not self.root or not os.path.isdir(self.root):
+            return
+        try:
+            added, removed = get_library_index().rescan(self.root)
+        except (OSError, sqlite3.Error) as e:
+            print(f"Warning: Could not scan the download folder: {e}")
+            return
+        if (added or removed) and self.log_signal is not None:
+            self.log_signal.emit(f"Library index: {added} files found, {removed} gone since the last scan")
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_library_index():
+    data_dir = utils.get_data_dir()
+    with _indexes_lock:
+        index = _indexes.get(data_dir)
+        if index is None:
+            index = LibraryIndex(data_dir)
+            _indexes[data_dir] = index
+        return index
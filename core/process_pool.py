@@ -0,0 +1,201 @@
+import os
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from PySide6.QtCore import QRunnable
+from core.downloader import DownloadQueueWorker
+from core.bandwidth import RemoteBandwidthShare, get_bandwidth_limiter
+
+# Upper bound of worker processes, the dispatcher decides how many jobs run.
+PROCESS_POOL_SIZE = max(10, os.cpu_count() or 1)
+PROGRESS_INTERVAL = 0.05
+# A worker process checks the cancel event this often while yt-dlp or ffmpeg
+# is busy, so a transcode stops without waiting for the next progress hook.
+CANCEL_POLL_SECONDS = 0.5
+
+
+class QueueSignal:
+    """Stands in for a row signal inside a worker process and sends every emit over the event queue."""
+    def __init__(self, events, job_id, name, min_interval=0):
+        self.events = events
+        self.job_id = job_id
+        self.name = name
+        self.min_interval = min_interval
+        self.last_sent = 0
+
+    def emit(self, *args):
+        if self.min_interval:
+            # Progress is only sampled by the UI, intermediate values are not sent.
+            now = time.monotonic()
+            if now - self.last_sent < self.min_interval:
+                return
+            self.last_sent = now
+        self.events.put((self.job_id, self.name, args))
+
+
+class ProcessDownloadWorker(DownloadQueueWorker):
+    # The cancel flag lives in the GUI process, the worker reads it through a
+    # manager Event; its bandwidth share is set there too.
+    def __init__(self, cancel_event, rate_value, *args, **kwargs):
+        self.cancel_event = cancel_event
+        self.rate_value = rate_value
+        super().__init__(*args, **kwargs)
+
+    def open_bandwidth_share(self):
+        if self.rate_value is None:
+            return super().open_bandwidth_share()
+        return RemoteBandwidthShare(self.rate_value)
+
+    @property
+    def cancel(self):
+        return self.token.cancelled or self.cancel_event.is_set()
+
+    @cancel.setter
+    def cancel(self, value):
+        if value:
+            self.cancel_event.set()
+            self.token.cancel()
+
+    def run(self):
+        done = threading.Event()
+
+        def watch_cancel():
+            while not done.is_set():
+                try:
+                    if self.cancel_event.wait(CANCEL_POLL_SECONDS):
+                        self.token.cancel()
+                        return
+                except (EOFError, OSError):
+                    return
+
+        watcher = threading.Thread(target=watch_cancel, daemon=True)
+        watcher.start()
+        try:
+            super().run()
+        finally:
+            done.set()
+
+
+def run_download_job(job_id, task, row, user_profile, events, cancel_event, rate_value=None):
+    worker = ProcessDownloadWorker(
+        cancel_event, rate_value, task, row,
+        QueueSignal(events, job_id, "progress", min_interval=PROGRESS_INTERVAL),
+        QueueSignal(events, job_id, "status"),
+        QueueSignal(events, job_id, "log"),
+        QueueSignal(events, job_id, "info"),
+        user_profile
+    )
+    worker.run()
+
+
+class ProcessPoolRunner:
+    """Runs download jobs in a pool of worker processes.
+
+    Extraction, signature deciphering and format sorting are pure Python, in
+    separate processes they no longer compete with each other and with the Qt
+    event loop for the GIL. Workers send their row signals back over a single
+    manager queue; a relay thread re-emits them into the real signals.
+    """
+    def __init__(self, max_workers=PROCESS_POOL_SIZE):
+        context = multiprocessing.get_context("spawn")
+        self.manager = context.Manager()
+        self.events = self.manager.Queue()
+        self.executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+        self.jobs = {}
+        self.next_id = 0
+        self.lock = threading.Lock()
+        self.relay_thread = threading.Thread(target=self._relay, daemon=True)
+        self.relay_thread.start()
+
+    def _relay(self):
+        while True:
+            try:
+                item = self.events.get()
+            except (EOFError, OSError):
+                return
+            if item is None:
+                return
+            job_id, name, args = item
+            with self.lock:
+                if name is None:
+                    self.jobs.pop(job_id, None)
+                    continue
+                signals = self.jobs.get(job_id)
+            if signals and signals.get(name) is not None:
+                signals[name].emit(*args)
+
+    def create_cancel_event(self):
+        return self.manager.Event()
+
+    def create_rate_value(self):
+        # Bytes per second, 0 for unlimited.
+        return self.manager.Value("d", 0.0)
+
+    def run(self, task, row, signals, user_profile, cancel_event, rate_value=None):
+        """Run one job and block until its process is done."""
+        with self.lock:
+            job_id = self.next_id
+            self.next_id += 1
+            self.jobs[job_id] = signals
+        try:
+            future = self.executor.submit(run_download_job, job_id, task, row, user_profile, self.events, cancel_event, rate_value)
+            future.result()
+        finally:
+            # Events of the job may still be queued, the relay forgets the
+            # job only once it reaches this marker.
+            self.events.put((job_id, None, ()))
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        try:
+            self.events.put(None)
+            self.manager.shutdown()
+        except (EOFError, OSError):
+            pass
+
+
+class ProcessJobWorker(QRunnable):
+    """Transfer slot of a job that runs all its stages in a worker process."""
+    def __init__(self, runner, task, row, progress_signal, status_signal, log_signal, info_signal=None, user_profile=None, dispatcher=None):
+        super().__init__()
+        self.runner = runner
+        self.task = task
+        self.row = row
+        self.progress_signal = progress_signal
+        self.status_signal = status_signal
+        self.log_signal = log_signal
+        self.info_signal = info_signal
+        self.user_profile = user_profile
+        self.dispatcher = dispatcher
+        self.cancel_event = runner.create_cancel_event()
+
+    @property
+    def cancel(self):
+        return self.cancel_event.is_set()
+
+    @cancel.setter
+    def cancel(self, value):
+        if value:
+            self.cancel_event.set()
+
+    def run(self):
+        signals = {
+            "progress": self.progress_signal,
+            "status": self.status_signal,
+            "log": self.log_signal,
+            "info": self.info_signal
+        }
+        # The job's share of the bandwidth is held here and passed on to the
+        # process, which throttles itself against it.
+        rate_value = self.runner.create_rate_value()
+        share = get_bandwidth_limiter().open_share(on_rate=lambda rate: setattr(rate_value, "value", rate or 0.0))
+        try:
+            self.runner.run(self.task, self.row, signals, self.user_profile, self.cancel_event, rate_value)
+        except Exception as e:
+            self.status_signal.emit(self.row, "Download Error")
+            self.log_signal.emit(f"Worker process failed: {type(e).__name__}: {str(e)}")
+        finally:
+            get_bandwidth_limiter().close_share(share)
+            if self.dispatcher is not None:
+                self.dispatcher.stage_finished(self, None)
@@ -3,6 +3,10 @@ import json
 import shutil
 from core.utils import get_data_dir, get_images_dir
 
+# Downloads allowed per host at once, "*" is every host without its own entry.
+# No host is limited until the user sets one in the settings.
+DEFAULT_HOST_LIMITS = {}
+
 class UserProfile:
     def __init__(self, profile_path="user_profile.json"):
         self.data_dir = get_data_dir()
@@ -21,7 +25,13 @@ class UserProfile:
             "audio_format": "mp3",
             "audio_quality": "320",
             "preserve_quality": True,
-            "geo_bypass_country": "US"
+            "geo_bypass_country": "US",
+            "process_mode": False,
+            "host_limits": dict(DEFAULT_HOST_LIMITS),
+            "bandwidth_limit": 0,
+            "job_bandwidth_limit": 0,
+            "time_windows": [],
+            "auto_concurrency": False
         }
         self.load_profile()
 
@@ -38,6 +48,18 @@ class UserProfile:
                         self.data["preserve_quality"] = True
                     if "geo_bypass_country" not in self.data:
                         self.data["geo_bypass_country"] = "US"
+                    if "process_mode" not in self.data:
+                        self.data["process_mode"] = False
+                    if "host_limits" not in self.data:
+                        self.data["host_limits"] = dict(DEFAULT_HOST_LIMITS)
+                    if "bandwidth_limit" not in self.data:
+                        self.data["bandwidth_limit"] = 0
+                    if "job_bandwidth_limit" not in self.data:
+                        self.data["job_bandwidth_limit"] = 0
+                    if "time_windows" not in self.data:
+                        self.data["time_windows"] = []
+                    if "auto_concurrency" not in self.data:
+                        self.data["auto_concurrency"] = False
                     self.save_profile()
                 except json.JSONDecodeError as e:
                     print(f"Warning: Profile file corrupted, creating new one. Error: {e}")
@@ -169,6 +191,56 @@ class UserProfile:
         self.data["geo_bypass_country"] = country
         self.save_profile()
 
+    def get_process_mode(self):
+        return self.data.get("process_mode", False)
+
+    def set_process_mode(self, enabled):
+        self.data["process_mode"] = enabled
+        self.save_profile()
+
+    def get_host_limits(self):
+        return self.data.get("host_limits", dict(DEFAULT_HOST_LIMITS))
+
+    def set_host_limit(self, host, limit):
+        # A limit of 0 or None leaves the host to the global limit.
+        limits = dict(self.get_host_limits())
+        if limit:
+            limits[host] = int(limit)
+        else:
+            limits.pop(host, None)
+        self.data["host_limits"] = limits
+        self.save_profile()
+
+    # Bandwidth limits are in bytes per second, 0 is unlimited.
+    def get_bandwidth_limit(self):
+        return self.data.get("bandwidth_limit", 0)
+
+    def set_bandwidth_limit(self, limit):
+        self.data["bandwidth_limit"] = int(limit or 0)
+        self.save_profile()
+
+    def get_job_bandwidth_limit(self):
+        return self.data.get("job_bandwidth_limit", 0)
+
+    def set_job_bandwidth_limit(self, limit):
+        self.data["job_bandwidth_limit"] = int(limit or 0)
+        self.save_profile()
+
+    def get_time_windows(self):
+        # Dicts of TimeWindow.to_dict().
+        return self.data.get("time_windows", [])
+
+    def set_time_windows(self, windows):
+        self.data["time_windows"] = list(windows)
+        self.save_profile()
+
+    def get_auto_concurrency(self):
+        return self.data.get("auto_concurrency", False)
+
+    def set_auto_concurrency(self, enabled):
+        self.data["auto_concurrency"] = bool(enabled)
+        self.save_profile()
+
     def get_available_geo_bypass_countries(self):
         return {
             "US": "United States",
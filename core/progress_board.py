@@ -0,0 +1,32 @@
+import threading
+
+
+class ProgressBoard:
+    """Latest download progress per queue row.
+
+    Workers write into it from their threads and the UI reads it on a timer, so
+    a fast transfer overwrites its own record instead of queueing one event per
+    chunk. emit() has the signature of the row progress signals it replaces,
+    which lets workers, playlist aggregation and the process relay write to it
+    unchanged.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latest = {}
+
+    def emit(self, row, percent):
+        with self.lock:
+            self.latest[row] = percent
+
+    def take(self):
+        """Rows updated since the last call, with their newest value."""
+        with self.lock:
+            changed = self.latest
+            self.latest = {}
+        return changed
+
+    def discard(self, row):
+        # A status replaces the progress text of a row; progress written before
+        # it must not be painted over it afterwards.
+        with self.lock:
+            self.latest.pop(row, None)
@@ -0,0 +1,211 @@
+import os
+import json
+import time
+import heapq
+import uuid
+import threading
+from datetime import datetime, timedelta
+from core import utils
+
+SCHEDULE_FILE_NAME = "schedule.json"
+# minute, hour, day of month, month, day of week (0 or 7 is Sunday)
+CRON_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+# A cron expression that matches nowhere in this many days never matches.
+CRON_SEARCH_DAYS = 366 * 5
+
+
+def _parse_cron_field(field, low, high):
+    values = set()
+    for part in field.split(","):
+        span, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if span == "*":
+            start, end = low, high
+        elif "-" in span:
+            start, end = (int(v) for v in span.split("-", 1))
+        else:
+            start = int(span)
+            end = high if step > 1 else start
+        if step < 1 or start < low or end > high or start > end:
+            raise ValueError(f"Cron field out of range: {field}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+def parse_cron(expr):
+    """Value sets of a five-field cron expression; raises ValueError when it is invalid."""
+    fields = expr.split()
+    if len(fields) != 5:
+        raise ValueError(f"Cron expression needs 5 fields: {expr}")
+    try:
+        minutes, hours, days, months, weekdays = (
+            _parse_cron_field(field, low, high) for field, (low, high) in zip(fields, CRON_RANGES))
+    except ValueError as e:
+        raise ValueError(f"Invalid cron expression {expr!r}: {e}")
+    weekdays = {d % 7 for d in weekdays}
+    # As in cron, when both day fields are restricted either one may match.
+    any_day = fields[2] == "*" or fields[4] == "*"
+    return minutes, hours, days, months, weekdays, any_day
+
+
+def next_cron_time(expr, after):
+    """First minute after the timestamp after that the cron expression matches, in local time."""
+    minutes, hours, days, months, weekdays, any_day = parse_cron(expr)
+    dt = datetime.fromtimestamp(after).replace(second=0, microsecond=0) + timedelta(minutes=1)
+    limit = dt + timedelta(days=CRON_SEARCH_DAYS)
+    while dt < limit:
+        if dt.month not in months:
+            dt = (dt.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            continue
+        day_match = dt.day in days
+        weekday_match = (dt.weekday() + 1) % 7 in weekdays
+        if not ((day_match and weekday_match) if any_day else (day_match or weekday_match)):
+            dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+            continue
+        if dt.hour not in hours:
+            dt = dt.replace(minute=0) + timedelta(hours=1)
+            continue
+        if dt.minute not in minutes:
+            dt += timedelta(minutes=1)
+            continue
+        return dt.timestamp()
+    raise ValueError(f"Cron expression never matches: {expr}")
+
+
+def next_run(repeat, due, now):
+    """Next due time of a recurring entry that was due at due; runs missed before now are skipped.
+
+    repeat is an interval in seconds or a cron expression.
+    """
+    if isinstance(repeat, str):
+        return next_cron_time(repeat, max(due, now))
+    missed = max(0, int((now - due) // repeat))
+    return due + (missed + 1) * repeat
+
+
+class DownloadSchedule:
+    """Planned downloads, kept on disk and ordered by due time.
+
+    A min-heap of (due, id) gives the next due entry without looking at the
+    others. Removed or started entries stay in the heap until they reach the
+    top and are skipped there, so removing is O(1) apart from the save.
+
+    An entry with a repeat (seconds or a cron expression) is a subscription:
+    taking it moves it to its next due time instead of marking it started.
+    """
+    def __init__(self, data_dir):
+        self.path = os.path.join(data_dir, SCHEDULE_FILE_NAME)
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.heap = []
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not read schedule: {e}")
+            return
+        for entry in entries:
+            self.entries[entry["id"]] = entry
+            if entry.get("status") == "Scheduled":
+                heapq.heappush(self.heap, (entry["due"], entry["id"]))
+
+    def _save(self):
+        tmp_path = self.path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(list(self.entries.values()), f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Warning: Could not save schedule: {e}")
+
+    def add(self, due, url, download_type="Video", resolution="720p", subtitles=False, playlist=False, repeat=None):
+        if isinstance(repeat, str):
+            parse_cron(repeat)
+        elif repeat is not None and repeat <= 0:
+            raise ValueError("Repeat interval must be positive")
+        entry = {
+            "id": uuid.uuid4().hex,
+            "due": float(due),
+            "url": url,
+            "type": download_type,
+            "resolution": resolution,
+            "subtitles": bool(subtitles),
+            "playlist": bool(playlist),
+            "repeat": repeat,
+            "status": "Scheduled"
+        }
+        with self.lock:
+            self.entries[entry["id"]] = entry
+            heapq.heappush(self.heap, (entry["due"], entry["id"]))
+            self._save()
+        return entry
+
+    def remove(self, entry_ids):
+        with self.lock:
+            for entry_id in entry_ids:
+                self.entries.pop(entry_id, None)
+            self._save()
+
+    def all(self):
+        with self.lock:
+            return sorted(self.entries.values(), key=lambda e: e["due"])
+
+    def get(self, entry_id):
+        with self.lock:
+            entry = self.entries.get(entry_id)
+            return dict(entry) if entry is not None else None
+
+    def _drop_stale(self):
+        while self.heap:
+            due, entry_id = self.heap[0]
+            entry = self.entries.get(entry_id)
+            if entry is not None and entry["status"] == "Scheduled" and entry["due"] == due:
+                return
+            heapq.heappop(self.heap)
+
+    def next_due(self):
+        """Due time of the next scheduled entry, or None."""
+        with self.lock:
+            self._drop_stale()
+            return self.heap[0][0] if self.heap else None
+
+    def take_due(self, now=None):
+        """Entries due by now; one-off entries are marked as started, recurring ones rescheduled."""
+        now = time.time() if now is None else now
+        due = []
+        with self.lock:
+            self._drop_stale()
+            while self.heap and self.heap[0][0] <= now:
+                _, entry_id = heapq.heappop(self.heap)
+                entry = self.entries[entry_id]
+                due.append(dict(entry, status="Started"))
+                if entry.get("repeat"):
+                    entry["last_run"] = now
+                    entry["due"] = next_run(entry["repeat"], entry["due"], now)
+                    heapq.heappush(self.heap, (entry["due"], entry_id))
+                else:
+                    entry["status"] = "Started"
+                self._drop_stale()
+            if due:
+                self._save()
+        return due
+
+
+_schedules = {}
+_schedules_lock = threading.Lock()
+
+
+def get_download_schedule():
+    data_dir = utils.get_data_dir()
+    with _schedules_lock:
+        schedule = _schedules.get(data_dir)
+        if schedule is None:
+            schedule = DownloadSchedule(data_dir)
+            _schedules[data_dir] = schedule
+        return schedule
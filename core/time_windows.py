@@ -0,0 +1,145 @@
+from datetime import datetime, timedelta
+from PySide6.QtCore import QObject, QTimer, Qt
+
+# The timer is never armed further ahead than this, so a clock change or a
+# suspended machine moves a boundary by at most this long.
+MAX_TIMER_MS = 60 * 60 * 1000
+
+
+def parse_time(text):
+    """Minutes after midnight of "HH:MM"; raises ValueError."""
+    hours, _, minutes = (text or "").strip().partition(":")
+    hours, minutes = int(hours), int(minutes or 0)
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValueError(f"Invalid time of day: {text}")
+    return hours * 60 + minutes
+
+
+def format_time_of_day(minute):
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+class TimeWindow:
+    """Limits that apply between two times of day, every day.
+
+    A window whose end is before its start runs over midnight; one that ends
+    where it starts covers the whole day. A limit of None leaves the normal
+    setting in place, a bandwidth of 0 is unlimited.
+    """
+    def __init__(self, start, end, max_concurrent=None, bandwidth=None):
+        self.start = parse_time(start) if isinstance(start, str) else start
+        self.end = parse_time(end) if isinstance(end, str) else end
+        self.max_concurrent = max_concurrent
+        self.bandwidth = bandwidth
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["start"], data["end"], data.get("max_concurrent"), data.get("bandwidth"))
+
+    def to_dict(self):
+        return {
+            "start": format_time_of_day(self.start),
+            "end": format_time_of_day(self.end),
+            "max_concurrent": self.max_concurrent,
+            "bandwidth": self.bandwidth
+        }
+
+    def contains(self, minute):
+        if self.start == self.end:
+            return True
+        if self.start < self.end:
+            return self.start <= minute < self.end
+        return minute >= self.start or minute < self.end
+
+    def label(self):
+        return f"{format_time_of_day(self.start)}-{format_time_of_day(self.end)}"
+
+
+def active_window(windows, when=None):
+    """First window that contains the local time when, or None."""
+    when = when or datetime.now()
+    minute = when.hour * 60 + when.minute
+    return next((window for window in windows if window.contains(minute)), None)
+
+
+def next_boundary(windows, when=None):
+    """Next local datetime at which a window starts or ends, or None."""
+    when = when or datetime.now()
+    midnight = when.replace(hour=0, minute=0, second=0, microsecond=0)
+    boundaries = []
+    for window in windows:
+        for minute in (window.start, window.end):
+            at = midnight + timedelta(minutes=minute)
+            if at <= when:
+                at += timedelta(days=1)
+            boundaries.append(at)
+    return min(boundaries) if boundaries else None
+
+
+class WindowPolicy(QObject):
+    """Applies the time windows to the dispatcher and the bandwidth limiter.
+
+    Outside every window the normal settings (the base) apply. At each window
+    boundary the limits are switched over, and running downloads move with
+    them: the bandwidth split changes right away and transfers above a
+    lowered slot count are queued again to resume later.
+    """
+    def __init__(self, dispatcher, limiter, windows=None, max_concurrent=3, bandwidth=0, log=None, parent=None):
+        super().__init__(parent)
+        self.dispatcher = dispatcher
+        self.limiter = limiter
+        self.windows = list(windows or [])
+        self.base_concurrent = max_concurrent
+        self.base_bandwidth = bandwidth
+        self.log = log
+        # AdaptiveConcurrency; in auto mode the slot limit is its ceiling.
+        self.adaptive = None
+        self.current = None
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self.apply)
+
+    def set_windows(self, windows):
+        self.windows = list(windows)
+        self.apply()
+
+    def set_base(self, max_concurrent=None, bandwidth=None):
+        if max_concurrent is not None:
+            self.base_concurrent = max_concurrent
+        if bandwidth is not None:
+            self.base_bandwidth = bandwidth
+        self.apply()
+
+    def limits(self, when=None):
+        """(max_concurrent, bandwidth) in effect at when."""
+        window = active_window(self.windows, when)
+        max_concurrent = self.base_concurrent
+        bandwidth = self.base_bandwidth
+        if window is not None and window.max_concurrent:
+            max_concurrent = window.max_concurrent
+        if window is not None and window.bandwidth is not None:
+            bandwidth = window.bandwidth
+        return max_concurrent, bandwidth
+
+    def apply(self):
+        window = active_window(self.windows)
+        max_concurrent, bandwidth = self.limits()
+        if self.adaptive is not None and self.adaptive.enabled:
+            self.adaptive.set_ceiling(max_concurrent)
+        else:
+            self.dispatcher.set_max_concurrent(max_concurrent, preempt=True)
+        self.limiter.configure(total=bandwidth)
+        label = window.label() if window is not None else None
+        if label != self.current and self.log is not None:
+            self.log(f"Time window {label} now applies" if label else "Time windows ended, normal limits apply")
+        self.current = label
+        self.arm_timer()
+
+    def arm_timer(self):
+        boundary = next_boundary(self.windows)
+        if boundary is None:
+            self.timer.stop()
+            return
+        delay_ms = int(max(0, (boundary - datetime.now()).total_seconds()) * 1000)
+        self.timer.start(min(delay_ms, MAX_TIMER_MS))
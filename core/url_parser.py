@@ -0,0 +1,184 @@
+import re
+from urllib.parse import urlsplit, parse_qs
+
+VIDEO_ID_RE = re.compile(r"^[0-9A-Za-z_-]{11}$")
+PLAYLIST_ID_RE = re.compile(r"^[0-9A-Za-z_-]{10,}$")
+# Short ids of the account's own lists (Watch Later, Liked videos, Liked
+# music) and of generated mixes and uploads lists.
+SPECIAL_PLAYLIST_ID_RE = re.compile(r"^(WL|LL|LM|RD[0-9A-Za-z_-]*|UL[0-9A-Za-z_-]*)$")
+CHANNEL_ID_RE = re.compile(r"^UC[0-9A-Za-z_-]{22}$")
+HANDLE_RE = re.compile(r"^@[\w.-]{3,100}$")
+# Paths whose next segment is a video id.
+VIDEO_PATHS = ("shorts", "live", "embed", "v", "e")
+# Legacy channel paths whose next segment is a channel name; the id keeps the
+# path, "user/name" and "c/name" are not the same channel.
+CHANNEL_PATHS = ("c", "user")
+CHANNEL_TABS = ("videos", "shorts", "streams", "playlists", "featured", "podcasts", "releases")
+# Channel tabs, and the channel uploads lists ("UU" + channel id), that
+# YouTube lists newest first.
+UPLOAD_TABS = ("videos", "shorts", "streams")
+UPLOADS_PLAYLIST_PREFIX = "UU"
+
+
+class ParsedUrl:
+    """What a link points at: kind is "video", "playlist", "channel" or "url".
+
+    YouTube links get a canonical id; any other http(s) link is kind "url"
+    and left to yt-dlp.
+    """
+    def __init__(self, kind, id=None, url=None, playlist_id=None, tab=None, invalid_playlist_id=None):
+        self.kind = kind
+        self.id = id
+        self.url = url
+        self.playlist_id = playlist_id
+        self.tab = tab
+        # A list= of a video link that is no playlist id; only an error when
+        # the link is to stand for its playlist.
+        self.invalid_playlist_id = invalid_playlist_id
+
+    def __repr__(self):
+        return f"ParsedUrl({self.kind!r}, {self.id!r})"
+
+    @property
+    def video_key(self):
+        """Key the extraction cache, library and dispatcher use for a video, or None."""
+        return f"Youtube:{self.id}" if self.kind == "video" else None
+
+    def canonical_url(self, playlist=False):
+        """One spelling per target, so the same video always makes the same task.
+
+        With playlist set, a video opened from a playlist stands for the playlist.
+        """
+        if self.kind == "video" and playlist and self.invalid_playlist_id:
+            raise ValueError(f"Invalid playlist id: {self.invalid_playlist_id}")
+        if self.kind == "video" and playlist and self.playlist_id:
+            return f"https://www.youtube.com/playlist?list={self.playlist_id}"
+        if self.kind == "video":
+            return f"https://www.youtube.com/watch?v={self.id}"
+        if self.kind == "playlist":
+            return f"https://www.youtube.com/playlist?list={self.id}"
+        if self.kind == "channel":
+            if self.id.startswith("@"):
+                base = f"https://www.youtube.com/{self.id}"
+            elif CHANNEL_ID_RE.match(self.id):
+                base = f"https://www.youtube.com/channel/{self.id}"
+            else:
+                base = f"https://www.youtube.com/{self.id}"
+            return f"{base}/{self.tab}" if self.tab else base
+        return self.url
+
+
+def is_youtube_host(host):
+    host = (host or "").lower()
+    return host in ("youtu.be", "youtube.com", "youtube-nocookie.com") or host.endswith((".youtube.com", ".youtube-nocookie.com"))
+
+
+def _query_value(query, name):
+    values = query.get(name)
+    return values[0] if values else None
+
+
+def is_playlist_id(value):
+    return bool(value) and bool(PLAYLIST_ID_RE.match(value) or SPECIAL_PLAYLIST_ID_RE.match(value))
+
+
+def _playlist_of(list_id):
+    if list_id is None:
+        return None
+    if not is_playlist_id(list_id):
+        raise ValueError(f"Invalid playlist id: {list_id}")
+    return ParsedUrl("playlist", list_id)
+
+
+def _video_of(video_id, list_id):
+    if list_id is not None and not is_playlist_id(list_id):
+        return ParsedUrl("video", video_id, invalid_playlist_id=list_id)
+    return ParsedUrl("video", video_id, playlist_id=list_id)
+
+
+def _parse_youtube(host, path, query):
+    segments = [s for s in path.split("/") if s]
+    list_id = _query_value(query, "list")
+    if host.lower() == "youtu.be":
+        if len(segments) != 1 or not VIDEO_ID_RE.match(segments[0]):
+            raise ValueError("Invalid youtu.be link")
+        return _video_of(segments[0], list_id)
+    if not segments:
+        raise ValueError("Link points at no video, playlist or channel")
+    first = segments[0]
+    if first == "watch":
+        video_id = _query_value(query, "v")
+        if video_id is None and list_id is not None:
+            return _playlist_of(list_id)
+        if video_id is None or not VIDEO_ID_RE.match(video_id):
+            raise ValueError("Invalid video id in link")
+        return _video_of(video_id, list_id)
+    if first in VIDEO_PATHS:
+        if len(segments) < 2 or not VIDEO_ID_RE.match(segments[1]):
+            raise ValueError("Invalid video id in link")
+        return _video_of(segments[1], list_id)
+    if first == "playlist":
+        if not list_id:
+            raise ValueError("Playlist link without a list id")
+        return _playlist_of(list_id)
+    tab = segments[2] if len(segments) > 2 else None
+    if first.startswith("@"):
+        if not HANDLE_RE.match(first):
+            raise ValueError(f"Invalid channel handle: {first}")
+        tab = segments[1] if len(segments) > 1 else None
+        return ParsedUrl("channel", first, tab=tab if tab in CHANNEL_TABS else None)
+    if first == "channel":
+        if len(segments) < 2 or not CHANNEL_ID_RE.match(segments[1]):
+            raise ValueError("Invalid channel id in link")
+        return ParsedUrl("channel", segments[1], tab=tab if tab in CHANNEL_TABS else None)
+    if first in CHANNEL_PATHS and len(segments) > 1:
+        return ParsedUrl("channel", f"{first}/{segments[1]}", tab=tab if tab in CHANNEL_TABS else None)
+    # Search, feeds and the like are left to yt-dlp.
+    return None
+
+
+def parse_url(text):
+    """Parse a link without yt-dlp; raises ValueError for input that is no downloadable link."""
+    original = (text or "").strip()
+    if not original:
+        raise ValueError("No URL given.")
+    text = original if "://" in original else "https://" + original
+    try:
+        parts = urlsplit(text)
+    except ValueError as e:
+        raise ValueError(f"Invalid URL: {e}")
+    if parts.scheme.lower() not in ("http", "https") or not parts.hostname or " " in text:
+        raise ValueError(f"Not a web link: {original}")
+    if is_youtube_host(parts.hostname):
+        parsed = _parse_youtube(parts.hostname, parts.path, parse_qs(parts.query))
+        if parsed is not None:
+            parsed.url = text
+            return parsed
+    return ParsedUrl("url", url=text)
+
+
+def canonical_url(text, playlist=False):
+    """The link to put in a task; raises ValueError with a message for the user."""
+    return parse_url(text).canonical_url(playlist)
+
+
+def video_key(url):
+    """Video key of a link to a single video, or None when it takes yt-dlp to tell."""
+    try:
+        return parse_url(url).video_key
+    except ValueError:
+        return None
+
+
+def lists_newest_first(url):
+    """Whether a link is to a channel's uploads, which are listed newest first.
+
+    Other playlists are kept in the order their owner put them in.
+    """
+    try:
+        parsed = parse_url(url)
+    except ValueError:
+        return False
+    if parsed.kind == "channel":
+        return parsed.tab in UPLOAD_TABS
+    return parsed.kind == "playlist" and parsed.id.startswith(UPLOADS_PLAYLIST_PREFIX)
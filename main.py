@@ -1,6 +1,7 @@
 import sys
 import os
 import atexit
+import multiprocessing
 import ctypes
 from PySide6.QtWidgets import QApplication
 from PySide6.QtCore import QSharedMemory, QSystemSemaphore, Qt
@@ -97,4 +98,6 @@ def main():
     sys.exit(app.exec())
 
 if __name__ == "__main__":
+    # Download worker processes are spawned from the frozen executable too.
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -26,6 +26,14 @@ def qapp():
     app.processEvents()  
    
 
+@pytest.fixture(scope="session", autouse=True)
+def no_update_check():
+    # MainWindow checks for updates 2s after it is created; without network the
+    # error box would block any later test that processes events.
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr('core.updater.UpdateManager.check_for_updates', lambda self: None)
+        yield
+
 @pytest.fixture
 def temp_data_dir(monkeypatch):
     temp_dir = tempfile.mkdtemp()
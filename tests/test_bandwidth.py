@@ -0,0 +1,38 @@
+import time
+from core.bandwidth import BandwidthLimiter, allocate, MIN_RATE
+
+def test_allocate_is_max_min_fair():
+    inf = float("inf")
+    assert allocate(0, 0, [inf, inf]) == [None, None]
+    assert allocate(0, 100_000, [inf]) == [100_000]
+    assert allocate(300_000, 0, [inf, inf, inf]) == [100_000, 100_000, 100_000]
+    # What a slow job does not use goes to the others.
+    assert allocate(300_000, 0, [50_000, inf, inf]) == [50_000, 125_000, 125_000]
+    assert allocate(300_000, 80_000, [inf, inf]) == [80_000, 80_000]
+    assert allocate(10_000, 0, [inf]) == [MIN_RATE]
+
+def test_shares_are_split_again_when_jobs_come_and_go():
+    limiter = BandwidthLimiter(total=400_000)
+    first = limiter.open_share()
+    assert first.rate == 400_000
+    second = limiter.open_share()
+    assert first.rate == second.rate == 200_000
+    limiter.configure(job_cap=150_000)
+    assert first.rate == 150_000
+    limiter.close_share(second)
+    limiter.configure(total=0, job_cap=0)
+    assert first.rate is None
+
+def test_share_throttles_to_its_rate():
+    limiter = BandwidthLimiter(total=1_000_000)
+    share = limiter.open_share()
+    start = time.monotonic()
+    for _ in range(6):
+        share.throttle(100_000)
+    # 600 KB at 1 MB/s, starting from an empty bucket.
+    assert 0.5 < time.monotonic() - start < 1.0
+
+    cancelled = limiter.open_share()
+    start = time.monotonic()
+    cancelled.throttle(5_000_000, cancelled=lambda: True)
+    assert time.monotonic() - start < 0.1
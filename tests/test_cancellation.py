@@ -0,0 +1,76 @@
+import os
+import sys
+import subprocess
+import pytest
+import yt_dlp
+from core.cancellation import CancelToken, stop_child_processes, remove_partial_files
+from core.downloader import YTLogger
+
+def touch(folder, name):
+    path = os.path.join(folder, name)
+    with open(path, "w") as f:
+        f.write("x")
+    return path
+
+def test_child_token_is_cancelled_with_parent():
+    parent = CancelToken()
+    child = CancelToken(parent=parent)
+    other = CancelToken()
+    parent.cancel()
+    assert child.cancelled and child.event.is_set()
+    assert not other.cancelled
+
+def test_token_finds_files_of_every_format(temp_data_dir):
+    token = CancelToken()
+    token.watch(os.path.join(temp_data_dir, "Clip.f137.mp4"))
+    token.watch(os.path.join(temp_data_dir, "Clip.f140.m4a"))
+    assert len(token.stems) == 1
+    video = touch(temp_data_dir, "Clip.f137.mp4.part")
+    audio = touch(temp_data_dir, "Clip.f140.m4a")
+    merged = touch(temp_data_dir, "Clip.temp.mp4")
+    touch(temp_data_dir, "Other.mp4")
+    touch(temp_data_dir, "Clip.Remix.mp4.part")
+    touch(temp_data_dir, "Clip.Remix.f137.mp4.part-Frag2")
+    assert token.files() == {video, audio, merged}
+
+def test_remove_partial_files(temp_data_dir):
+    done = touch(temp_data_dir, "Clip.webm")
+    part = touch(temp_data_dir, "Clip.f137.mp4.part")
+    fragment = touch(temp_data_dir, "Clip.f137.mp4.part-Frag3")
+    state = touch(temp_data_dir, "Clip.f137.mp4.ytdl")
+    assert remove_partial_files([done, part, fragment, state]) == sorted([part, fragment, state])
+    assert os.path.exists(done)
+    half_written = touch(temp_data_dir, "Clip.mp3")
+    assert remove_partial_files([done, half_written], existing={done}) == [half_written]
+    assert os.path.exists(done)
+
+@pytest.mark.skipif(sys.platform == "win32", reason="uses a symlink named ffmpeg")
+def test_stop_child_processes_stops_only_the_jobs_ffmpeg(temp_data_dir):
+    fake_ffmpeg = os.path.join(temp_data_dir, "ffmpeg")
+    os.symlink(sys.executable, fake_ffmpeg)
+    sleep = "import time; time.sleep(30)"
+    ours = subprocess.Popen([fake_ffmpeg, "-c", sleep, "file:" + os.path.join(temp_data_dir, "Clip.webm")])
+    theirs = subprocess.Popen([fake_ffmpeg, "-c", sleep, "file:" + os.path.join(temp_data_dir, "Clip.Remix.webm")])
+    try:
+        stopped = stop_child_processes([os.path.join(temp_data_dir, "Clip")])
+        assert [proc.pid for proc in stopped] == [ours.pid]
+        assert ours.wait(timeout=5) is not None
+        assert theirs.poll() is None
+    finally:
+        theirs.kill()
+        theirs.wait()
+
+def test_logger_stops_yt_dlp_once_cancelled():
+    class Sink:
+        def __init__(self):
+            self.messages = []
+        def emit(self, message, level=None):
+            self.messages.append(message)
+    token = CancelToken()
+    sink = Sink()
+    logger = YTLogger(sink, lambda: token.cancelled)
+    logger.debug("[youtube:tab] Downloading page 1")
+    token.cancel()
+    with pytest.raises(yt_dlp.utils.DownloadCancelled):
+        logger.debug("[youtube:tab] Downloading page 2")
+    assert sink.messages == ["[yt-dlp Debug] [youtube:tab] Downloading page 1"]
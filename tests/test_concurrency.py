@@ -0,0 +1,69 @@
+from core.concurrency import AimdController, TransferStats, HOLD_SAMPLES, get_transfer_stats
+from core.downloader import YTLogger
+
+MB = 1024 ** 2
+
+def feed(controller, speeds, **kwargs):
+    # The first sample after a change is skipped, feed two.
+    controller.update(speeds, **kwargs)
+    return controller.update(speeds, **kwargs)
+
+def test_controller_grows_while_throughput_grows():
+    controller = AimdController(level=1, maximum=4)
+    assert feed(controller, [2 * MB]) == 2
+    assert feed(controller, [2 * MB, 2 * MB]) == 3
+    assert feed(controller, [2 * MB] * 3) == 4
+    assert feed(controller, [2 * MB] * 4) == 4
+
+def test_controller_gives_back_slot_that_did_not_pay():
+    controller = AimdController(level=2)
+    assert feed(controller, [5 * MB, 5 * MB]) == 3
+    assert feed(controller, [10 * MB / 3] * 3) == 2
+    assert controller.hold == HOLD_SAMPLES
+    for _ in range(HOLD_SAMPLES):
+        assert controller.update([5 * MB, 5 * MB]) == 2
+    # After holding, the next slot is tried again.
+    assert controller.update([5 * MB, 5 * MB]) == 3
+
+def test_controller_backs_off_on_congestion():
+    controller = AimdController(level=8)
+    assert controller.update([MB] * 8, throttled=1) == 4
+    assert controller.cut
+    assert controller.update([MB] * 4, retries=9) == 2
+    slow = [MB, 1024, 1024]
+    assert controller.update(slow) == 1
+    assert controller.update(slow) == 1
+
+def test_controller_holds_when_idle_or_capped():
+    controller = AimdController(level=3, maximum=3)
+    assert feed(controller, [MB], busy=False) == 3
+    assert controller.rates == {}
+    assert feed(controller, [MB] * 3) == 3
+    controller.set_maximum(1)
+    assert controller.level == 1
+
+def test_transfer_stats_counts_retries_and_throttling():
+    stats = TransferStats()
+    stats.observe("[download] Got error: timed out. Retrying (1/10)...")
+    stats.observe("Retrying fragment 12 (2/10)...")
+    stats.observe("ERROR: unable to download video data: HTTP Error 429: Too Many Requests")
+    stats.observe("Requested format is not available")
+    assert stats.take() == (2, 1)
+    assert stats.take() == (0, 0)
+
+def test_logged_retries_make_the_controller_back_off():
+    class Sink:
+        def emit(self, message, level=None):
+            pass
+
+    stats = get_transfer_stats()
+    stats.take()
+    logger = YTLogger(Sink())
+    # yt-dlp reports retries through to_screen, which logs at debug level.
+    logger.debug("[download] Got error: HTTP Error 429: Too Many Requests. Retrying (1/10)...")
+    logger.debug("[download] Downloading fragment 3 of 10")
+    retries, throttled = stats.take()
+    assert throttled == 1
+    controller = AimdController(level=4)
+    assert controller.update([MB] * 4, retries, throttled) == 2
+    assert controller.cut
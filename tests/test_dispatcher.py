@@ -0,0 +1,178 @@
+from PySide6.QtCore import QObject, Signal
+from core.downloader import DownloadTask
+from core.dispatcher import DownloadDispatcher
+
+class StatusCatcher(QObject):
+    progress_signal = Signal(object, float)
+    status_signal = Signal(object, str)
+    log_signal = Signal(str)
+
+    def __init__(self):
+        super().__init__()
+        self.statuses = {}
+        self.status_signal.connect(self.on_status)
+
+    def on_status(self, row, status):
+        self.statuses[row] = status
+
+class IdlePool:
+    def __init__(self):
+        self.started = []
+    def setMaxThreadCount(self, count):
+        self.max_threads = count
+    def start(self, runnable):
+        self.started.append(runnable)
+    def rows(self):
+        return [r.worker.row for r in self.started]
+
+def make_dispatcher(max_concurrent):
+    catcher = StatusCatcher()
+    pools = {"transfer": IdlePool(), "extract": IdlePool(), "post": IdlePool()}
+    dispatcher = DownloadDispatcher(pools["transfer"], catcher.progress_signal, catcher.status_signal, catcher.log_signal,
+                                    max_concurrent=max_concurrent, extract_pool=pools["extract"], postprocess_pool=pools["post"])
+    return dispatcher, pools, catcher
+
+def make_task(temp_data_dir, i):
+    return DownloadTask(f"https://www.youtube.com/watch?v={i:011d}", "720p", temp_data_dir, "")
+
+def finish_extraction(dispatcher, pools, index):
+    dispatcher.stage_finished(pools["extract"].started[index].worker, "transfer")
+
+def test_dispatcher_extracts_one_batch_ahead(temp_data_dir):
+    dispatcher, pools, catcher = make_dispatcher(2)
+    for row in range(5):
+        dispatcher.submit(make_task(temp_data_dir, row), row)
+    assert pools["extract"].rows() == [0, 1]
+    assert pools["transfer"].max_threads == 2
+    assert catcher.statuses == {2: "Queued", 3: "Queued", 4: "Queued"}
+    stats = dispatcher.stats()
+    assert stats["queued"] == 3 and stats["extracting"] == 2 and stats["running"] == 0
+
+def test_dispatcher_limits_transfers(temp_data_dir):
+    dispatcher, pools, catcher = make_dispatcher(2)
+    for row in range(4):
+        dispatcher.submit(make_task(temp_data_dir, row), row)
+    finish_extraction(dispatcher, pools, 0)
+    finish_extraction(dispatcher, pools, 1)
+    assert pools["transfer"].rows() == [0, 1]
+    assert pools["extract"].rows() == [0, 1, 2, 3]
+    finish_extraction(dispatcher, pools, 2)
+    assert pools["transfer"].rows() == [0, 1]
+    assert catcher.statuses[2] == "Queued"
+    assert dispatcher.is_tracked(2)
+
+def test_dispatcher_frees_transfer_slot_before_post_processing(temp_data_dir):
+    dispatcher, pools, catcher = make_dispatcher(1)
+    for row in range(2):
+        dispatcher.submit(make_task(temp_data_dir, row), row)
+    finish_extraction(dispatcher, pools, 0)
+    first = pools["transfer"].started[0].worker
+    finish_extraction(dispatcher, pools, 1)
+    dispatcher.stage_finished(first, "post_process")
+    assert pools["post"].rows() == [0]
+    assert pools["transfer"].rows() == [0, 1]
+    dispatcher.stage_finished(first, None)
+    assert not dispatcher.is_tracked(0)
+
+def test_dispatcher_raising_limit_starts_waiting_jobs(temp_data_dir):
+    dispatcher, pools, catcher = make_dispatcher(1)
+    for row in range(3):
+        dispatcher.submit(make_task(temp_data_dir, row), row)
+    dispatcher.set_max_concurrent(3)
+    assert len(pools["extract"].started) == 3
+    assert dispatcher.queue_depth() == 0
+
+def test_dispatcher_cancel_all(temp_data_dir):
+    dispatcher, pools, catcher = make_dispatcher(1)
+    for row in range(3):
+        dispatcher.submit(make_task(temp_data_dir, row), row)
+    dispatcher.cancel_all()
+    assert pools["extract"].started[0].worker.cancel
+    assert catcher.statuses[1] == "Download Cancelled"
+    assert catcher.statuses[2] == "Download Cancelled"
+    assert dispatcher.queue_depth() == 0
+
+def test_dispatcher_admits_by_priority(temp_data_dir):
+    dispatcher, pools, catcher = make_dispatcher(1)
+    for row in range(4):
+        dispatcher.submit(make_task(temp_data_dir, row), row)
+    dispatcher.set_priority(3, 5)
+    dispatcher.set_priority(2, 1)
+    dispatcher.set_max_concurrent(4)
+    assert pools["extract"].rows() == [0, 3, 2, 1]
+
+def test_dispatcher_caps_jobs_per_host(temp_data_dir):
+    dispatcher, pools, catcher = make_dispatcher(6)
+    dispatcher.set_host_limits({"youtube": 2, "*": 4})
+    for row in range(3):
+        dispatcher.submit(make_task(temp_data_dir, row), row)
+    for row in range(3, 9):
+        dispatcher.submit(DownloadTask(f"https://vimeo.com/{row}", "720p", temp_data_dir, ""), row)
+    # The third YouTube job is passed over for jobs of another host.
+    assert pools["extract"].rows() == [0, 1, 3, 4, 5, 6]
+    assert catcher.statuses[2] == "Queued"
+    dispatcher.stage_finished(pools["extract"].started[0].worker, None)
+    assert pools["extract"].rows()[-1] == 2
+
+def test_dispatcher_coalesces_duplicate_jobs(temp_data_dir):
+    dispatcher, pools, catcher = make_dispatcher(2)
+    assert dispatcher.submit(make_task(temp_data_dir, 7), 0) is not None
+    assert dispatcher.submit(make_task(temp_data_dir, 7), 1) is None
+    assert pools["extract"].rows() == [0]
+
+    leader = pools["extract"].started[0].worker
+    leader.status_signal.emit(0, "Downloading...")
+    assert catcher.statuses == {0: "Downloading...", 1: "Downloading..."}
+    leader.status_signal.emit(0, "Download Completed")
+    dispatcher.stage_finished(leader, None)
+    assert catcher.statuses[1] == "Download Completed"
+    assert len(dispatcher.flights) == 0
+
+    # A different output profile is a different download.
+    audio = make_task(temp_data_dir, 7)
+    audio.audio_only = True
+    dispatcher.submit(make_task(temp_data_dir, 7), 2)
+    dispatcher.submit(audio, 3)
+    assert pools["extract"].rows() == [0, 2, 3]
+
+def test_dispatcher_preempts_transfers_above_lowered_limit(temp_data_dir):
+    dispatcher, pools, catcher = make_dispatcher(2)
+    for row in range(2):
+        dispatcher.submit(make_task(temp_data_dir, row), row)
+    finish_extraction(dispatcher, pools, 0)
+    finish_extraction(dispatcher, pools, 1)
+    first, second = (r.worker for r in pools["transfer"].started)
+    dispatcher.set_max_concurrent(1, preempt=True)
+    assert second.preempted and second.cancel
+    assert not first.preempted
+    second._report_cancelled()
+    dispatcher.stage_finished(second, None)
+    assert catcher.statuses[1] == "Queued"
+    assert pools["extract"].rows() == [0, 1, 1]
+    finish_extraction(dispatcher, pools, 2)
+    assert pools["transfer"].rows() == [0, 1]
+    dispatcher.stage_finished(first, None)
+    assert pools["transfer"].rows() == [0, 1, 1]
+
+def test_dispatcher_pauses_and_resumes_jobs(temp_data_dir):
+    dispatcher, pools, catcher = make_dispatcher(1)
+    for row in range(3):
+        dispatcher.submit(make_task(temp_data_dir, row), row)
+    assert dispatcher.pause(2)
+    assert catcher.statuses[2] == "Paused"
+    finish_extraction(dispatcher, pools, 0)
+    worker = pools["transfer"].started[0].worker
+    assert dispatcher.pause(0)
+    assert worker.cancel and worker.paused
+    worker._report_cancelled()
+    dispatcher.stage_finished(worker, None)
+    assert catcher.statuses[0] == "Paused"
+    assert dispatcher.is_paused(0) and dispatcher.is_tracked(0)
+    finish_extraction(dispatcher, pools, 1)
+    assert pools["transfer"].rows() == [0, 1]
+    assert dispatcher.resume(2)
+    assert pools["extract"].rows() == [0, 1, 2]
+    assert not dispatcher.is_paused(2)
+    dispatcher.cancel_all()
+    assert catcher.statuses[0] == "Download Cancelled"
+    assert not dispatcher.is_tracked(0)
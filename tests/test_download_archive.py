@@ -0,0 +1,16 @@
+from core.download_archive import DownloadArchive, archive_id, get_download_archive
+
+def test_archive_keys_follow_yt_dlp():
+    assert archive_id({"ie_key": "Youtube", "id": "abc"}) == "youtube abc"
+    assert archive_id({"extractor_key": "Vimeo", "id": "1"}) == "vimeo 1"
+    assert archive_id({"url": "https://example.com"}) is None
+
+def test_archive_persists_entries(temp_data_dir):
+    archive = get_download_archive()
+    archive.add("youtube abc")
+    archive.add("youtube abc")
+    assert "youtube abc" in archive
+    assert "youtube def" not in archive
+    assert len(archive) == 1
+
+    assert "youtube abc" in DownloadArchive(temp_data_dir)
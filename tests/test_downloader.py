@@ -1,6 +1,8 @@
-from PySide6.QtCore import QThreadPool, Signal, QObject
+from PySide6.QtCore import QThreadPool, QRunnable, Signal, QObject
 import pytest
-from core.downloader import DownloadTask, DownloadQueueWorker
+import yt_dlp
+from core.downloader import DownloadTask, DownloadQueueWorker, PlaylistJob, ChildSignal, reusable_info
+from core.dispatcher import DownloadDispatcher
 import os
 import tempfile
 from core.utils import get_data_dir
@@ -158,3 +160,229 @@ def test_download_task_playlist(temp_data_dir):
         from_queue=False
     )
     assert task.playlist == True
+
+def test_reusable_info_drops_previous_format_selection():
+    info = {
+        "id": "abc",
+        "title": "Test Video",
+        "formats": [{"format_id": "18", "url": "https://example.com/18"}],
+        "requested_formats": [{"format_id": "137"}, {"format_id": "140"}],
+        "requested_downloads": [{"filepath": "/tmp/test.mp4"}],
+        "entries": [{"id": "def", "requested_formats": [{"format_id": "22"}]}]
+    }
+    cleaned = reusable_info(info)
+    assert "requested_formats" not in cleaned
+    assert "requested_downloads" not in cleaned
+    assert "requested_formats" not in cleaned["entries"][0]
+    assert cleaned["formats"] == info["formats"]
+    assert "requested_formats" in info
+
+class FakePlaylistParent:
+    def __init__(self, row, folder):
+        self.row = row
+        self.cancel = False
+        self.task = DownloadTask("https://www.youtube.com/playlist?list=test", "720p", folder, "", playlist=True)
+        self.catcher = SignalCatcher()
+        self.progress_signal = self.catcher.progress_signal
+        self.status_signal = self.catcher.status_signal
+        self.log_signal = self.catcher.log_signal
+        self.started = []
+        self.max_running = 0
+        self.job = None
+
+    def create_entry_worker(self, entry, index, job):
+        parent = self
+
+        class EntryRunnable(QRunnable):
+            task = parent.task.for_entry(entry["url"], job.folder)
+            row = None
+            progress_signal = ChildSignal(lambda percent: None)
+            status_signal = ChildSignal(lambda status: None)
+            log_signal = parent.log_signal
+
+            def run_stage(self, stage):
+                self.run()
+
+            def finish(self):
+                job.child_finished(index)
+
+            def run(self):
+                parent.started.append(entry["url"])
+                parent.max_running = max(parent.max_running, len(job.running))
+                job.child_progress(index, 50.0)
+                job.child_status(index, "Download Completed")
+                job.child_finished(index)
+        return EntryRunnable()
+
+class IdlePool:
+    def __init__(self):
+        self.started = []
+    def setMaxThreadCount(self, count):
+        self.max_threads = count
+    def start(self, worker):
+        self.started.append(worker)
+
+def test_playlist_job_runs_every_entry_within_limit(temp_data_dir, qtbot):
+    parent = FakePlaylistParent(0, temp_data_dir)
+    entries = [{"url": f"https://www.youtube.com/watch?v={i:011d}"} for i in range(7)]
+    job = PlaylistJob(parent, None, entries, total=len(entries))
+    pool = QThreadPool()
+    dispatcher = DownloadDispatcher(pool, parent.progress_signal, parent.status_signal, parent.log_signal, max_concurrent=2)
+    dispatcher.add_playlist(job)
+    qtbot.waitUntil(lambda: "Download Completed" in parent.catcher.status_messages, timeout=5000)
+    pool.waitForDone(5000)
+    assert sorted(parent.started) == sorted(e["url"] for e in entries)
+    assert parent.max_running <= 2
+    assert job.completed == 7 and job.failed == 0
+
+def test_playlist_job_pulls_entries_lazily(temp_data_dir):
+    parent = FakePlaylistParent(0, temp_data_dir)
+    pulled = []
+
+    def entries():
+        for i in range(1000):
+            pulled.append(i)
+            yield {"url": f"https://www.youtube.com/watch?v={i:011d}"}
+
+    job = PlaylistJob(parent, None, entries())
+    pool = IdlePool()
+    dispatcher = DownloadDispatcher(pool, parent.progress_signal, parent.status_signal, parent.log_signal, max_concurrent=3, extract_pool=pool)
+    dispatcher._on_playlist_ready(job)
+    assert len(pool.started) == 3
+    assert len(pulled) == 0
+    for worker in list(pool.started):
+        worker.run()
+    assert len(pulled) == 3
+    assert len(pool.started) == 6
+    assert not job.exhausted
+
+def test_incremental_uploads_stop_at_archived_entry(temp_data_dir, qtbot):
+    from core.download_archive import get_download_archive
+    archive = get_download_archive()
+    archive.add("youtube old")
+    parent = FakePlaylistParent(0, temp_data_dir)
+    parent.task.url = "https://www.youtube.com/@SomeChannel/videos"
+    parent.task.incremental = True
+    pulled = []
+
+    def entries():
+        for video_id in ["new1", "new2", "old", "older"]:
+            pulled.append(video_id)
+            yield {"url": f"https://www.youtube.com/watch?v={video_id}", "ie_key": "Youtube", "id": video_id}
+
+    job = PlaylistJob(parent, None, entries())
+    pool = QThreadPool()
+    dispatcher = DownloadDispatcher(pool, parent.progress_signal, parent.status_signal, parent.log_signal, max_concurrent=1)
+    dispatcher.add_playlist(job)
+    qtbot.waitUntil(lambda: "Download Completed" in parent.catcher.status_messages, timeout=5000)
+    pool.waitForDone(5000)
+    assert parent.started == ["https://www.youtube.com/watch?v=new1", "https://www.youtube.com/watch?v=new2"]
+    assert pulled == ["new1", "new2", "old"]
+    assert "youtube new1" in archive and "youtube new2" in archive
+
+    # The next run finds nothing new.
+    parent = FakePlaylistParent(0, temp_data_dir)
+    parent.task.url = "https://www.youtube.com/@SomeChannel/videos"
+    parent.task.incremental = True
+    job = PlaylistJob(parent, None, entries())
+    dispatcher = DownloadDispatcher(pool, parent.progress_signal, parent.status_signal, parent.log_signal, max_concurrent=1)
+    dispatcher.add_playlist(job)
+    qtbot.waitUntil(lambda: "Download Completed" in parent.catcher.status_messages, timeout=5000)
+    assert parent.started == []
+
+def test_incremental_playlist_skips_archived_entries(temp_data_dir, qtbot):
+    from core.download_archive import get_download_archive
+    archive = get_download_archive()
+    archive.add("youtube done")
+    parent = FakePlaylistParent(0, temp_data_dir)
+    parent.task.url = "https://www.youtube.com/playlist?list=PLabcdefghij"
+    parent.task.incremental = True
+    ids = ["first", "done", "added1", "added2"]
+    entries = [{"url": f"https://www.youtube.com/watch?v={video_id}", "ie_key": "Youtube", "id": video_id} for video_id in ids]
+
+    job = PlaylistJob(parent, None, entries, total=len(entries))
+    pool = QThreadPool()
+    dispatcher = DownloadDispatcher(pool, parent.progress_signal, parent.status_signal, parent.log_signal, max_concurrent=1)
+    dispatcher.add_playlist(job)
+    qtbot.waitUntil(lambda: "Download Completed" in parent.catcher.status_messages, timeout=5000)
+    pool.waitForDone(5000)
+    # An archived entry early in the list does not hide the ones added after it.
+    assert parent.started == [f"https://www.youtube.com/watch?v={video_id}" for video_id in ("first", "added1", "added2")]
+    assert job.total == 3
+
+class StatusSink:
+    def __init__(self):
+        self.statuses = []
+    def emit(self, *args):
+        self.statuses.append(args[-1])
+
+def make_transfer_worker(download_task, monkeypatch, failing_ids):
+    processed = []
+
+    def process_ie_result(ydl, info, download=True):
+        # A single video must fail loudly, whatever ignoreerrors the worker uses elsewhere.
+        assert ydl.params["ignoreerrors"] is False
+        processed.append(info["id"])
+        if info["id"] in failing_ids:
+            raise yt_dlp.utils.DownloadError("ERROR: unable to download video data: HTTP Error 403: Forbidden")
+        return info
+
+    monkeypatch.setattr(yt_dlp.YoutubeDL, "process_ie_result", process_ie_result)
+    status = StatusSink()
+    worker = DownloadQueueWorker(download_task, 0, StatusSink(), status, StatusSink())
+    worker.info = {"_type": "video", "id": "cached"}
+    worker.info_options = {}
+    worker.download_options = dict(worker._get_base_options(), quiet=True)
+    worker.info_from_cache = True
+    monkeypatch.setattr(worker, "_extract_info", lambda options, use_cache=True: {"_type": "video", "id": "fresh"})
+    return worker, status, processed
+
+def test_transfer_extracts_again_when_cached_urls_fail(download_task, monkeypatch):
+    worker, status, processed = make_transfer_worker(download_task, monkeypatch, {"cached"})
+    assert worker.transfer() is None
+    assert processed == ["cached", "fresh"]
+    assert status.statuses[-1] == "Download Completed"
+
+def test_transfer_reports_a_failed_download(download_task, monkeypatch):
+    worker, status, processed = make_transfer_worker(download_task, monkeypatch, {"cached", "fresh"})
+    worker.transfer()
+    # The fresh extraction failed too, then the basic format fallback.
+    assert processed == ["cached", "fresh", "fresh"]
+    assert status.statuses[-1] == "Download Error"
+
+def test_paused_worker_stops_at_next_fragment(download_task):
+    class Sink:
+        def emit(self, *args):
+            pass
+    worker = DownloadQueueWorker(download_task, 0, Sink(), Sink(), Sink())
+    worker.paused = worker.cancel = True
+    worker.progress_hook({"status": "downloading", "fragment_index": 3, "downloaded_bytes": 10})
+    with pytest.raises(yt_dlp.utils.DownloadCancelled):
+        worker.progress_hook({"status": "downloading", "fragment_index": 4, "downloaded_bytes": 20})
+    worker.paused = False
+    worker.pause_fragment = None
+    with pytest.raises(yt_dlp.utils.DownloadCancelled):
+        worker.progress_hook({"status": "downloading", "fragment_index": 4, "downloaded_bytes": 20})
+    worker.close_bandwidth_share()
+
+def test_pause_lets_fragment_finish_with_verbose_logging(download_task):
+    class Sink:
+        def emit(self, *args):
+            pass
+    worker = DownloadQueueWorker(download_task, 0, Sink(), Sink(), Sink())
+    worker.progress_hook({"status": "downloading", "fragment_index": 3, "downloaded_bytes": 10})
+    worker.paused = True
+    worker.cancel = True
+    assert worker.is_cancelled() and not worker.token.cancelled
+    # yt-dlp keeps logging while the fragment finishes.
+    worker.logger.debug("[download] Fragment 3 of 10")
+    worker.logger.warning("Got error: timed out. Retrying (1/10)...")
+    worker.progress_hook({"status": "downloading", "fragment_index": 3, "downloaded_bytes": 20})
+    with pytest.raises(yt_dlp.utils.DownloadCancelled):
+        worker.progress_hook({"status": "downloading", "fragment_index": 4, "downloaded_bytes": 30})
+    worker.paused = False
+    worker.cancel = True
+    assert worker.token.cancelled
+    with pytest.raises(yt_dlp.utils.DownloadCancelled):
+        worker.logger.debug("[download] Fragment 4 of 10")
+    worker.close_bandwidth_share()
@@ -0,0 +1,84 @@
+import os
+import time
+import pytest
+from core import extraction_cache
+from core.extraction_cache import ExtractionCache, parse_url_expiry, info_expiry, DEFAULT_TTL
+from core.downloader import DownloadTask
+from core.inflight import flight_key
+
+VIDEO_URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+def make_info(video_id="dQw4w9WgXcQ", expire=None):
+    expire = expire or int(time.time()) + 6 * 3600
+    return {
+        "_type": "video",
+        "id": video_id,
+        "extractor_key": "Youtube",
+        "title": "Test Video",
+        "uploader": "Test Channel",
+        "duration": 212,
+        "formats": [
+            {"format_id": "18", "url": f"https://rr1.googlevideo.com/videoplayback?expire={expire}&itag=18"},
+            {"format_id": "140", "url": f"https://rr1.googlevideo.com/videoplayback?expire={expire + 60}&itag=140"}
+        ]
+    }
+
+@pytest.fixture
+def cache(temp_data_dir):
+    return ExtractionCache(cache_dir=os.path.join(temp_data_dir, "extraction_cache"))
+
+def test_parse_url_expiry():
+    assert parse_url_expiry("https://example.com/v?expire=1700000000&x=1") == 1700000000
+    assert parse_url_expiry("https://example.com/videoplayback/expire/1700000000/sig/abc") == 1700000000
+    assert parse_url_expiry("https://example.com/plain.mp4") is None
+
+def test_info_expiry_uses_earliest_url():
+    info = make_info(expire=2000000000)
+    assert info_expiry(info) == 2000000000
+    assert info_expiry({"formats": []}, extracted_at=100) == 100 + DEFAULT_TTL
+
+def test_put_and_get_roundtrip(cache):
+    options = {"proxy": None, "noplaylist": True}
+    cache.put(VIDEO_URL, options, make_info())
+    info = cache.get("https://youtu.be/dQw4w9WgXcQ", options)
+    assert info is not None
+    assert info["title"] == "Test Video"
+    assert cache.get(VIDEO_URL, {"proxy": "http://proxy:8080", "noplaylist": True}) is None
+
+def test_expired_urls_are_not_served_but_metadata_is(cache):
+    cache.put(VIDEO_URL, {}, make_info(expire=int(time.time()) + 30))
+    assert cache.get(VIDEO_URL, {}) is None
+    meta = cache.lookup_metadata(VIDEO_URL)
+    assert meta["title"] == "Test Video"
+    assert meta["uploader"] == "Test Channel"
+    assert meta["format_ids"] == ["18", "140"]
+
+def test_gui_lookups_do_not_load_extractors(cache, monkeypatch, temp_data_dir):
+    url = "https://vimeo.com/76979871#t=10"
+    info = dict(make_info(), id="76979871", extractor_key="Vimeo", title="Vimeo Video")
+    # Written by the extract stage, which resolves the extractor key.
+    cache.put(url, {}, info)
+
+    class NoExtractors:
+        def __iter__(self):
+            raise AssertionError("extractor list loaded")
+
+    monkeypatch.setattr(extraction_cache, "_extractor_classes", NoExtractors())
+    assert cache.lookup_metadata("https://VIMEO.com/76979871")["title"] == "Vimeo Video"
+    task = DownloadTask(url, "720p", temp_data_dir, "")
+    assert flight_key(task)[0] == "url:https://vimeo.com/76979871"
+
+def test_lru_eviction_respects_entry_cap(temp_data_dir):
+    cache = ExtractionCache(cache_dir=os.path.join(temp_data_dir, "cache"), max_entries=2)
+    for video_id in ["aaaaaaaaaaa", "bbbbbbbbbbb"]:
+        cache.put(f"https://www.youtube.com/watch?v={video_id}", {}, make_info(video_id))
+    assert cache.get("https://www.youtube.com/watch?v=aaaaaaaaaaa", {}) is not None
+    cache.put("https://www.youtube.com/watch?v=ccccccccccc", {}, make_info("ccccccccccc"))
+    assert cache.stats()["entries"] == 2
+    assert cache.get("https://www.youtube.com/watch?v=bbbbbbbbbbb", {}) is None
+    assert cache.get("https://www.youtube.com/watch?v=aaaaaaaaaaa", {}) is not None
+
+def test_index_survives_reload(temp_data_dir):
+    cache_dir = os.path.join(temp_data_dir, "cache")
+    ExtractionCache(cache_dir=cache_dir).put(VIDEO_URL, {}, make_info())
+    assert ExtractionCache(cache_dir=cache_dir).get(VIDEO_URL, {}) is not None
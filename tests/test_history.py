@@ -1,8 +1,12 @@
-from PySide6.QtWidgets import QTableWidget, QTableWidgetItem
+from PySide6.QtWidgets import QTableView, QAbstractItemView
+from PySide6.QtCore import Qt, QObject
 import pytest
+import shiboken6
 from core.history import (
+    HistoryTableModel,
+    FETCH_SIZE,
+    RELOAD_DELAY_MS,
     load_history_initial,
-    save_history,
     add_history_entry,
     delete_selected_history,
     delete_all_history,
@@ -11,13 +15,15 @@ from core.history import (
 )
 import json
 import os
+import sqlite3
+import threading
 
 @pytest.fixture
-def history_table(qapp):
-    table = QTableWidget()
-    table.setColumnCount(3)
-    table.setHorizontalHeaderLabels(["Title", "Channel", "URL"])
-    return table
+def history_table(qapp, temp_data_dir):
+    return HistoryTableModel()
+
+def cell(model, row, column):
+    return model.index(row, column).data()
 
 @pytest.fixture
 def sample_history_data():
@@ -36,9 +42,9 @@ def test_add_history_entry_with_title_channel(history_table):
         True
     )
     assert history_table.rowCount() == 1
-    assert history_table.item(0, 0).text() == "Test Video"
-    assert history_table.item(0, 1).text() == "Test Channel"
-    assert history_table.item(0, 2).text() == "https://youtube.com/test"
+    assert cell(history_table, 0, 0) == "Test Video"
+    assert cell(history_table, 0, 1) == "Test Channel"
+    assert cell(history_table, 0, 2) == "https://youtube.com/test"
 
 def test_add_history_entry_url_only(history_table):
     add_history_entry(
@@ -49,11 +55,11 @@ def test_add_history_entry_url_only(history_table):
         True
     )
     assert history_table.rowCount() == 1
-    assert history_table.item(0, 0).text() == "Unknown Title"
-    assert history_table.item(0, 1).text() == "Unknown Channel"
-    assert history_table.item(0, 2).text() == "https://youtube.com/test"
+    assert cell(history_table, 0, 0) == "Unknown Title"
+    assert cell(history_table, 0, 1) == "Unknown Channel"
+    assert cell(history_table, 0, 2) == "https://youtube.com/test"
 
-def test_save_and_load_history(history_table, temp_data_dir, sample_history_data):
+def test_history_persists_in_store(history_table, temp_data_dir, sample_history_data, qtbot):
     for entry in sample_history_data:
         add_history_entry(
             history_table,
@@ -62,15 +68,14 @@ def test_save_and_load_history(history_table, temp_data_dir, sample_history_data
             entry["url"],
             True
         )
-    save_history(history_table)
-    history_table.setRowCount(0)
+    history_table = HistoryTableModel()
     assert history_table.rowCount() == 0
     load_history_initial(history_table)
-    assert history_table.rowCount() == len(sample_history_data)
+    qtbot.waitUntil(lambda: history_table.rowCount() == len(sample_history_data), timeout=5000)
     for i, entry in enumerate(sample_history_data):
-        assert history_table.item(i, 0).text() == entry["title"]
-        assert history_table.item(i, 1).text() == entry["channel"]
-        assert history_table.item(i, 2).text() == entry["url"]
+        assert cell(history_table, i, 0) == entry["title"]
+        assert cell(history_table, i, 1) == entry["channel"]
+        assert cell(history_table, i, 2) == entry["url"]
 
 def test_delete_selected_history(history_table, sample_history_data):
     for entry in sample_history_data:
@@ -82,19 +87,23 @@ def test_delete_selected_history(history_table, sample_history_data):
             True
         )
     
-    history_table.setSelectionMode(QTableWidget.MultiSelection)
-    history_table.selectRow(0)
-    history_table.selectRow(2)
+    view = QTableView()
+    view.setModel(history_table)
+    view.setSelectionMode(QAbstractItemView.MultiSelection)
+    view.setSelectionBehavior(QAbstractItemView.SelectRows)
+    view.selectRow(0)
+    view.selectRow(2)
     
     def mock_log(msg):
         pass
     
-    delete_selected_history(history_table, mock_log)
+    delete_selected_history(view, mock_log)
+    assert history_table.store.count() == 1
     
     assert history_table.rowCount() == 1
-    assert history_table.item(0, 0).text() == sample_history_data[1]["title"]
-    assert history_table.item(0, 1).text() == sample_history_data[1]["channel"]
-    assert history_table.item(0, 2).text() == sample_history_data[1]["url"]
+    assert cell(history_table, 0, 0) == sample_history_data[1]["title"]
+    assert cell(history_table, 0, 1) == sample_history_data[1]["channel"]
+    assert cell(history_table, 0, 2) == sample_history_data[1]["url"]
 
 def test_delete_all_history(history_table, sample_history_data):
     for entry in sample_history_data:
@@ -114,7 +123,7 @@ def test_delete_all_history(history_table, sample_history_data):
     delete_all_history(history_table, mock_confirm, mock_log)
     assert history_table.rowCount() == 0
 
-def test_search_history(history_table, sample_history_data):
+def test_search_history(history_table, sample_history_data, qtbot):
     for entry in sample_history_data:
         add_history_entry(
             history_table,
@@ -123,35 +132,22 @@ def test_search_history(history_table, sample_history_data):
             entry["url"],
             True
         )
+
+    def search(text):
+        with qtbot.waitSignal(history_table.modelReset, timeout=5000):
+            search_history(history_table, text)
+        return history_table.rowCount()
+
     # Search by title
-    search_history(history_table, "Test Video 1")
-    visible_rows = sum(1 for row in range(history_table.rowCount()) 
-                      if not history_table.isRowHidden(row))
-    assert visible_rows == 1
-    
+    assert search("Test Video 1") == 1
     # Search by channel
-    search_history(history_table, "Channel 2")
-    visible_rows = sum(1 for row in range(history_table.rowCount()) 
-                      if not history_table.isRowHidden(row))
-    assert visible_rows == 1
-    
+    assert search("Channel 2") == 1
     # Search by URL
-    search_history(history_table, "youtube.com/3")
-    visible_rows = sum(1 for row in range(history_table.rowCount()) 
-                      if not history_table.isRowHidden(row))
-    assert visible_rows == 1
-    
+    assert search("youtube.com/3") == 1
     # Clear search
-    search_history(history_table, "")
-    visible_rows = sum(1 for row in range(history_table.rowCount()) 
-                      if not history_table.isRowHidden(row))
-    assert visible_rows == len(sample_history_data)
-    
+    assert search("") == len(sample_history_data)
     # Search for non-existent
-    search_history(history_table, "NonExistent")
-    visible_rows = sum(1 for row in range(history_table.rowCount()) 
-                      if not history_table.isRowHidden(row))
-    assert visible_rows == 0
+    assert search("NonExistent") == 0
 
 def test_export_history(history_table, temp_data_dir, sample_history_data):
     for entry in sample_history_data:
@@ -172,3 +168,95 @@ def test_export_history(history_table, temp_data_dir, sample_history_data):
         assert entry["title"] == sample_history_data[i]["title"]
         assert entry["channel"] == sample_history_data[i]["channel"]
         assert entry["url"] == sample_history_data[i]["url"]
+
+def test_history_model_fetches_rows_in_pages(history_table, qtbot):
+    store = history_table.store
+    for i in range(FETCH_SIZE + 50):
+        store.add(f"Video {i:03d}", "Channel", f"https://youtube.com/{i}")
+    with qtbot.waitSignal(history_table.modelReset, timeout=5000):
+        history_table.reload()
+    assert history_table.rowCount() == FETCH_SIZE
+    assert history_table.canFetchMore()
+    history_table.fetchMore()
+    assert history_table.rowCount() == FETCH_SIZE + 50
+    assert not history_table.canFetchMore()
+
+    add_history_entry(history_table, "Newest", "Channel", "https://youtube.com/new")
+    assert history_table.rowCount() == FETCH_SIZE + 51
+    assert cell(history_table, FETCH_SIZE + 50, 0) == "Newest"
+
+def test_history_model_sorts_in_store(history_table, sample_history_data, qtbot):
+    for entry in sample_history_data:
+        add_history_entry(history_table, entry["title"], entry["channel"], entry["url"])
+    store = history_table.store
+    page = store.page
+    readers = []
+    store.page = lambda *args: readers.append(threading.current_thread()) or page(*args)
+    with qtbot.waitSignal(history_table.modelReset, timeout=5000):
+        history_table.sort(0, Qt.DescendingOrder)
+    assert [cell(history_table, r, 0) for r in range(3)] == ["Test Video 3", "Test Video 2", "Test Video 1"]
+    # The first page is not read on the GUI thread.
+    assert readers and threading.main_thread() not in readers
+
+    # Entries written elsewhere are pushed into the model.
+    history_table.store.add("Test Video 4", "Channel 4", "https://youtube.com/4")
+    qtbot.waitUntil(lambda: cell(history_table, 0, 0) == "Test Video 4", timeout=5000)
+
+def test_history_model_coalesces_reloads(history_table, qtbot):
+    with qtbot.waitSignal(history_table.modelReset, timeout=5000):
+        history_table.set_filter("Video")
+    reloads = []
+    history_table.modelReset.connect(lambda: reloads.append(history_table.total))
+    for i in range(20):
+        history_table.store.add(f"Video {i}", "Channel", f"https://youtube.com/{i}")
+    assert reloads == []
+    qtbot.waitUntil(lambda: reloads == [20], timeout=5000)
+    history_table.store.add("Other", "Channel", "https://youtube.com/other")
+    qtbot.wait(RELOAD_DELAY_MS * 2)
+    assert reloads == [20, 20]
+
+def test_history_model_reloads_when_store_is_replaced(history_table, qtbot, temp_data_dir):
+    store = history_table.store
+    store.add("Old", "Channel", "https://youtube.com/old")
+    assert history_table.rowCount() == 1
+    store.replace_all([{"title": "New 1", "url": "https://youtube.com/n1"}, {"title": "New 2", "url": "https://youtube.com/n2"}])
+    qtbot.waitUntil(lambda: history_table.rowCount() == 2, timeout=5000)
+    assert cell(history_table, 0, 0) == "New 1"
+
+    path = os.path.join(temp_data_dir, "import.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([{"title": "Imported", "channel": "Channel", "url": "https://youtube.com/i"}], f)
+    store.import_file(path)
+    qtbot.waitUntil(lambda: history_table.rowCount() == 1, timeout=5000)
+    assert cell(history_table, 0, 0) == "Imported"
+
+    store.clear()
+    qtbot.waitUntil(lambda: history_table.rowCount() == 0, timeout=5000)
+
+def test_history_model_stops_listening_when_deleted(qapp, temp_data_dir):
+    owner = QObject()
+    model = HistoryTableModel(parent=owner)
+    store = model.store
+    assert len(store.listeners) == 1
+    shiboken6.delete(owner)
+    assert store.listeners == []
+    store.add("After", "Channel", "https://youtube.com/after")
+
+def test_history_model_receives_entries_from_other_threads(history_table, qtbot):
+    worker = threading.Thread(target=history_table.store.add, args=("From Worker", "Channel", "https://youtube.com/w"))
+    worker.start()
+    worker.join()
+    qtbot.waitUntil(lambda: history_table.rowCount() == 1, timeout=5000)
+    assert cell(history_table, 0, 0) == "From Worker"
+
+def test_history_model_reloads_external_changes(history_table, qtbot):
+    history_table.watch_store()
+    history_table.store.add("Own", "Channel", "https://youtube.com/own")
+    assert not history_table.store.changed_externally()
+
+    other = sqlite3.connect(history_table.store.db_path)
+    with other:
+        other.execute("INSERT INTO history (title, channel, url, downloaded_at) VALUES ('External', 'Channel', 'https://youtube.com/ext', 1)")
+    other.close()
+    qtbot.waitUntil(lambda: history_table.rowCount() == 2, timeout=5000)
+    assert cell(history_table, 1, 0) == "External"
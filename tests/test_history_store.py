@@ -0,0 +1,81 @@
+import json
+import os
+import threading
+from core.history_store import HistoryStore, get_history_store, build_search_query
+
+def test_history_store_migrates_json_once(temp_data_dir):
+    legacy = [
+        {"title": "Video 1", "channel": "Channel 1", "url": "https://youtube.com/1"},
+        {"title": "", "channel": "", "url": "https://youtube.com/2"},
+        {"title": "No URL", "channel": "Channel", "url": ""}
+    ]
+    legacy_path = os.path.join(temp_data_dir, "history.json")
+    with open(legacy_path, "w", encoding="utf-8") as f:
+        json.dump(legacy, f)
+
+    store = HistoryStore(temp_data_dir)
+    entries = store.entries()
+    assert [e["url"] for e in entries] == ["https://youtube.com/1", "https://youtube.com/2"]
+    assert entries[1]["title"] == "Unknown Title"
+    assert entries[0]["downloaded_at"] < entries[1]["downloaded_at"]
+    assert not os.path.exists(legacy_path)
+    assert os.path.exists(legacy_path + ".migrated")
+    store.close()
+
+    # A history.json that shows up later is not imported again.
+    with open(legacy_path, "w", encoding="utf-8") as f:
+        json.dump(legacy, f)
+    store = HistoryStore(temp_data_dir)
+    assert store.count() == 2
+    store.close()
+
+def test_history_store_lookups_by_url_and_date(temp_data_dir):
+    store = get_history_store()
+    store.add("First", "Channel", "https://youtube.com/a", downloaded_at=100.0)
+    store.add("Second", "Channel", "https://youtube.com/b", downloaded_at=200.0)
+    store.add("Again", "Channel", "https://youtube.com/a", downloaded_at=300.0)
+
+    assert [e["title"] for e in store.find_by_url("https://youtube.com/a")] == ["First", "Again"]
+    assert [e["title"] for e in store.between(150.0, 350.0)] == ["Second", "Again"]
+    plan = store.conn.execute("EXPLAIN QUERY PLAN SELECT id FROM history WHERE url = ?", ("x",)).fetchall()
+    assert any("idx_history_url" in row[3] for row in plan)
+
+def test_history_store_concurrent_adds(temp_data_dir):
+    store = get_history_store()
+    assert store.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    def add_many(n):
+        for i in range(50):
+            store.add(f"Video {n}-{i}", "Channel", f"https://youtube.com/{n}/{i}")
+
+    threads = [threading.Thread(target=add_many, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert store.count() == 200
+
+def test_history_store_full_text_search(temp_data_dir):
+    store = get_history_store()
+    store.add("Python Tutorial", "Code Channel", "https://youtube.com/watch?v=py1")
+    store.add("Guitar Lesson", "Music Channel", "https://youtube.com/watch?v=gt1")
+    store.add("Python Music Mix", "Lofi Beats", "https://youtube.com/watch?v=mx1")
+
+    def titles(text):
+        return [e["title"] for e in store.page(0, 10, text=text)]
+
+    assert titles("pyth") == ["Python Tutorial", "Python Music Mix"]
+    assert titles("music") == ["Guitar Lesson", "Python Music Mix"]
+    assert titles("channel:music") == ["Guitar Lesson"]
+    assert titles("title:music python") == ["Python Music Mix"]
+    assert titles("watch?v=gt1") == ["Guitar Lesson"]
+    assert store.count("nothing") == 0
+
+    store.delete([store.find_by_url("https://youtube.com/watch?v=py1")[0]["id"]])
+    assert titles("tutorial") == []
+
+def test_build_search_query():
+    assert build_search_query("channel:foo bar") == 'channel : "foo"* AND "bar"*'
+    assert build_search_query('say "hi"') == '"say"* AND """hi"""*'
+    assert build_search_query("other:x") == '"other:x"*'
+    assert build_search_query(" / - ") is None
@@ -0,0 +1,51 @@
+import os
+import json
+from core.downloader import DownloadTask, CONTENT_UNAVAILABLE, PLAYLIST_ERROR, job_state
+from core.job_journal import JobJournal, get_job_journal
+
+def make_task(url="https://youtube.com/watch?v=abc"):
+    task = DownloadTask(url, "720p", "/tmp/downloads", "", audio_only=True, subtitles=True,
+                        output_format="mp3", from_queue=True, audio_format="mp3", audio_quality="192")
+    task.ffmpeg_path = "/usr/bin/ffmpeg"
+    return task
+
+def test_download_task_round_trip():
+    task = make_task()
+    task.job_id = "job1"
+    restored = DownloadTask.from_dict(json.loads(json.dumps(task.to_dict())))
+    assert restored.to_dict() == task.to_dict()
+    assert restored.ffmpeg_path == "/usr/bin/ffmpeg"
+
+def test_journal_restores_unfinished_jobs(temp_data_dir):
+    journal = get_job_journal()
+    done, failed, running, queued = (make_task(f"https://youtube.com/watch?v={i}") for i in range(4))
+    for task in (done, failed, running, queued):
+        journal.add(task, "Title", "Channel", "Audio")
+    journal.update(running.job_id, "running")
+    journal.record_part(running.job_id, "/tmp/downloads/video.webm.part")
+    journal.record_part(running.job_id, "/tmp/downloads/video.webm.part")
+    journal.finish(done.job_id, "completed")
+    journal.finish(failed.job_id, "failed")
+    # A crash in the middle of a write leaves a torn last line.
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"op": "state", "id": "')
+
+    jobs = JobJournal(temp_data_dir).restore()
+    assert [job["id"] for job in jobs] == [running.job_id, queued.job_id]
+    assert jobs[0]["state"] == "running"
+    assert jobs[0]["parts"] == ["/tmp/downloads/video.webm.part"]
+    assert DownloadTask.from_dict(jobs[1]["task"]).url == queued.url
+
+    # The journal was compacted to the jobs that are still open.
+    with open(journal.path, encoding="utf-8") as f:
+        assert len(f.readlines()) == 2
+    assert [job["id"] for job in JobJournal(temp_data_dir).restore()] == [running.job_id, queued.job_id]
+
+def test_journal_drops_jobs_that_ended_unavailable(temp_data_dir):
+    journal = get_job_journal()
+    unavailable, empty_playlist, fetching = (make_task(f"https://youtube.com/watch?v={i}") for i in range(3))
+    for task, status in ((unavailable, CONTENT_UNAVAILABLE), (empty_playlist, PLAYLIST_ERROR), (fetching, "Fetching Media Info...")):
+        journal.add(task, "Title", "Channel", "Audio")
+        journal.update(task.job_id, job_state(status))
+    assert job_state("Download Completed (2 failed)") == "completed"
+    assert [job["id"] for job in JobJournal(temp_data_dir).restore()] == [fetching.job_id]
@@ -0,0 +1,60 @@
+import os
+from core.downloader import DownloadTask, DownloadQueueWorker, ALREADY_DOWNLOADED
+from core.library_index import LibraryIndex, format_profile, get_library_index
+
+def write_file(path, data=b"data"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+def test_lookup_checks_file_on_disk(temp_data_dir):
+    index = get_library_index()
+    path = write_file(os.path.join(temp_data_dir, "media", "Video.mp4"))
+    assert index.record("Youtube:dQw4w9WgXcQ", "video:720p:mp4", path)
+
+    assert index.lookup("Youtube:dQw4w9WgXcQ", "video:720p:mp4") == path
+    assert index.lookup("Youtube:dQw4w9WgXcQ", "video:1080p:mp4") is None
+    assert LibraryIndex(temp_data_dir).lookup("Youtube:dQw4w9WgXcQ", "video:720p:mp4") == path
+
+    os.remove(path)
+    assert index.lookup("Youtube:dQw4w9WgXcQ", "video:720p:mp4") is None
+    assert len(index) == 0
+
+def test_rescan_finds_added_and_removed_files(temp_data_dir):
+    index = get_library_index()
+    root = os.path.join(temp_data_dir, "media")
+    kept = write_file(os.path.join(root, "Kept.mp4"))
+    gone = write_file(os.path.join(root, "Gone.mp3"))
+    index.record("Youtube:aaaaaaaaaaa", "video:720p:mp4", kept)
+    index.record("Youtube:bbbbbbbbbbb", "audio:mp3", gone)
+    os.remove(gone)
+    found = write_file(os.path.join(root, "sub", "Song [ccccccccccc].m4a"))
+    write_file(os.path.join(root, "sub", "Notes.txt"))
+
+    assert index.rescan(root) == (1, 1)
+    assert index.lookup("Youtube:ccccccccccc", "audio:m4a") == found
+    assert index.lookup("Youtube:aaaaaaaaaaa", "video:720p:mp4") == kept
+    # Nothing changed, so no directory is listed again.
+    assert index.rescan(root) == (0, 0)
+
+    # A scanned video matches any resolution.
+    write_file(os.path.join(root, "Clip [ddddddddddd].mkv"))
+    assert index.rescan(root) == (1, 0)
+    assert index.lookup("Youtube:ddddddddddd", "video:1080p:mkv")
+
+def test_worker_skips_downloaded_video(temp_data_dir):
+    task = DownloadTask("https://www.youtube.com/watch?v=dQw4w9WgXcQ", "720p", temp_data_dir, "")
+    path = write_file(os.path.join(temp_data_dir, "Video.mp4"))
+    get_library_index().record("Youtube:dQw4w9WgXcQ", format_profile(task), path)
+    statuses = []
+
+    class Collect:
+        def __init__(self, target):
+            self.target = target
+        def emit(self, *args):
+            self.target.append(args[-1])
+
+    worker = DownloadQueueWorker(task, 0, Collect([]), Collect(statuses), Collect([]))
+    assert worker.extract() is None
+    assert statuses == [ALREADY_DOWNLOADED]
@@ -79,9 +79,80 @@ def test_concurrent_downloads_setting(main_window):
     main_window.profile_manager.set_max_concurrent_downloads(0)
     assert main_window.max_concurrent_downloads == 3
 
+def test_auto_concurrency_setting(main_window):
+    main_window.page_settings.concurrent_combo.setCurrentText("Auto")
+    assert main_window.adaptive_concurrency.enabled
+    assert main_window.user_profile.get_auto_concurrency()
+    main_window.adaptive_concurrency.sample()
+    main_window.page_settings.concurrent_combo.setCurrentText("3")
+    assert not main_window.adaptive_concurrency.enabled
+    assert main_window.dispatcher.max_concurrent == 3
+
 def test_theme_change(main_window):
     initial_theme = main_window.theme_manager.current_theme
     main_window.theme_manager.change_theme("Dark")
     assert main_window.theme_manager.current_theme != initial_theme
     assert main_window.user_profile.get_theme() == main_window.theme_manager.current_theme
-    main_window.theme_manager.change_theme(initial_theme) 
\ No newline at end of file
+    main_window.theme_manager.change_theme(initial_theme) 
+def test_progress_is_painted_on_refresh(main_window):
+    main_window.progress_board.emit(None, 10.0)
+    main_window.progress_board.emit(None, 42.0)
+    assert main_window.progress_bar.value() != 42
+    main_window.flush_progress()
+    assert main_window.progress_bar.value() == 42
+
+def test_log_is_flushed_in_batches(main_window, monkeypatch):
+    monkeypatch.setattr(main_window.tray_manager, 'show_error_message', lambda text: None)
+    editor = main_window.log_manager.log_text_edit
+    main_window.append_log("[yt-dlp Debug] first")
+    main_window.append_log("Download Error: boom")
+    assert "first" not in editor.toPlainText()
+    main_window.log_manager.flush()
+    text = editor.toPlainText()
+    assert "[yt-dlp Debug] first" in text
+    assert "❌ Download Error: boom" in text
+
+def test_log_view_is_bounded(main_window):
+    from ui.components.log_dock import MAX_LOG_LINES
+    for i in range(MAX_LOG_LINES + 100):
+        main_window.append_log(f"[yt-dlp Debug] line {i}")
+    main_window.log_manager.flush()
+    editor = main_window.log_manager.log_text_edit
+    assert editor.document().blockCount() == MAX_LOG_LINES
+    assert editor.toPlainText().endswith(f"line {MAX_LOG_LINES + 99}")
+
+def test_log_buffer_classifies_only_flushed_records(monkeypatch):
+    from ui.components import log_dock
+    from core.downloader import YTLogger
+    classified = []
+    classify = log_dock.classify_log
+    monkeypatch.setattr(log_dock, "classify_log", lambda text, level=None: classified.append(text) or classify(text, level))
+    buffer = log_dock.LogBuffer(maxlen=2)
+    logger = YTLogger(buffer)
+    logger.debug("dropped before the flush")
+    logger.warning("Retrying fragment 3 (1/10)...")
+    logger.error("Error without the word in the prefix")
+    assert classified == []
+    records = buffer.take()
+    assert len(classified) == 2
+    assert records[0] == ("warning", "⚠️ [yt-dlp Warning] Retrying fragment 3 (1/10)...")
+    assert records[1][0] == "error"
+
+def test_unfinished_jobs_are_restored(qapp, temp_data_dir, mock_ffmpeg, monkeypatch):
+    from core.downloader import DownloadTask
+    from core.job_journal import get_job_journal
+    monkeypatch.setattr('ui.dialogs.profile_dialog.ProfileDialog.exec_', lambda self: QDialog.Accepted)
+    submitted = []
+    monkeypatch.setattr('core.dispatcher.DownloadDispatcher.submit', lambda self, task, row: submitted.append((task, row)))
+    task = DownloadTask("https://youtube.com/watch?v=restored", "720p", temp_data_dir, "", from_queue=True)
+    get_job_journal().add(task, "Restored Video", "Channel", "Video")
+
+    window = MainWindow(ffmpeg_found=True, ffmpeg_path="dummy")
+    table = window.page_queue.queue_table
+    assert table.rowCount() == 1
+    assert table.item(0, 0).text() == "Restored Video"
+    assert [(t.job_id, row) for t, row in submitted] == [(task.job_id, 0)]
+
+    window.update_status(0, "Download Cancelled")
+    assert get_job_journal().restore() == []
+    window.close()
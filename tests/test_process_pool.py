@@ -0,0 +1,41 @@
+import time
+import pytest
+from core.downloader import DownloadTask
+from core.process_pool import ProcessPoolRunner, QueueSignal
+
+class RecordingSignal:
+    def __init__(self):
+        self.calls = []
+
+    def emit(self, *args):
+        self.calls.append(args)
+
+def wait_until(condition, timeout=5):
+    # Polls without spinning the Qt event loop, the relay thread emits directly.
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+@pytest.fixture
+def runner():
+    runner = ProcessPoolRunner(max_workers=1)
+    yield runner
+    runner.shutdown()
+
+def test_queue_signal_events_reach_row_signals(runner):
+    status = RecordingSignal()
+    runner.jobs[7] = {"status": status}
+    QueueSignal(runner.events, 7, "status").emit(3, "Connecting...")
+    runner.events.put((7, None, ()))
+    wait_until(lambda: 7 not in runner.jobs)
+    assert status.calls == [(3, "Connecting...")]
+
+def test_cancelled_job_reports_back_from_worker_process(runner, temp_data_dir):
+    signals = {name: RecordingSignal() for name in ("progress", "status", "log", "info")}
+    cancel_event = runner.create_cancel_event()
+    cancel_event.set()
+    task = DownloadTask("https://www.youtube.com/watch?v=test", "720p", temp_data_dir, "")
+    runner.run(task, 2, signals, None, cancel_event)
+    wait_until(lambda: not runner.jobs)
+    assert signals["status"].calls == [(2, "Download Cancelled")]
@@ -108,6 +108,14 @@ def test_profile_default_values():
     assert isinstance(profile.data["history_enabled"], bool)
     assert isinstance(profile.data["proxy"], str)
 
+def test_profile_host_limits_are_opt_in(temp_data_dir):
+    profile = UserProfile()
+    assert profile.get_host_limits() == {}
+    profile.set_host_limit("youtube", 2)
+    assert UserProfile().get_host_limits() == {"youtube": 2}
+    profile.set_host_limit("youtube", None)
+    assert UserProfile().get_host_limits() == {}
+
 def test_profile_download_path_creation(temp_data_dir):
     
     profile = UserProfile()
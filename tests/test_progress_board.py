@@ -0,0 +1,16 @@
+from core.progress_board import ProgressBoard
+
+def test_progress_board_keeps_latest_value_per_row():
+    board = ProgressBoard()
+    for percent in range(100):
+        board.emit(1, float(percent))
+    board.emit(None, 12.5)
+    assert board.take() == {1: 99.0, None: 12.5}
+    assert board.take() == {}
+
+def test_progress_board_discard_drops_pending_progress():
+    board = ProgressBoard()
+    board.emit(0, 98.0)
+    board.emit(1, 40.0)
+    board.discard(0)
+    assert board.take() == {1: 40.0}
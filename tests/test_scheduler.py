@@ -0,0 +1,68 @@
+import time
+from datetime import datetime
+import pytest
+from core.scheduler import DownloadSchedule, get_download_schedule, next_cron_time, parse_cron
+
+def test_schedule_returns_due_entries_in_order(temp_data_dir):
+    schedule = get_download_schedule()
+    late = schedule.add(300, "https://youtube.com/watch?v=late")
+    early = schedule.add(100, "https://youtube.com/watch?v=early")
+    removed = schedule.add(50, "https://youtube.com/watch?v=removed")
+    schedule.remove([removed["id"]])
+
+    assert schedule.next_due() == 100
+    assert schedule.take_due(now=99) == []
+    assert [e["id"] for e in schedule.take_due(now=300)] == [early["id"], late["id"]]
+    assert schedule.next_due() is None
+    assert {e["status"] for e in schedule.all()} == {"Started"}
+
+def test_schedule_survives_restart(temp_data_dir):
+    due = time.time() + 3600
+    entry = get_download_schedule().add(due, "https://youtube.com/watch?v=x", "Audio", "1080p", True)
+
+    reloaded = DownloadSchedule(temp_data_dir)
+    assert reloaded.all() == [entry]
+    assert reloaded.next_due() == due
+
+def test_recurring_entry_moves_to_next_run(temp_data_dir):
+    schedule = get_download_schedule()
+    entry = schedule.add(100, "https://youtube.com/@channel", playlist=True, repeat=60)
+
+    # Runs missed while the app was closed are not made up for.
+    taken = schedule.take_due(now=250)
+    assert [e["id"] for e in taken] == [entry["id"]]
+    assert schedule.take_due(now=250) == []
+    assert schedule.next_due() == 280
+    assert schedule.get(entry["id"])["status"] == "Scheduled"
+    assert DownloadSchedule(temp_data_dir).next_due() == 280
+
+def test_cron_expressions(temp_data_dir):
+    start = datetime(2024, 1, 1, 10, 30).timestamp()  # a Monday
+    assert datetime.fromtimestamp(next_cron_time("0 3 * * *", start)) == datetime(2024, 1, 2, 3, 0)
+    assert datetime.fromtimestamp(next_cron_time("*/15 * * * *", start)) == datetime(2024, 1, 1, 10, 45)
+    assert datetime.fromtimestamp(next_cron_time("0 9 * * 0", start)) == datetime(2024, 1, 7, 9, 0)
+    assert datetime.fromtimestamp(next_cron_time("0 0 29 2 *", start)) == datetime(2024, 2, 29, 0, 0)
+    for bad in ("* * * *", "60 * * * *", "a * * * *"):
+        with pytest.raises(ValueError):
+            parse_cron(bad)
+    with pytest.raises(ValueError):
+        get_download_schedule().add(0, "https://youtube.com/@channel", repeat="0 25 * * *")
+
+def test_scheduler_page_fires_on_due_time(qapp, temp_data_dir, mock_ffmpeg, monkeypatch, qtbot):
+    from PySide6.QtWidgets import QDialog
+    from ui.main_window import MainWindow
+    monkeypatch.setattr('ui.dialogs.profile_dialog.ProfileDialog.exec_', lambda self: QDialog.Accepted)
+    submitted = []
+    monkeypatch.setattr('core.dispatcher.DownloadDispatcher.submit', lambda self, task, row: submitted.append(task.url))
+    window = MainWindow(ffmpeg_found=True, ffmpeg_path="dummy")
+    page = window.page_scheduler
+
+    page.schedule_download(time.time() + 3600, "https://youtube.com/watch?v=later")
+    assert 3590 * 1000 < page.scheduler_timer.interval() <= 3600 * 1000
+    page.schedule_download(time.time() + 0.2, "https://youtube.com/watch?v=soon")
+    assert page.scheduler_timer.interval() <= 200
+
+    qtbot.waitUntil(lambda: submitted == ["https://youtube.com/watch?v=soon"], timeout=3000)
+    assert page.scheduler_table.item(1, 5).text() == "Started"
+    assert window.page_queue.queue_table.rowCount() == 1
+    window.close()
@@ -0,0 +1,42 @@
+from datetime import datetime
+from core.time_windows import TimeWindow, WindowPolicy, active_window, next_boundary
+
+class FakeDispatcher:
+    def __init__(self):
+        self.max_concurrent = None
+    def set_max_concurrent(self, value, preempt=False):
+        self.max_concurrent = value
+        self.preempt = preempt
+
+class FakeLimiter:
+    def __init__(self):
+        self.total = None
+    def configure(self, total=None, job_cap=None):
+        self.total = total
+
+def test_window_contains_and_wraps_over_midnight():
+    office = TimeWindow("09:00", "17:00")
+    night = TimeWindow("22:30", "06:00")
+    assert office.contains(9 * 60) and not office.contains(17 * 60)
+    assert night.contains(23 * 60) and night.contains(5 * 60 + 59) and not night.contains(6 * 60)
+    assert TimeWindow("00:00", "00:00").contains(12 * 60)
+    assert TimeWindow.from_dict(night.to_dict()).label() == "22:30-06:00"
+
+def test_active_window_and_next_boundary():
+    windows = [TimeWindow("01:00", "07:00", 8, 0), TimeWindow("09:00", "17:00", 1, 2 * 1024 ** 2)]
+    assert active_window(windows, datetime(2024, 5, 1, 3, 0)) is windows[0]
+    assert active_window(windows, datetime(2024, 5, 1, 8, 0)) is None
+    assert next_boundary(windows, datetime(2024, 5, 1, 8, 0)) == datetime(2024, 5, 1, 9, 0)
+    assert next_boundary(windows, datetime(2024, 5, 1, 17, 0)) == datetime(2024, 5, 2, 1, 0)
+    assert next_boundary([], datetime(2024, 5, 1, 8, 0)) is None
+
+def test_window_policy_limits(qapp):
+    windows = [TimeWindow("01:00", "07:00", 8, 0), TimeWindow("09:00", "17:00", None, 2 * 1024 ** 2)]
+    policy = WindowPolicy(FakeDispatcher(), FakeLimiter(), windows, max_concurrent=3, bandwidth=5 * 1024 ** 2)
+    assert policy.limits(datetime(2024, 5, 1, 2, 0)) == (8, 0)
+    assert policy.limits(datetime(2024, 5, 1, 10, 0)) == (3, 2 * 1024 ** 2)
+    assert policy.limits(datetime(2024, 5, 1, 20, 0)) == (3, 5 * 1024 ** 2)
+    policy.apply()
+    assert policy.dispatcher.preempt
+    assert (policy.dispatcher.max_concurrent, policy.limiter.total) == policy.limits()
+    assert policy.timer.isActive()
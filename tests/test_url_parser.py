@@ -0,0 +1,61 @@
+import pytest
+from core.url_parser import parse_url, canonical_url, video_key, lists_newest_first
+from core.extraction_cache import video_key_from_url
+
+@pytest.mark.parametrize("url", [
+    "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+    "youtube.com/watch?v=dQw4w9WgXcQ&t=42",
+    "https://youtu.be/dQw4w9WgXcQ?si=abc",
+    "https://m.youtube.com/shorts/dQw4w9WgXcQ",
+    "https://music.youtube.com/watch?v=dQw4w9WgXcQ&feature=share",
+    "https://www.youtube.com/embed/dQw4w9WgXcQ",
+])
+def test_video_links_share_one_id(url):
+    parsed = parse_url(url)
+    assert (parsed.kind, parsed.id) == ("video", "dQw4w9WgXcQ")
+    assert canonical_url(url) == "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+    assert video_key_from_url(url) == "Youtube:dQw4w9WgXcQ"
+
+def test_playlists_and_channels():
+    in_list = "https://www.youtube.com/watch?v=dQw4w9WgXcQ&list=PLabcdefghij"
+    assert canonical_url(in_list) == "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+    assert canonical_url(in_list, playlist=True) == "https://www.youtube.com/playlist?list=PLabcdefghij"
+    assert parse_url("https://www.youtube.com/playlist?list=PLabcdefghij").kind == "playlist"
+    assert canonical_url("https://www.youtube.com/@Some.Channel/videos") == "https://www.youtube.com/@Some.Channel/videos"
+    assert canonical_url("https://youtube.com/channel/UC" + "a" * 22 + "/about") == "https://www.youtube.com/channel/UC" + "a" * 22
+    assert canonical_url("https://www.youtube.com/user/someone") == "https://www.youtube.com/user/someone"
+    assert video_key("https://www.youtube.com/@Some.Channel") is None
+
+def test_other_sites_are_left_to_yt_dlp():
+    parsed = parse_url("https://vimeo.com/123456")
+    assert parsed.kind == "url"
+    assert canonical_url("vimeo.com/123456") == "https://vimeo.com/123456"
+
+@pytest.mark.parametrize("text", [
+    "", "not a link", "ftp://example.com/file",
+    "https://www.youtube.com/watch?v=short",
+    "https://youtu.be/",
+    "https://www.youtube.com/playlist",
+    "https://www.youtube.com/playlist?list=bad!",
+])
+def test_bad_input_is_rejected(text):
+    with pytest.raises(ValueError):
+        parse_url(text)
+
+def test_short_and_unknown_playlist_ids():
+    watch_later = "https://www.youtube.com/watch?v=dQw4w9WgXcQ&list=WL"
+    assert canonical_url(watch_later) == "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+    assert canonical_url(watch_later, playlist=True) == "https://www.youtube.com/playlist?list=WL"
+    assert canonical_url("https://www.youtube.com/playlist?list=LL") == "https://www.youtube.com/playlist?list=LL"
+    assert parse_url("https://youtu.be/dQw4w9WgXcQ?list=RDdQw4w9WgXcQ").playlist_id == "RDdQw4w9WgXcQ"
+    odd = "https://www.youtube.com/watch?v=dQw4w9WgXcQ&list=bad!"
+    assert canonical_url(odd) == "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+    with pytest.raises(ValueError):
+        canonical_url(odd, playlist=True)
+
+def test_lists_newest_first():
+    assert lists_newest_first("https://www.youtube.com/@SomeChannel/videos")
+    assert lists_newest_first("https://www.youtube.com/playlist?list=UUabcdefghijklmnopqrstuv")
+    assert not lists_newest_first("https://www.youtube.com/@SomeChannel/playlists")
+    assert not lists_newest_first("https://www.youtube.com/playlist?list=PLabcdefghij")
+    assert not lists_newest_first("https://vimeo.com/channels/staffpicks")
@@ -1,20 +1,124 @@
-from PySide6.QtWidgets import QDockWidget, QTextEdit
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QColor
+from PySide6.QtWidgets import QDockWidget, QPlainTextEdit
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtGui import QColor, QTextCharFormat, QTextCursor
+from collections import deque
 from datetime import datetime
+import threading
+
+# The view keeps this many lines; older ones are dropped as new ones arrive.
+MAX_LOG_LINES = 5000
+LOG_FLUSH_MS = 150
+
+LOG_COLORS = {
+    "debug": "#4D96FF",
+    "info": "#4D96FF",
+    "success": "#6BCB77",
+    "warning": "#FFD93D",
+    "error": "#FF4444",
+    "cancel": "#FF9F45",
+    "plain": "white"
+}
+
+
+
+def format_error_text(msg):
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return f"[{timestamp}] ❌ {msg}"
+
+
+def classify_log(text, level=None):
+    """Level and display text of a log message that is about to be shown.
+
+    Messages from yt-dlp come with their level; other messages are told
+    apart by their words.
+    """
+    if level is not None:
+        if level == "info":
+            if any(s in text.lower() for s in ["download completed", "has already been downloaded", "finished downloading", "merged", "success"]):
+                level = "success"
+        elif level == "warning":
+            text = f"⚠️ {text}"
+        elif level == "error":
+            text = format_error_text(text)
+        return level, text
+
+    lower = text.lower()
+    level = "plain"
+    if any(k in lower for k in ["error", "fail", "http status code"]):
+        level = "error"
+        text = format_error_text(text)
+    elif any(k in lower for k in ["warning", "warn"]):
+        level = "warning"
+        text = f"⚠️ {text}"
+    elif any(k in lower for k in ["completed", "success", "finished"]):
+        level = "success"
+        text = f"✅ {text}"
+    elif any(k in lower for k in ["started", "queued", "fetching", "downloading"]):
+        level = "info"
+        text = f"ℹ️ {text}"
+    elif "cancel" in lower:
+        level = "cancel"
+        text = f"🚫 {text}"
+
+    if "error details:" in lower:
+        lines = text.split("\n")
+        formatted_lines = []
+        for line in lines:
+            if ":" in line and not line.lower().startswith(("error type", "error details", "http status")):
+                formatted_lines.append("    " + line)
+            else:
+                formatted_lines.append(line)
+        text = "\n".join(formatted_lines)
+    return level, text
+
+
+class LogBuffer:
+    """Log records waiting for the next flush into the log view.
+
+    emit() stands in for a log signal and can be called from any thread, with
+    the level when the sender knows it. The buffer is bounded like the view
+    and records are only classified when they are flushed, so a flood of
+    verbose output costs at most one view's worth of work.
+    """
+    def __init__(self, maxlen=MAX_LOG_LINES):
+        self.lock = threading.Lock()
+        self.records = deque(maxlen=maxlen)
+
+    def emit(self, text, level=None):
+        with self.lock:
+            self.records.append((text, level))
+
+    def take(self):
+        """Classified (level, text) records since the last call."""
+        with self.lock:
+            records = list(self.records)
+            self.records.clear()
+        return [classify_log(text, level) for text, level in records]
+
 
 class LogDockManager:
-    def __init__(self, main_window):
+    def __init__(self, main_window, log_buffer=None):
         self.main_window = main_window
+        self.log_buffer = log_buffer or LogBuffer()
         self.log_dock = None
         self.log_text_edit = None
         self.log_dock_visible = False
+        self.formats = {}
+        for level, color in LOG_COLORS.items():
+            fmt = QTextCharFormat()
+            fmt.setForeground(QColor(color))
+            self.formats[level] = fmt
         self.init_log_dock()
+        self.flush_timer = QTimer(self.main_window)
+        self.flush_timer.setInterval(LOG_FLUSH_MS)
+        self.flush_timer.timeout.connect(self.flush)
+        self.flush_timer.start()
 
     def init_log_dock(self):
         self.log_dock = QDockWidget("Logs", self.main_window)
-        self.log_text_edit = QTextEdit()
+        self.log_text_edit = QPlainTextEdit()
         self.log_text_edit.setReadOnly(True)
+        self.log_text_edit.setMaximumBlockCount(MAX_LOG_LINES)
         self.log_dock.setWidget(self.log_text_edit)
         self.main_window.addDockWidget(Qt.BottomDockWidgetArea, self.log_dock)
         self.log_dock.hide()
@@ -28,64 +132,36 @@ class LogDockManager:
             self.log_dock_visible = True
 
     def append_log(self, text):
-        def get_timestamp():
-            return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        def format_error_text(msg):
-            timestamp = get_timestamp()
-            return f"[{timestamp}] ❌ {msg}"
-
-        color = "white"
-        
-        if text.startswith("[yt-dlp"):
-            if "[yt-dlp Debug]" in text:
-                color = "#4D96FF"
-            elif "[yt-dlp Info]" in text:
-                if any(s in text.lower() for s in ["download completed", "has already been downloaded", "finished downloading", "merged", "success"]):
-                    color = "#6BCB77"
-                else:
-                    color = "#4D96FF"
-            elif "[yt-dlp Warning]" in text:
-                color = "#FFD93D"
-                text = f"⚠️ {text}"
-            elif "[yt-dlp Error]" in text:
-                color = "#FF4444"
-                text = format_error_text(text)
-        else:
-            if any(k in text.lower() for k in ["error", "fail", "http status code"]):
-                color = "#FF4444"
-                text = format_error_text(text)
-            elif any(k in text.lower() for k in ["warning", "warn"]):
-                color = "#FFD93D"
-                text = f"⚠️ {text}"
-            elif any(k in text.lower() for k in ["completed", "success", "finished"]):
-                color = "#6BCB77"
-                text = f"✅ {text}"
-            elif any(k in text.lower() for k in ["started", "queued", "fetching", "downloading"]):
-                color = "#4D96FF"
-                text = f"ℹ️ {text}"
-            elif "cancel" in text.lower():
-                color = "#FF9F45"
-                text = f"🚫 {text}"
-
-        if "error details:" in text.lower():
-            lines = text.split("\n")
-            formatted_lines = []
-            for line in lines:
-                if ":" in line and not line.lower().startswith(("error type", "error details", "http status")):
-                    formatted_lines.append("    " + line)
-                else:
-                    formatted_lines.append(line)
-            text = "\n".join(formatted_lines)
-
-        self.log_text_edit.setTextColor(QColor(color))
-        self.log_text_edit.append(text)
-        self.log_text_edit.setTextColor(QColor("white"))
+        self.log_buffer.emit(text)
+
+    def flush(self):
+        records = self.log_buffer.take()
+        if not records:
+            return
 
         scrollbar = self.log_text_edit.verticalScrollBar()
-        scrollbar.setValue(scrollbar.maximum())
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 2
+
+        cursor = QTextCursor(self.log_text_edit.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.beginEditBlock()
+        for level, text in records:
+            if not self.log_text_edit.document().isEmpty():
+                cursor.insertBlock()
+            cursor.insertText(text, self.formats[level])
+        cursor.endEditBlock()
+
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
 
-        if "[yt-dlp Error]" in text or ("error" in text.lower() and not text.startswith("[yt-dlp")):
-            self.main_window.tray_manager.show_error_message(text)
-        elif "playlist indexing in progress" in text.lower():
-            self.main_window.tray_manager.show_playlist_indexing_message() 
\ No newline at end of file
+        last_error = None
+        indexing = False
+        for level, text in records:
+            if level == "error":
+                last_error = text
+            elif "playlist indexing in progress" in text.lower():
+                indexing = True
+        if last_error:
+            self.main_window.tray_manager.show_error_message(last_error)
+        elif indexing:
+            self.main_window.tray_manager.show_playlist_indexing_message()
@@ -5,6 +5,7 @@ import zipfile
 from PySide6.QtWidgets import QFileDialog, QMessageBox
 from PySide6.QtCore import Qt
 from core.utils import get_data_dir
+from ui.pages.settings_page import AUTO_CONCURRENCY
 
 class ProfileManager:
     def __init__(self, main_window):
@@ -79,8 +80,8 @@ class ProfileManager:
 
             history_file = os.path.join(temp_dir, "history.json")
             if os.path.exists(history_file):
-                data_dir = get_data_dir()
-                shutil.copy2(history_file, os.path.join(data_dir, "history.json"))
+                from core.history_store import get_history_store
+                get_history_store().import_file(history_file)
 
             pic_file = os.path.join(temp_dir, "profile_picture.png")
             if os.path.exists(pic_file):
@@ -98,7 +99,7 @@ class ProfileManager:
                 if hasattr(self.main_window.page_settings, 'proxy_edit'):
                     self.main_window.page_settings.proxy_edit.setText(self.user_profile.get_proxy())
                 self.main_window.update_profile_ui()
-                if hasattr(self.main_window, 'page_history') and hasattr(self.main_window.page_history, 'history_table'):
+                if hasattr(self.main_window, 'page_history') and hasattr(self.main_window.page_history, 'history_model'):
                     self.main_window.initialize_history()
                 self.main_window.theme_manager.apply_current_theme()
             except Exception as ui_error:
@@ -114,9 +115,8 @@ class ProfileManager:
         if os.path.exists(self.user_profile.profile_path):
             os.remove(self.user_profile.profile_path)
         
-        from core.history import HISTORY_FILE
-        if os.path.exists(HISTORY_FILE):
-            os.remove(HISTORY_FILE)
+        from core.history_store import get_history_store
+        get_history_store().clear()
             
         if self.user_profile.data.get("profile_picture") and os.path.exists(self.user_profile.data["profile_picture"]):
             try:
@@ -144,10 +144,13 @@ class ProfileManager:
             self.user_profile.set_profile(self.user_profile.data["name"], self.user_profile.data["profile_picture"], folder)
             self.main_window.page_settings.download_path_edit.setText(folder)
             self.main_window.append_log(f"Download path changed to {folder}")
+            self.main_window.scan_library()
 
     def set_max_concurrent_downloads(self, idx):
         val = self.main_window.page_settings.concurrent_combo.currentText()
-        self.main_window.max_concurrent_downloads = int(val)
+        self.main_window.set_auto_concurrency(val == AUTO_CONCURRENCY)
+        if val != AUTO_CONCURRENCY:
+            self.main_window.max_concurrent_downloads = int(val)
         self.main_window.append_log(f"Max concurrent downloads set to {val}")
 
     def apply_resolution(self):
@@ -4,7 +4,8 @@ from ui.components.search_popup import SearchPopup
 
 class SearchSystem:
     search_map = {
-        "proxy": (4, "You can find the proxy setting in the Settings page. Manage your connection speed or access by entering your proxy address or bandwidth limit under Settings > Proxy/BW. Don't forget to click 'Apply' after making changes."),
+        "proxy": (4, "You can find the proxy setting in the Settings page. Enter your proxy address under Settings > Proxy. Don't forget to click 'Apply' after making changes."),
+        "bandwidth": (4, "Limit the download speed in the Settings page under Bandwidth: a total for all downloads, shared among the running ones, and an optional limit per download. Changes apply to running downloads right away."),
         "home": (0, "Home page: Overview of YoutubeGO, quick start guide, and general information. See the main features and latest updates here."),
         "video": (1, "Video Page: Download videos in MP4 format. Paste your link and use 'Download Single Video' or 'Download Playlist Video' to save videos to your default folder."),
         "audio": (2, "Audio Page: Download audio only. Paste your link and use 'Download Single Audio' or 'Download Playlist Audio' to save audio files. Ideal for music and podcasts."),
@@ -1,5 +1,4 @@
 from .profile_dialog import ProfileDialog
-from .queue_add_dialog import QueueAddDialog
 from .schedule_add_dialog import ScheduleAddDialog
 
-__all__ = ['ProfileDialog', 'QueueAddDialog', 'ScheduleAddDialog'] 
\ No newline at end of file
+__all__ = ['ProfileDialog', 'ScheduleAddDialog'] 
\ No newline at end of file
@@ -5,7 +5,14 @@ from PySide6.QtGui import QAction, QIcon, QFont, QPixmap, QPainter, QColor
 from core.profile import UserProfile
 from core.utils import set_circular_pixmap, format_speed, format_time
 from core.downloader import DownloadTask, DownloadQueueWorker
-from core.history import load_history_initial, save_history, add_history_entry, delete_selected_history, delete_all_history, search_history
+from core.dispatcher import DownloadDispatcher
+from core.progress_board import ProgressBoard
+from core.library_index import LibraryScanner
+from core.url_parser import canonical_url
+from core.bandwidth import get_bandwidth_limiter
+from core.time_windows import TimeWindow, WindowPolicy
+from core.concurrency import AdaptiveConcurrency, get_transfer_stats, MAX_SLOTS
+from core.history import load_history_initial, add_history_entry, delete_selected_history, delete_all_history, search_history
 from core.utils import get_data_dir
 from core.version import get_version
 from core.updater import UpdateManager
@@ -22,20 +29,22 @@ from ui.components.animated_button import AnimatedButton
 from ui.components.drag_drop_line_edit import DragDropLineEdit
 from ui.components.tray_icon import TrayIconManager
 from ui.components.menu_bar import MenuBarManager
-from ui.components.log_dock import LogDockManager
-from ui.dialogs import ProfileDialog, QueueAddDialog, ScheduleAddDialog
+from ui.components.log_dock import LogDockManager, LogBuffer
+from ui.dialogs import ProfileDialog, ScheduleAddDialog
 from ui.layouts import StatusBarLayout, SideMenuLayout, TopBarLayout
 from ui.components.theme_manager import ThemeManager
 from ui.components.search_system import SearchSystem
 from ui.components.profile_manager import ProfileManager
 
 os.environ["QT_AUTO_SCREEN_SCALE_FACTOR"] = "1"
+# About 15 repaints per second, however fast the downloads report.
+PROGRESS_REFRESH_MS = 66
 
 class MainWindow(QMainWindow):
-    progress_signal = Signal(int, float)
-    status_signal = Signal(int, str)
-    log_signal = Signal(str)
-    info_signal = Signal(int, str, str)
+    # Rows are object-typed because downloads started outside the queue page
+    # report with row None.
+    status_signal = Signal(object, str)
+    info_signal = Signal(object, str, str)
     def __init__(self, ffmpeg_found=None, ffmpeg_path=None):
         super().__init__()
         self.setWindowTitle(f"YoutubeGO {get_version()}")
@@ -53,11 +62,32 @@ class MainWindow(QMainWindow):
         self.ffmpeg_label = QLabel()
         self.user_profile = UserProfile()
         self.thread_pool = QThreadPool()
-        self.active_workers = []
-        self.max_concurrent_downloads = 3
-        self.progress_signal.connect(self.update_progress)
+        # Progress is not signalled per chunk: workers overwrite their row in
+        # the board and the UI repaints changed rows at a fixed rate.
+        self.progress_board = ProgressBoard()
+        self.progress_timer = QTimer(self)
+        self.progress_timer.setInterval(PROGRESS_REFRESH_MS)
+        self.progress_timer.timeout.connect(self.flush_progress)
+        self.progress_timer.start()
+        # Log records are buffered the same way and flushed by the log dock.
+        self.log_buffer = LogBuffer()
+        self.dispatcher = DownloadDispatcher(self.thread_pool, self.progress_board, self.status_signal, self.log_buffer, self.info_signal, self.user_profile, max_concurrent=3, host_limits=self.user_profile.get_host_limits(), parent=self)
+        self.dispatcher.set_process_mode(self.user_profile.get_process_mode())
+        get_bandwidth_limiter().configure(self.user_profile.get_bandwidth_limit(), self.user_profile.get_job_bandwidth_limit())
+        # Slots and bandwidth follow the time windows; the settings are what
+        # applies outside of them.
+        self.window_policy = WindowPolicy(self.dispatcher, get_bandwidth_limiter(),
+                                          [TimeWindow.from_dict(w) for w in self.user_profile.get_time_windows()],
+                                          max_concurrent=3, bandwidth=self.user_profile.get_bandwidth_limit(),
+                                          log=self.log_buffer.emit, parent=self)
+        self.adaptive_concurrency = AdaptiveConcurrency(self.dispatcher, get_bandwidth_limiter(), get_transfer_stats(),
+                                                        log=self.log_buffer.emit, parent=self)
+        self.window_policy.adaptive = self.adaptive_concurrency
+        if self.user_profile.get_auto_concurrency():
+            self.set_auto_concurrency(True)
+        else:
+            self.window_policy.apply()
         self.status_signal.connect(self.update_status)
-        self.log_signal.connect(self.append_log)
         self.info_signal.connect(self.update_queue_info)
         self.theme_manager = ThemeManager(self)
         
@@ -69,7 +99,7 @@ class MainWindow(QMainWindow):
         self.tray_manager = TrayIconManager(self)
         self.tray_manager.show_ffmpeg_warning()
         self.menu_bar_manager = MenuBarManager(self)
-        self.log_manager = LogDockManager(self)
+        self.log_manager = LogDockManager(self, self.log_buffer)
         
        
         self.init_ui()
@@ -79,6 +109,19 @@ class MainWindow(QMainWindow):
             
       
         QTimer.singleShot(2000, self.check_for_updates)
+    @property
+    def max_concurrent_downloads(self):
+        return self.window_policy.base_concurrent
+    @max_concurrent_downloads.setter
+    def max_concurrent_downloads(self, value):
+        self.window_policy.set_base(max_concurrent=value)
+    def set_auto_concurrency(self, enabled):
+        # In auto mode the slot count is picked between 1 and the time
+        # window's limit, or MAX_SLOTS outside of windows.
+        self.user_profile.set_auto_concurrency(enabled)
+        self.adaptive_concurrency.set_enabled(enabled)
+        if enabled:
+            self.window_policy.set_base(max_concurrent=MAX_SLOTS)
     def init_ui(self):
         self.status_bar_layout = StatusBarLayout(self)
         self.progress_bar = self.status_bar_layout.progress_bar
@@ -129,6 +172,11 @@ class MainWindow(QMainWindow):
         
         main_layout.addWidget(bottom_area)
         self.search_system = SearchSystem(self)
+        self.page_queue.restore_jobs()
+        self.scan_library()
+    def scan_library(self):
+        # Picks up files added to or removed from the download folder outside the app.
+        QThreadPool.globalInstance().start(LibraryScanner(self.user_profile.get_download_path(), self.log_buffer))
     def create_page_home(self):
         return HomePage(self)
     def create_page_mp4(self):
@@ -152,54 +200,27 @@ class MainWindow(QMainWindow):
     def prompt_user_profile(self):
         dialog = ProfileDialog(self)
         dialog.exec_()
-    def add_queue_item_dialog(self):
-        dialog = QueueAddDialog(self)
-        dialog.exec_()
     def add_scheduled_dialog(self):
         dialog = ScheduleAddDialog(self)
         dialog.exec_()
     def start_queue(self):
-        count_started = 0
-        for r in range(self.queue_table.rowCount()):
-            st_item = self.queue_table.item(r, 4)
-            if st_item and ("Queued" in st_item.text() or "0%" in st_item.text()):
-                if count_started < self.max_concurrent_downloads:
-                    url = self.queue_table.item(r, 2).text()
-                    typ = self.queue_table.item(r, 3).text().lower()
-                    audio = ("audio" in typ)
-                    playlist = ("playlist" in typ)
-                    current_format = "mp4"
-                    row_idx = r
-                    tsk = DownloadTask(url, self.user_profile.get_default_resolution(), self.user_profile.get_download_path(), self.user_profile.get_proxy(), audio_only=audio, playlist=playlist, output_format=current_format, audio_format=self.user_profile.get_audio_format() if audio else None, audio_quality=self.user_profile.get_audio_quality() if audio else "320", from_queue=True)
-                    self.run_task(tsk, row_idx)
-                    self.queue_table.setItem(r, 4, QTableWidgetItem("Started"))
-                    count_started += 1
-        self.append_log("Queue started.")
+        self.page_queue.start_queue()
     def remove_scheduled_item(self):
         sel = set()
         for it in self.scheduler_table.selectedItems():
             sel.add(it.row())
         for r in sorted(sel, reverse=True):
             self.scheduler_table.removeRow(r)
-    def check_scheduled_downloads(self):
-        now = QDateTime.currentDateTime()
-        for r in range(self.scheduler_table.rowCount()):
-            dt_str = self.scheduler_table.item(r, 0).text()
-            scheduled_dt = QDateTime.fromString(dt_str, "yyyy-MM-dd HH:mm:ss")
-            st_item = self.scheduler_table.item(r, 4)
-            if st_item and scheduled_dt <= now and st_item.text() == "Scheduled":
-                u = self.scheduler_table.item(r, 1).text()
-                t = self.scheduler_table.item(r, 2).text().lower()
-                s = (self.scheduler_table.item(r, 3).text() == "Yes")
-                audio = ("audio" in t)
-                task = DownloadTask(u, self.user_profile.get_default_resolution(), self.user_profile.get_download_path(), self.user_profile.get_proxy(), audio_only=audio, playlist=False, subtitles=s, audio_format=self.user_profile.get_audio_format() if audio else None, audio_quality=self.user_profile.get_audio_quality() if audio else "320", from_queue=True)
-                self.run_task(task, r)
-                self.scheduler_table.setItem(r, 4, QTableWidgetItem("Started"))
     def start_download_simple(self, url_edit, audio=False, playlist=False):
         link = url_edit.text().strip()
         if not link:
             QMessageBox.warning(self, "Error", "No URL given.")
             return
+        try:
+            link = canonical_url(link, playlist)
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
         task = DownloadTask(link, self.user_profile.get_default_resolution(), self.user_profile.get_download_path(), self.user_profile.get_proxy(), audio_only=audio, playlist=playlist, audio_format=self.user_profile.get_audio_format() if audio else None, audio_quality=self.user_profile.get_audio_quality() if audio else "320", from_queue=False)
         # History will be written directly by the downloader
         self.run_task(task, None)
@@ -211,13 +232,20 @@ class MainWindow(QMainWindow):
             self.update_status(row, "Preparing Download...")
             self.tray_manager.show_message("Download", "Preparing to download...")
         
-        worker = DownloadQueueWorker(task, row, self.progress_signal, self.status_signal, self.log_signal, self.info_signal, self.user_profile)
-        self.thread_pool.start(worker)
-        self.active_workers.append(worker)
-    def update_progress(self, row, percent):
+        self.dispatcher.submit(task, row)
+    def flush_progress(self):
+        for row, percent in self.progress_board.take().items():
+            self.update_progress(row, percent)
+    def set_queue_cell(self, row, text):
         if row is not None and hasattr(self, 'page_queue') and hasattr(self.page_queue, 'queue_table'):
             if row < self.page_queue.queue_table.rowCount():
-                self.page_queue.queue_table.setItem(row, 4, QTableWidgetItem(f"{int(percent)}%"))
+                item = self.page_queue.queue_table.item(row, 4)
+                if item is None:
+                    self.page_queue.queue_table.setItem(row, 4, QTableWidgetItem(text))
+                elif item.text() != text:
+                    item.setText(text)
+    def update_progress(self, row, percent):
+        self.set_queue_cell(row, f"{int(percent)}%")
         
         if not self.progress_bar.isVisible():
             self.progress_bar.setVisible(True)
@@ -225,9 +253,10 @@ class MainWindow(QMainWindow):
         self.progress_bar.setValue(int(percent))
         self.progress_bar.setFormat(f"Downloading... {int(percent)}%")
     def update_status(self, row, st):
-        if row is not None and hasattr(self, 'page_queue') and hasattr(self.page_queue, 'queue_table'):
-            if row < self.page_queue.queue_table.rowCount():
-                self.page_queue.queue_table.setItem(row, 4, QTableWidgetItem(st))
+        self.progress_board.discard(row)
+        self.set_queue_cell(row, st)
+        if row is not None and hasattr(self, 'page_queue'):
+            self.page_queue.record_status(row, st)
         
         if "Download Completed" in st:
             self.progress_bar.setVisible(True)
@@ -265,7 +294,6 @@ class MainWindow(QMainWindow):
             self.progress_bar.setValue(0)
         if "Download Completed" in st:
             self.tray_manager.show_download_completed_message()
-            # History page refreshes automatically via showEvent when visible
             user_choice = QMessageBox.question(self, "Download Completed", "Open Download Folder?", QMessageBox.Yes | QMessageBox.No)
             if user_choice == QMessageBox.Yes:
                 self.open_download_folder()
@@ -309,12 +337,11 @@ class MainWindow(QMainWindow):
         if os.path.exists(self.user_profile.profile_path):
             os.remove(self.user_profile.profile_path)
         
-        from core.history import HISTORY_FILE
-        if os.path.exists(HISTORY_FILE):
-            os.remove(HISTORY_FILE)
+        from core.history_store import get_history_store
+        get_history_store().clear()
             
-        if hasattr(self, 'page_history') and hasattr(self.page_history, 'history_table'):
-            self.page_history.history_table.setRowCount(0)
+        if hasattr(self, 'page_history') and hasattr(self.page_history, 'history_model'):
+            self.page_history.history_model.reload()
             
         if self.user_profile.data.get("profile_picture") and os.path.exists(self.user_profile.data["profile_picture"]):
             try:
@@ -351,18 +378,19 @@ class MainWindow(QMainWindow):
             self.user_profile.set_profile(self.user_profile.data["name"], self.user_profile.data["profile_picture"], folder)
             self.download_path_edit.setText(folder)
             self.append_log(f"Download path changed to {folder}")
+            self.scan_library()
     def cancel_active(self):
-        for w in self.active_workers:
-            w.cancel = True
+        self.dispatcher.cancel_all()
     def initialize_history(self):
        
-        if hasattr(self, 'page_history') and hasattr(self.page_history, 'history_table'):
+        if hasattr(self, 'page_history') and hasattr(self.page_history, 'history_model'):
             from core.history import load_history_initial
-            load_history_initial(self.page_history.history_table)
+            load_history_initial(self.page_history.history_model)
 
     def quit_app(self):
         if hasattr(self, 'tray_manager'):
             self.tray_manager.hide()
+        self.dispatcher.shutdown()
         QApplication.quit()
 
     def closeEvent(self, event):
@@ -386,9 +414,9 @@ class MainWindow(QMainWindow):
         return QMessageBox.question(self, title, message) == QMessageBox.Yes
 
     def add_history_entry(self, url, title="", channel=""):
-        if hasattr(self, 'page_history') and hasattr(self.page_history, 'history_table'):
+        if hasattr(self, 'page_history') and hasattr(self.page_history, 'history_model'):
             from core.history import add_history_entry
-            add_history_entry(self.page_history.history_table, title, channel, url, True)
+            add_history_entry(self.page_history.history_model, title, channel, url, True)
 
     def check_for_updates(self):
         self.update_manager.check_for_updates()
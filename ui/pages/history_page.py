@@ -1,10 +1,13 @@
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-                            QTableWidget, QTableWidgetItem, QHeaderView, 
+                            QTableView, QHeaderView, QAbstractItemView,
                             QCheckBox, QLineEdit)
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer
 from PySide6.QtGui import QFont
 from ui.components.animated_button import AnimatedButton
-from core.history import delete_selected_history, delete_all_history, search_history, load_history_initial
+from core.history import HistoryTableModel, delete_selected_history, delete_all_history, search_history
+
+# Searching waits until typing pauses for this long.
+SEARCH_DEBOUNCE_MS = 250
 
 class HistoryPage(QWidget):
     def __init__(self, parent=None):
@@ -22,12 +25,16 @@ class HistoryPage(QWidget):
         layout.addWidget(lbl)
         
         # History table
-        self.history_table = QTableWidget()
-        self.history_table.setColumnCount(3)
-        self.history_table.setHorizontalHeaderLabels(["Title", "Channel", "URL"])
+        self.history_model = HistoryTableModel(parent=self)
+        self.history_table = QTableView()
+        self.history_table.setModel(self.history_model)
+        self.history_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.history_table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.history_table.setSortingEnabled(True)
+        self.history_table.verticalHeader().setDefaultSectionSize(24)
         hh = self.history_table.horizontalHeader()
         hh.setSectionResizeMode(0, QHeaderView.Stretch)  # Title column stretches
-        hh.setSectionResizeMode(1, QHeaderView.ResizeToContents)  # Channel column fits content
+        hh.setSectionResizeMode(1, QHeaderView.Interactive)  # Channel column is sized by the user, fitting it would read every row
         hh.setSectionResizeMode(2, QHeaderView.Stretch)  # URL column stretches
         layout.addWidget(self.history_table)
         
@@ -36,7 +43,7 @@ class HistoryPage(QWidget):
         del_sel_btn = AnimatedButton("Delete Selected")
         del_sel_btn.clicked.connect(lambda: delete_selected_history(self.history_table, self.parent.append_log))
         del_all_btn = AnimatedButton("Delete All")
-        del_all_btn.clicked.connect(lambda: delete_all_history(self.history_table, self.confirm_delete_all, self.parent.append_log))
+        del_all_btn.clicked.connect(lambda: delete_all_history(self.history_model, self.confirm_delete_all, self.parent.append_log))
         hl.addWidget(del_sel_btn)
         hl.addWidget(del_all_btn)
         layout.addLayout(hl)
@@ -44,7 +51,13 @@ class HistoryPage(QWidget):
         # Search
         s_hl = QHBoxLayout()
         self.search_hist_edit = QLineEdit()
-        self.search_hist_edit.setPlaceholderText("Search in history (title, channel, or URL)...")
+        self.search_hist_edit.setPlaceholderText("Search in history (title, channel, or URL; e.g. channel:name)...")
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.search_history_in_table)
+        self.search_hist_edit.textChanged.connect(self.search_timer.start)
+        self.search_hist_edit.returnPressed.connect(self.search_history_in_table)
         s_btn = AnimatedButton("Search")
         s_btn.clicked.connect(self.search_history_in_table)
         s_hl.addWidget(self.search_hist_edit)
@@ -53,20 +66,13 @@ class HistoryPage(QWidget):
         
         layout.addStretch()
         
-        # Load history
-        load_history_initial(self.history_table)
-
-    def showEvent(self, event):
-        
-        super().showEvent(event)
-        self.history_table.setRowCount(0)  
-        load_history_initial(self.history_table)  
-        if self.parent:
-            self.parent.append_log("History refreshed")
+        # Loaded once by MainWindow.initialize_history, then kept up to date by the model
+        self.history_model.watch_store()
 
     def search_history_in_table(self):
+        self.search_timer.stop()
         txt = self.search_hist_edit.text().lower().strip()
-        search_history(self.history_table, txt)
+        search_history(self.history_model, txt)
 
     def confirm_delete_all(self):
         return self.parent.show_question("Delete All", "Are you sure?") 
\ No newline at end of file
@@ -2,6 +2,7 @@ from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QFont
 from core.downloader import DownloadTask
+from core.url_parser import canonical_url
 from ui.components.animated_button import AnimatedButton
 from ui.components.drag_drop_line_edit import DragDropLineEdit
 
@@ -45,6 +46,11 @@ class VideoPage(QWidget):
         if not link:
             self.parent.show_warning("Error", "No URL given.")
             return
+        try:
+            link = canonical_url(link, playlist)
+        except ValueError as e:
+            self.parent.show_warning("Error", str(e))
+            return
             
         task = DownloadTask(
             link, 
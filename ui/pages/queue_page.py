@@ -5,12 +5,19 @@ from PySide6.QtCore import Qt
 from PySide6.QtGui import QFont
 from ui.components.animated_button import AnimatedButton
 from ui.components.drag_drop_line_edit import DragDropLineEdit
-from core.downloader import DownloadTask
+from core.downloader import DownloadTask, PAUSED, job_state
+from core.extraction_cache import get_extraction_cache
+from core.job_journal import get_job_journal
+from core.url_parser import canonical_url
+import os
 
 class QueuePage(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent = parent
+        # Task and last journalled state of each queue row.
+        self.jobs = {}
+        self.job_states = {}
         self.init_ui()
 
     def init_ui(self):
@@ -24,16 +31,21 @@ class QueuePage(QWidget):
         
         
         self.queue_table = QTableWidget()
-        self.queue_table.setColumnCount(5)
-        self.queue_table.setHorizontalHeaderLabels(["Title","Channel","URL","Type","Progress"])
+        self.queue_table.setColumnCount(6)
+        self.queue_table.setHorizontalHeaderLabels(["Title","Channel","URL","Type","Progress","Priority"])
         hh = self.queue_table.horizontalHeader()
         hh.setSectionResizeMode(0, QHeaderView.Stretch)
         hh.setSectionResizeMode(1, QHeaderView.ResizeToContents)
         hh.setSectionResizeMode(2, QHeaderView.Stretch)
         hh.setSectionResizeMode(3, QHeaderView.ResizeToContents)
         hh.setSectionResizeMode(4, QHeaderView.Stretch)
+        hh.setSectionResizeMode(5, QHeaderView.ResizeToContents)
         layout.addWidget(self.queue_table)
-        
+
+        self.stats_label = QLabel("Queued: 0 | Running: 0 | Avg wait: 0s")
+        self.stats_label.setAlignment(Qt.AlignRight)
+        layout.addWidget(self.stats_label)
+        self.parent.dispatcher.stats_changed.connect(self.update_stats)
         
         hl = QHBoxLayout()
         b_add = AnimatedButton("Add to Queue")
@@ -46,6 +58,25 @@ class QueuePage(QWidget):
         hl.addWidget(b_start)
         hl.addWidget(b_cancel)
         layout.addLayout(hl)
+
+        p_hl = QHBoxLayout()
+        b_top = AnimatedButton("Move to Top")
+        b_top.clicked.connect(self.move_selected_to_top)
+        b_up = AnimatedButton("Raise Priority")
+        b_up.clicked.connect(lambda: self.change_selected_priority(1))
+        b_down = AnimatedButton("Lower Priority")
+        b_down.clicked.connect(lambda: self.change_selected_priority(-1))
+        b_pause = AnimatedButton("Pause")
+        b_pause.clicked.connect(self.pause_selected)
+        b_pause.setToolTip("Stops the selected downloads and frees their slots;\nthe data downloaded so far is kept.")
+        b_resume = AnimatedButton("Resume")
+        b_resume.clicked.connect(self.resume_selected)
+        p_hl.addWidget(b_top)
+        p_hl.addWidget(b_up)
+        p_hl.addWidget(b_down)
+        p_hl.addWidget(b_pause)
+        p_hl.addWidget(b_resume)
+        layout.addLayout(p_hl)
         
         layout.addStretch()
 
@@ -86,6 +117,11 @@ class QueuePage(QWidget):
             audio_only = c_audio.isChecked()
             playlist = c_pl.isChecked()
             subtitles = c_subs.isChecked()
+            try:
+                url = canonical_url(url, playlist)
+            except ValueError as e:
+                self.parent.show_warning("Error", str(e))
+                return
            
             output_format = self.parent.user_profile.get_audio_format() if audio_only else fmt_combo.currentText()
             
@@ -103,19 +139,10 @@ class QueuePage(QWidget):
                 from_queue=True
             )
             
-            row = self.queue_table.rowCount()
-            self.queue_table.insertRow(row)
-            self.queue_table.setItem(row, 0, QTableWidgetItem("Fetching..."))
-            self.queue_table.setItem(row, 1, QTableWidgetItem("Fetching..."))
-            self.queue_table.setItem(row, 2, QTableWidgetItem(url))
-            
             download_type = "Audio" if audio_only else "Video"
             if playlist:
                 download_type += " - Playlist"
-            self.queue_table.setItem(row, 3, QTableWidgetItem(download_type))
-            self.queue_table.setItem(row, 4, QTableWidgetItem("0%"))
-            
-            self.parent.run_task(task, row)
+            self.enqueue(task, download_type)
             d.accept()
             
         def on_cancel():
@@ -125,34 +152,140 @@ class QueuePage(QWidget):
         b_cancel.clicked.connect(on_cancel)
         d.exec()
 
+    def enqueue(self, task, download_type):
+        """Add a job to the queue and the journal and submit it."""
+        meta = get_extraction_cache().lookup_metadata(task.url) or {}
+        get_job_journal().add(task, meta.get("title") or "", meta.get("uploader") or "", download_type)
+        row = self.add_row(task, meta.get("title") or "Fetching...", meta.get("uploader") or "Fetching...", download_type)
+        self.parent.run_task(task, row)
+        return row
+
+    def add_row(self, task, title, channel, download_type, status="0%"):
+        row = self.queue_table.rowCount()
+        self.queue_table.insertRow(row)
+        self.queue_table.setItem(row, 0, QTableWidgetItem(title))
+        self.queue_table.setItem(row, 1, QTableWidgetItem(channel))
+        self.queue_table.setItem(row, 2, QTableWidgetItem(task.url))
+        self.queue_table.setItem(row, 3, QTableWidgetItem(download_type))
+        self.queue_table.setItem(row, 4, QTableWidgetItem(status))
+        self.queue_table.setItem(row, 5, QTableWidgetItem(str(task.priority)))
+        self.jobs[row] = task
+        return row
+
+    def selected_rows(self):
+        return sorted({it.row() for it in self.queue_table.selectedItems()})
+
+    def set_row_priority(self, row, priority):
+        task = self.jobs.get(row)
+        if task is None:
+            return
+        task.priority = priority
+        self.queue_table.setItem(row, 5, QTableWidgetItem(str(priority)))
+        # Takes effect for jobs still waiting; running ones keep their slot.
+        self.parent.dispatcher.set_priority(row, priority)
+        if task.job_id:
+            get_job_journal().set_priority(task.job_id, priority)
+
+    def change_selected_priority(self, delta):
+        for row in self.selected_rows():
+            if row in self.jobs:
+                self.set_row_priority(row, self.jobs[row].priority + delta)
+
+    def move_selected_to_top(self):
+        rows = [row for row in self.selected_rows() if row in self.jobs]
+        if not rows:
+            return
+        top = max(task.priority for task in self.jobs.values()) + 1
+        for row in rows:
+            self.set_row_priority(row, top)
+
+    def pause_selected(self):
+        paused = [row for row in self.selected_rows() if self.parent.dispatcher.pause(row)]
+        if paused:
+            self.parent.append_log(f"Pausing {len(paused)} download(s).")
+
+    def resume_selected(self):
+        resumed = 0
+        for row in self.selected_rows():
+            if self.parent.dispatcher.resume(row):
+                resumed += 1
+            elif row in self.jobs and self.job_states.get(row) == "paused" and not self.parent.dispatcher.is_tracked(row):
+                # Paused in an earlier session.
+                self.parent.run_task(self.jobs[row], row)
+                resumed += 1
+        if resumed:
+            self.parent.append_log(f"Resumed {resumed} download(s).")
+
+    def restore_jobs(self):
+        """Put the jobs left unfinished by the last run back into the queue and start them."""
+        jobs = get_job_journal().restore()
+        for job in jobs:
+            task = DownloadTask.from_dict(dict(job["task"], job_id=job["id"]))
+            if job["state"] == "paused":
+                # Stays paused until resumed.
+                row = self.add_row(task, job["title"] or "Fetching...", job["channel"] or "Fetching...", job["kind"], PAUSED)
+                self.job_states[row] = "paused"
+                continue
+            row = self.add_row(task, job["title"] or "Fetching...", job["channel"] or "Fetching...", job["kind"], "Queued")
+            parts = [p for p in job["parts"] if os.path.exists(p)]
+            if parts:
+                self.parent.append_log(f"Resuming {task.url} from {len(parts)} partial file(s).")
+            self.parent.run_task(task, row)
+        if jobs:
+            self.parent.append_log(f"Restored {len(jobs)} unfinished download(s) from the last session.")
+
+    def record_status(self, row, status):
+        task = self.jobs.get(row)
+        if task is None or not task.job_id:
+            return
+        state = job_state(status)
+        if self.job_states.get(row) == state:
+            return
+        self.job_states[row] = state
+        get_job_journal().update(task.job_id, state)
+
     def start_queue(self):
         count_started = 0
         for row in range(self.queue_table.rowCount()):
             status_item = self.queue_table.item(row, 4)
             if status_item and ("Queued" in status_item.text() or "0%" in status_item.text()):
-                if count_started < self.parent.max_concurrent_downloads:
-                    url = self.queue_table.item(row, 2).text()
-                    type_text = self.queue_table.item(row, 3).text().lower()
-                    audio_only = ("audio" in type_text)
-                    playlist = ("playlist" in type_text)
-                    
-                    output_format = self.parent.user_profile.get_audio_format() if audio_only else "mp4"
-                    
-                    task = DownloadTask(
-                        url,
-                        self.parent.user_profile.get_default_resolution(),
-                        self.parent.user_profile.get_download_path(),
-                        self.parent.user_profile.get_proxy(),
-                        audio_only=audio_only,
-                        playlist=playlist,
-                        output_format=output_format,
-                        audio_format=self.parent.user_profile.get_audio_format() if audio_only else None,
-                        audio_quality=self.parent.user_profile.get_audio_quality() if audio_only else "320",
-                        from_queue=True
-                    )
-                    
-                    self.parent.run_task(task, row)
-                    self.queue_table.setItem(row, 4, QTableWidgetItem("Started"))
-                    count_started += 1
+                if self.parent.dispatcher.is_tracked(row):
+                    continue
+                task = self.jobs.get(row)
+                if task is None:
+                    task = self.task_from_row(row)
+                    get_job_journal().add(task, self.queue_table.item(row, 0).text(), self.queue_table.item(row, 1).text(), self.queue_table.item(row, 3).text())
+                    self.jobs[row] = task
+                    self.queue_table.setItem(row, 5, QTableWidgetItem(str(task.priority)))
+                
+                self.parent.run_task(task, row)
+                count_started += 1
                     
-        self.parent.append_log("Queue started.") 
\ No newline at end of file
+        self.parent.append_log(f"Queue started: {count_started} item(s) submitted.")
+
+    def task_from_row(self, row):
+        url = self.queue_table.item(row, 2).text()
+        type_text = self.queue_table.item(row, 3).text().lower()
+        audio_only = ("audio" in type_text)
+        playlist = ("playlist" in type_text)
+        
+        output_format = self.parent.user_profile.get_audio_format() if audio_only else "mp4"
+        
+        return DownloadTask(
+            url,
+            self.parent.user_profile.get_default_resolution(),
+            self.parent.user_profile.get_download_path(),
+            self.parent.user_profile.get_proxy(),
+            audio_only=audio_only,
+            playlist=playlist,
+            output_format=output_format,
+            audio_format=self.parent.user_profile.get_audio_format() if audio_only else None,
+            audio_quality=self.parent.user_profile.get_audio_quality() if audio_only else "320",
+            from_queue=True
+        )
+
+    def update_stats(self, queued, running, average_wait):
+        self.stats_label.setText(
+            f"Queued: {queued} | Running: {running}/{self.parent.dispatcher.max_concurrent}"
+            f"{' (auto)' if self.parent.adaptive_concurrency.enabled else ''} | Avg wait: {int(average_wait)}s"
+        )
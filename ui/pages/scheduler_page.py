@@ -1,19 +1,41 @@
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                             QTableWidget, QTableWidgetItem, QHeaderView,
                             QDialog, QFormLayout, QCheckBox, QDateTimeEdit,
-                            QComboBox)
+                            QComboBox, QLineEdit)
 from PySide6.QtCore import Qt, QDateTime, QTimer
 from PySide6.QtGui import QFont
 from ui.components.animated_button import AnimatedButton
 from ui.components.drag_drop_line_edit import DragDropLineEdit
 from core.downloader import DownloadTask
+from core.scheduler import get_download_schedule
+from core.url_parser import canonical_url
+import time
+
+# The timer is never armed further ahead than this, so a clock change or a
+# suspended machine delays a download by at most this long.
+MAX_TIMER_MS = 60 * 60 * 1000
+# Repeat choices of the dialog; the custom one takes a cron expression.
+REPEAT_CHOICES = {"Once": None, "Every hour": 3600, "Every day": 86400, "Every week": 604800}
+CUSTOM_REPEAT = "Custom (cron)"
+
+def repeat_label(repeat):
+    if not repeat:
+        return "Once"
+    for label, value in REPEAT_CHOICES.items():
+        if value == repeat:
+            return label
+    if isinstance(repeat, str):
+        return repeat
+    return f"Every {int(repeat)} s"
 
 class SchedulerPage(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent = parent
+        self.schedule = get_download_schedule()
         self.init_ui()
         self.setup_timer()
+        self.load_schedule()
 
     def init_ui(self):
         layout = QVBoxLayout(self)
@@ -24,8 +46,8 @@ class SchedulerPage(QWidget):
         layout.addWidget(lbl)
         
         self.scheduler_table = QTableWidget()
-        self.scheduler_table.setColumnCount(6)
-        self.scheduler_table.setHorizontalHeaderLabels(["Datetime","URL","Type","Resolution","Subtitles","Status"])
+        self.scheduler_table.setColumnCount(7)
+        self.scheduler_table.setHorizontalHeaderLabels(["Datetime","URL","Type","Resolution","Subtitles","Status","Repeat"])
         hh = self.scheduler_table.horizontalHeader()
         hh.setSectionResizeMode(0, QHeaderView.ResizeToContents)
         hh.setSectionResizeMode(1, QHeaderView.Stretch)
@@ -33,6 +55,7 @@ class SchedulerPage(QWidget):
         hh.setSectionResizeMode(3, QHeaderView.ResizeToContents)
         hh.setSectionResizeMode(4, QHeaderView.ResizeToContents)
         hh.setSectionResizeMode(5, QHeaderView.ResizeToContents)
+        hh.setSectionResizeMode(6, QHeaderView.ResizeToContents)
         layout.addWidget(self.scheduler_table)
         
         hl = QHBoxLayout()
@@ -47,9 +70,48 @@ class SchedulerPage(QWidget):
         layout.addStretch()
 
     def setup_timer(self):
-        self.scheduler_timer = QTimer()
+        self.scheduler_timer = QTimer(self)
+        self.scheduler_timer.setSingleShot(True)
+        self.scheduler_timer.setTimerType(Qt.PreciseTimer)
         self.scheduler_timer.timeout.connect(self.check_scheduled_downloads)
-        self.scheduler_timer.start(10000) 
+
+    def arm_timer(self):
+        """Wake up when the next entry is due."""
+        due = self.schedule.next_due()
+        if due is None:
+            self.scheduler_timer.stop()
+            return
+        delay_ms = int(max(0, due - time.time()) * 1000)
+        self.scheduler_timer.start(min(delay_ms, MAX_TIMER_MS))
+
+    def load_schedule(self):
+        self.scheduler_table.setRowCount(0)
+        for entry in self.schedule.all():
+            self.add_row(entry)
+        # Entries that came due while the app was closed start right away.
+        self.arm_timer()
+
+    def add_row(self, entry):
+        row = self.scheduler_table.rowCount()
+        self.scheduler_table.insertRow(row)
+        self.scheduler_table.setItem(row, 1, QTableWidgetItem(entry["url"]))
+        self.scheduler_table.setItem(row, 2, QTableWidgetItem(entry["type"]))
+        self.scheduler_table.setItem(row, 3, QTableWidgetItem(entry["resolution"]))
+        self.scheduler_table.setItem(row, 4, QTableWidgetItem("Yes" if entry["subtitles"] else "No"))
+        self.scheduler_table.setItem(row, 6, QTableWidgetItem(repeat_label(entry.get("repeat"))))
+        self.update_row(row, entry)
+
+    def update_row(self, row, entry):
+        dt_item = QTableWidgetItem(QDateTime.fromSecsSinceEpoch(int(entry["due"])).toString("yyyy-MM-dd HH:mm:ss"))
+        dt_item.setData(Qt.UserRole, entry["id"])
+        self.scheduler_table.setItem(row, 0, dt_item)
+        self.scheduler_table.setItem(row, 5, QTableWidgetItem(entry["status"]))
+
+    def row_of(self, entry_id):
+        for row in range(self.scheduler_table.rowCount()):
+            if self.scheduler_table.item(row, 0).data(Qt.UserRole) == entry_id:
+                return row
+        return None
 
     def add_scheduled_dialog(self):
         d = QDialog(self)
@@ -64,6 +126,13 @@ class SchedulerPage(QWidget):
         url_edit = DragDropLineEdit("Enter link")
         c_audio = QCheckBox("Audio Only")
         c_subs = QCheckBox("Download Subtitles?")
+        c_playlist = QCheckBox("Playlist / Channel")
+        repeat_combo = QComboBox()
+        repeat_combo.addItems(list(REPEAT_CHOICES) + [CUSTOM_REPEAT])
+        cron_edit = QLineEdit()
+        cron_edit.setPlaceholderText("minute hour day month weekday, e.g. 0 3 * * *")
+        cron_edit.setEnabled(False)
+        repeat_combo.currentTextChanged.connect(lambda text: cron_edit.setEnabled(text == CUSTOM_REPEAT))
         
         res_combo = QComboBox()
         res_combo.addItems(["144p","240p","360p","480p","720p","1080p","1440p","2160p","4320p"])
@@ -72,8 +141,11 @@ class SchedulerPage(QWidget):
         frm.addRow("Datetime:", dt_edit)
         frm.addRow("URL:", url_edit)
         frm.addRow("Resolution:", res_combo)
+        frm.addRow("Repeat:", repeat_combo)
+        frm.addRow("Cron:", cron_edit)
         frm.addRow(c_audio)
         frm.addRow(c_subs)
+        frm.addRow(c_playlist)
         ly.addLayout(frm)
         
         b_ok = AnimatedButton("Add")
@@ -89,19 +161,29 @@ class SchedulerPage(QWidget):
             if not url:
                 self.parent.show_warning("Error", "No URL.")
                 return
+            try:
+                url = canonical_url(url, c_playlist.isChecked())
+            except ValueError as e:
+                self.parent.show_warning("Error", str(e))
+                return
+            if repeat_combo.currentText() == CUSTOM_REPEAT:
+                repeat = cron_edit.text().strip()
+            else:
+                repeat = REPEAT_CHOICES[repeat_combo.currentText()]
                 
-            row = self.scheduler_table.rowCount()
-            self.scheduler_table.insertRow(row)
-            self.scheduler_table.setItem(row, 0, QTableWidgetItem(dt_val.toString("yyyy-MM-dd HH:mm:ss")))
-            self.scheduler_table.setItem(row, 1, QTableWidgetItem(url))
-            
-            download_type = "Audio" if c_audio.isChecked() else "Video"
-            self.scheduler_table.setItem(row, 2, QTableWidgetItem(download_type))
-            self.scheduler_table.setItem(row, 3, QTableWidgetItem(res_combo.currentText()))
-            
-            subs_text = "Yes" if c_subs.isChecked() else "No"
-            self.scheduler_table.setItem(row, 4, QTableWidgetItem(subs_text))
-            self.scheduler_table.setItem(row, 5, QTableWidgetItem("Scheduled"))
+            try:
+                self.schedule_download(
+                    dt_val.toSecsSinceEpoch(),
+                    url,
+                    "Audio" if c_audio.isChecked() else "Video",
+                    res_combo.currentText(),
+                    c_subs.isChecked(),
+                    c_playlist.isChecked(),
+                    repeat
+                )
+            except ValueError as e:
+                self.parent.show_warning("Error", str(e))
+                return
             
             d.accept()
             
@@ -112,45 +194,43 @@ class SchedulerPage(QWidget):
         b_cancel.clicked.connect(on_cancel)
         d.exec()
 
+    def schedule_download(self, due, url, download_type="Video", resolution="720p", subtitles=False, playlist=False, repeat=None):
+        entry = self.schedule.add(due, url, download_type, resolution, subtitles, playlist, repeat)
+        self.add_row(entry)
+        self.arm_timer()
+        return entry
+
     def remove_scheduled_item(self):
         selected_rows = set()
         for item in self.scheduler_table.selectedItems():
             selected_rows.add(item.row())
         
+        self.schedule.remove(self.scheduler_table.item(row, 0).data(Qt.UserRole) for row in selected_rows)
         for row in sorted(selected_rows, reverse=True):
             self.scheduler_table.removeRow(row)
+        self.arm_timer()
 
     def check_scheduled_downloads(self):
-        now = QDateTime.currentDateTime()
-        for row in range(self.scheduler_table.rowCount()):
-            dt_str = self.scheduler_table.item(row, 0).text()
-            scheduled_dt = QDateTime.fromString(dt_str, "yyyy-MM-dd HH:mm:ss")
-            status_item = self.scheduler_table.item(row, 5)
-            
-            now_secs = now.toSecsSinceEpoch()
-            scheduled_secs = scheduled_dt.toSecsSinceEpoch()
-            
-            if status_item and scheduled_secs <= now_secs and status_item.text() == "Scheduled":
-                url = self.scheduler_table.item(row, 1).text()
-                type_text = self.scheduler_table.item(row, 2).text().lower()
-                resolution = self.scheduler_table.item(row, 3).text()
-                subtitles = (self.scheduler_table.item(row, 4).text() == "Yes")
-                
-          
-                
-                task = DownloadTask(
-                    url,
-                    resolution,
-                    self.parent.user_profile.get_download_path(),
-                    self.parent.user_profile.get_proxy(),
-                    audio_only=("audio" in type_text),
-                    playlist=False,
-                    subtitles=subtitles,
-                    from_queue=True,
-                    output_format="mp4",
-                    audio_format=self.parent.user_profile.get_audio_format() if "audio" in type_text else None,
-                    audio_quality=self.parent.user_profile.get_audio_quality() if "audio" in type_text else "320"
-                )
-                
-                self.parent.run_task(task, row)
-                self.scheduler_table.setItem(row, 5, QTableWidgetItem("Started")) 
\ No newline at end of file
+        for entry in self.schedule.take_due():
+            audio_only = "audio" in entry["type"].lower()
+            task = DownloadTask(
+                entry["url"],
+                entry["resolution"],
+                self.parent.user_profile.get_download_path(),
+                self.parent.user_profile.get_proxy(),
+                audio_only=audio_only,
+                playlist=entry.get("playlist", False),
+                subtitles=entry["subtitles"],
+                from_queue=True,
+                output_format=self.parent.user_profile.get_audio_format() if audio_only else "mp4",
+                audio_format=self.parent.user_profile.get_audio_format() if audio_only else None,
+                audio_quality=self.parent.user_profile.get_audio_quality() if audio_only else "320",
+                # A subscription only fetches what earlier runs did not.
+                incremental=bool(entry.get("repeat"))
+            )
+            # Started downloads live in the queue, where their progress is shown.
+            self.parent.page_queue.enqueue(task, entry["type"])
+            row = self.row_of(entry["id"])
+            if row is not None:
+                self.update_row(row, self.schedule.get(entry["id"]) or entry)
+        self.arm_timer()
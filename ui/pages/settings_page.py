@@ -1,10 +1,30 @@
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                             QGroupBox, QFormLayout, QLineEdit, QComboBox, 
-                            QFileDialog, QMessageBox, QScrollArea)
-from PySide6.QtCore import Qt
+                            QFileDialog, QMessageBox, QScrollArea,
+                            QTableWidget, QTableWidgetItem, QHeaderView,
+                            QDialog, QTimeEdit, QAbstractItemView)
+from PySide6.QtCore import Qt, QTime
 from PySide6.QtGui import QFont
 from ui.components.animated_button import AnimatedButton
 from core.version import get_version
+from core.bandwidth import get_bandwidth_limiter
+from core.time_windows import TimeWindow
+
+# Bandwidth limit choices in bytes per second, 0 is unlimited.
+BANDWIDTH_CHOICES = {
+    "Unlimited": 0,
+    "512 KB/s": 512 * 1024,
+    "1 MB/s": 1024 ** 2,
+    "2 MB/s": 2 * 1024 ** 2,
+    "5 MB/s": 5 * 1024 ** 2,
+    "10 MB/s": 10 * 1024 ** 2,
+    "20 MB/s": 20 * 1024 ** 2,
+    "50 MB/s": 50 * 1024 ** 2
+}
+# Concurrent downloads choice that lets the app pick the number.
+AUTO_CONCURRENCY = "Auto"
+# A time window may leave a limit at its normal setting.
+KEEP_LIMIT = "Keep"
 
 class SettingsPage(QWidget):
     def __init__(self, parent=None):
@@ -82,21 +102,114 @@ class SettingsPage(QWidget):
         g_layout = QHBoxLayout(g_con)
         g_layout.setContentsMargins(10, 10, 10, 10)
         self.concurrent_combo = QComboBox()
-        self.concurrent_combo.addItems(["1","2","3","4","5","10"])
-        self.concurrent_combo.setCurrentText(str(self.parent.max_concurrent_downloads))
+        self.concurrent_combo.addItems(["1","2","3","4","5","10",AUTO_CONCURRENCY])
+        if self.parent.user_profile.get_auto_concurrency():
+            self.concurrent_combo.setCurrentText(AUTO_CONCURRENCY)
+        else:
+            self.concurrent_combo.setCurrentText(str(self.parent.max_concurrent_downloads))
         self.concurrent_combo.currentIndexChanged.connect(self.set_max_concurrent_downloads)
         self.concurrent_combo.setToolTip(
             "Maximum simultaneous downloads:\n"
             "• 1 - Single download (safest, slowest)\n"
             "• 2-3 - Balanced performance\n"
             "• 4-5 - Fast downloads (recommended)\n"
-            "• 10 - Maximum speed (may cause issues)\n\n"
+            "• 10 - Maximum speed (may cause issues)\n"
+            "• Auto - Adds downloads while the total speed grows\n"
+            "  and backs off on retries or throttling\n\n"
             "Higher numbers = faster but more CPU/network usage"
         )
         g_layout.addWidget(QLabel("Concurrent:"))
         g_layout.addWidget(self.concurrent_combo)
+        self.process_mode_combo = QComboBox()
+        self.process_mode_combo.addItems(["Threads","Processes"])
+        self.process_mode_combo.setCurrentText("Processes" if self.parent.user_profile.get_process_mode() else "Threads")
+        self.process_mode_combo.currentTextChanged.connect(self.process_mode_changed)
+        self.process_mode_combo.setToolTip(
+            "Where downloads run:\n"
+            "• Threads - Inside the app (lowest memory use)\n"
+            "• Processes - One worker process per download,\n"
+            "  keeps the UI responsive with many downloads\n\n"
+            "Applies to downloads started after the change"
+        )
+        g_layout.addWidget(QLabel("Run in:"))
+        g_layout.addWidget(self.process_mode_combo)
         layout.addWidget(g_con)
 
+        # Per-site limits, counted within the concurrent downloads above
+        g_hosts = QGroupBox("Per-Site Limits")
+        g_hosts.setMinimumWidth(300)
+        h_layout = QHBoxLayout(g_hosts)
+        h_layout.setContentsMargins(10, 10, 10, 10)
+        host_limits = self.parent.user_profile.get_host_limits()
+        self.host_limit_combos = {}
+        for host, label in (("youtube", "YouTube:"), ("*", "Each other site:")):
+            combo = QComboBox()
+            combo.addItems(["No limit","1","2","3","4","5","10"])
+            combo.setCurrentText(str(host_limits[host]) if host_limits.get(host) else "No limit")
+            combo.currentTextChanged.connect(lambda text, host=host: self.host_limit_changed(host, text))
+            combo.setToolTip(
+                "How many downloads from one site may run at once.\n"
+                "Sites throttle or block clients that open too many\n"
+                "connections; other sites use the remaining slots."
+            )
+            self.host_limit_combos[host] = combo
+            h_layout.addWidget(QLabel(label))
+            h_layout.addWidget(combo)
+        layout.addWidget(g_hosts)
+
+        # Bandwidth, shared fairly among the running downloads
+        g_bw = QGroupBox("Bandwidth")
+        g_bw.setMinimumWidth(300)
+        bw_layout = QHBoxLayout(g_bw)
+        bw_layout.setContentsMargins(10, 10, 10, 10)
+        self.bandwidth_combo = self.make_bandwidth_combo(self.parent.user_profile.get_bandwidth_limit())
+        self.bandwidth_combo.currentTextChanged.connect(self.bandwidth_limit_changed)
+        self.bandwidth_combo.setToolTip(
+            "Total download speed of all downloads together.\n"
+            "It is split evenly among the running downloads;\n"
+            "what one does not use goes to the others."
+        )
+        self.job_bandwidth_combo = self.make_bandwidth_combo(self.parent.user_profile.get_job_bandwidth_limit())
+        self.job_bandwidth_combo.currentTextChanged.connect(self.job_bandwidth_limit_changed)
+        self.job_bandwidth_combo.setToolTip("Highest speed of a single download.")
+        bw_layout.addWidget(QLabel("Total:"))
+        bw_layout.addWidget(self.bandwidth_combo)
+        bw_layout.addWidget(QLabel("Per download:"))
+        bw_layout.addWidget(self.job_bandwidth_combo)
+        layout.addWidget(g_bw)
+
+        # Time windows, overriding the limits above at certain hours
+        g_windows = QGroupBox("Time Windows")
+        g_windows.setMinimumWidth(300)
+        w_layout = QVBoxLayout(g_windows)
+        w_layout.setContentsMargins(10, 10, 10, 10)
+        self.windows_table = QTableWidget()
+        self.windows_table.setColumnCount(3)
+        self.windows_table.setHorizontalHeaderLabels(["Window","Concurrent","Bandwidth"])
+        self.windows_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.windows_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.windows_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.windows_table.setMaximumHeight(140)
+        self.windows_table.setToolTip(
+            "Limits that apply every day between two times, e.g.\n"
+            "8 unlimited downloads at night and one slow download\n"
+            "during office hours. Running downloads switch over at\n"
+            "the start and end of a window; downloads above a lower\n"
+            "limit are paused and queued again."
+        )
+        for window in self.parent.user_profile.get_time_windows():
+            self.add_window_row(TimeWindow.from_dict(window))
+        w_layout.addWidget(self.windows_table)
+        w_buttons = QHBoxLayout()
+        b_add_window = AnimatedButton("Add Window")
+        b_add_window.clicked.connect(self.add_window_dialog)
+        b_remove_window = AnimatedButton("Remove Selected")
+        b_remove_window.clicked.connect(self.remove_selected_windows)
+        w_buttons.addWidget(b_add_window)
+        w_buttons.addWidget(b_remove_window)
+        w_layout.addLayout(w_buttons)
+        layout.addWidget(g_windows)
+
         # Technical Group
         g_tech = QGroupBox("Technical / Appearance")
         g_tech.setMinimumWidth(300)
@@ -105,13 +218,12 @@ class SettingsPage(QWidget):
         fl.setSpacing(10)
         self.proxy_edit = QLineEdit()
         self.proxy_edit.setText(self.parent.user_profile.get_proxy())
-        self.proxy_edit.setPlaceholderText("Proxy or bandwidth limit...")
+        self.proxy_edit.setPlaceholderText("Proxy server...")
         self.proxy_edit.textChanged.connect(self.proxy_changed)
         self.proxy_edit.setToolTip(
-            "Proxy/Bandwidth settings:\n"
+            "Proxy settings:\n"
             "• HTTP Proxy: http://proxy.server.com:8080\n"
-            "• SOCKS5 Proxy: socks5://proxy.server.com:1080\n"
-            "• Bandwidth limit: --limit-rate 1M\n\n"
+            "• SOCKS5 Proxy: socks5://proxy.server.com:1080\n\n"
             "Leave empty for direct connection"
         )
         
@@ -125,7 +237,7 @@ class SettingsPage(QWidget):
             "• Light - Traditional interface\n\n"
             "Changes apply immediately"
         )
-        fl.addRow("Proxy/BW:", self.proxy_edit)
+        fl.addRow("Proxy:", self.proxy_edit)
         fl.addRow("Theme:", self.theme_combo)
         layout.addWidget(g_tech)
 
@@ -390,9 +502,114 @@ class SettingsPage(QWidget):
 
     def set_max_concurrent_downloads(self, idx):
         val = self.concurrent_combo.currentText()
-        self.parent.max_concurrent_downloads = int(val)
+        self.parent.set_auto_concurrency(val == AUTO_CONCURRENCY)
+        if val != AUTO_CONCURRENCY:
+            self.parent.max_concurrent_downloads = int(val)
         self.parent.append_log(f"Max concurrent downloads set to {val}")
 
+    def host_limit_changed(self, host, text):
+        limit = None if text == "No limit" else int(text)
+        self.parent.user_profile.set_host_limit(host, limit)
+        self.parent.dispatcher.set_host_limits(self.parent.user_profile.get_host_limits())
+        name = "YouTube" if host == "youtube" else "other sites"
+        self.parent.append_log(f"Download limit for {name} set to {text.lower()}")
+
+    def make_bandwidth_combo(self, limit):
+        combo = QComboBox()
+        combo.addItems(list(BANDWIDTH_CHOICES))
+        combo.setCurrentText(next((text for text, value in BANDWIDTH_CHOICES.items() if value == limit), "Unlimited"))
+        return combo
+
+    def bandwidth_limit_changed(self, text):
+        self.parent.user_profile.set_bandwidth_limit(BANDWIDTH_CHOICES[text])
+        self.parent.window_policy.set_base(bandwidth=BANDWIDTH_CHOICES[text])
+        self.parent.append_log(f"Total bandwidth limit set to {text.lower()}")
+
+    def job_bandwidth_limit_changed(self, text):
+        self.parent.user_profile.set_job_bandwidth_limit(BANDWIDTH_CHOICES[text])
+        get_bandwidth_limiter().configure(job_cap=BANDWIDTH_CHOICES[text])
+        self.parent.append_log(f"Bandwidth limit per download set to {text.lower()}")
+
+    def bandwidth_text(self, limit):
+        return next((text for text, value in BANDWIDTH_CHOICES.items() if value == limit), f"{limit // 1024} KB/s")
+
+    def add_window_row(self, window):
+        row = self.windows_table.rowCount()
+        self.windows_table.insertRow(row)
+        label_item = QTableWidgetItem(window.label())
+        label_item.setData(Qt.UserRole, window.to_dict())
+        self.windows_table.setItem(row, 0, label_item)
+        self.windows_table.setItem(row, 1, QTableWidgetItem(str(window.max_concurrent) if window.max_concurrent else KEEP_LIMIT))
+        self.windows_table.setItem(row, 2, QTableWidgetItem(KEEP_LIMIT if window.bandwidth is None else self.bandwidth_text(window.bandwidth)))
+
+    def time_windows(self):
+        return [TimeWindow.from_dict(self.windows_table.item(row, 0).data(Qt.UserRole)) for row in range(self.windows_table.rowCount())]
+
+    def save_time_windows(self):
+        windows = self.time_windows()
+        self.parent.user_profile.set_time_windows([window.to_dict() for window in windows])
+        self.parent.window_policy.set_windows(windows)
+
+    def add_window_dialog(self):
+        d = QDialog(self)
+        d.setWindowTitle("Add Time Window")
+        d.setModal(True)
+        ly = QVBoxLayout(d)
+
+        frm = QFormLayout()
+        start_edit = QTimeEdit(QTime(1, 0))
+        start_edit.setDisplayFormat("HH:mm")
+        end_edit = QTimeEdit(QTime(7, 0))
+        end_edit.setDisplayFormat("HH:mm")
+        concurrent_combo = QComboBox()
+        concurrent_combo.addItems([KEEP_LIMIT,"1","2","3","4","5","8","10"])
+        bandwidth_combo = QComboBox()
+        bandwidth_combo.addItems([KEEP_LIMIT] + list(BANDWIDTH_CHOICES))
+        frm.addRow("From:", start_edit)
+        frm.addRow("Until:", end_edit)
+        frm.addRow("Concurrent:", concurrent_combo)
+        frm.addRow("Bandwidth:", bandwidth_combo)
+        ly.addLayout(frm)
+
+        b_ok = AnimatedButton("Add")
+        b_cancel = AnimatedButton("Cancel")
+        btn_layout = QHBoxLayout()
+        btn_layout.addWidget(b_ok)
+        btn_layout.addWidget(b_cancel)
+        ly.addLayout(btn_layout)
+
+        def on_ok():
+            concurrent = concurrent_combo.currentText()
+            bandwidth = bandwidth_combo.currentText()
+            window = TimeWindow(
+                start_edit.time().toString("HH:mm"),
+                end_edit.time().toString("HH:mm"),
+                None if concurrent == KEEP_LIMIT else int(concurrent),
+                None if bandwidth == KEEP_LIMIT else BANDWIDTH_CHOICES[bandwidth]
+            )
+            self.add_window_row(window)
+            self.save_time_windows()
+            self.parent.append_log(f"Time window {window.label()} added")
+            d.accept()
+
+        b_ok.clicked.connect(on_ok)
+        b_cancel.clicked.connect(d.reject)
+        d.exec()
+
+    def remove_selected_windows(self):
+        rows = {item.row() for item in self.windows_table.selectedItems()}
+        if not rows:
+            return
+        for row in sorted(rows, reverse=True):
+            self.windows_table.removeRow(row)
+        self.save_time_windows()
+
+    def process_mode_changed(self, mode):
+        enabled = mode == "Processes"
+        self.parent.user_profile.set_process_mode(enabled)
+        self.parent.dispatcher.set_process_mode(enabled)
+        self.parent.append_log(f"Downloads now run in: {mode.lower()}")
+
     def proxy_changed(self, text):
         self.parent.user_profile.set_proxy(text)
         self.parent.append_log(f"Proxy setting updated: {text}")
@@ -436,6 +653,7 @@ class SettingsPage(QWidget):
             )
             self.download_path_edit.setText(folder)
             self.parent.append_log(f"Download path changed to {folder}")
+            self.parent.scan_library()
 
     def toggle_logs(self):
         self.parent.log_manager.toggle_visibility()